@@ -0,0 +1,268 @@
+"""
+In-process Home Assistant stand-in for the benchmarks.
+
+Provides just the parts of the homeassistant package the integration
+imports, with the behavior that matters for performance kept real:
+
+- Store reads and writes JSON files in the executor (encoded with
+  orjson, written atomically), and async_delay_save debounces on the
+  event loop like Home Assistant's Store
+- the event bus calls listeners on the loop and counts what was fired
+- executor jobs run in a thread pool
+
+Everything else (config entries, WebSocket registration, HTTP client)
+is a no-op. Call install() before importing the integration.
+"""
+import asyncio
+import os
+import sys
+import types
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
+
+STORAGE_DIR = ".storage"
+
+
+def callback(func: Callable) -> Callable:
+    """Mark a function as safe to run in the event loop."""
+    func._hass_callback = True  # pylint: disable=protected-access
+    return func
+
+
+def json_bytes(data: Any) -> bytes:
+    """Encode like homeassistant.helpers.json.json_bytes."""
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+
+def json_loads(data: Any) -> Any:
+    """Decode like homeassistant.util.json.json_loads."""
+    return orjson.loads(data)
+
+
+class Event:
+    """Fired event."""
+
+    def __init__(self, event_type: str, data: Optional[dict] = None):
+        """Initialize the event."""
+        self.event_type = event_type
+        self.data = data or {}
+
+
+class EventBus:
+    """Event bus calling listeners on the loop and counting events."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        """Initialize the bus."""
+        self._loop = loop
+        self._listeners: Dict[str, List[Callable]] = {}
+        self.fired: Dict[str, int] = {}
+
+    def async_fire(self, event_type: str, event_data: Optional[dict] = None) -> None:
+        """Fire an event."""
+        self.fired[event_type] = self.fired.get(event_type, 0) + 1
+        for listener in self._listeners.get(event_type, ()):
+            self._loop.call_soon(listener, Event(event_type, event_data))
+
+    def async_listen(self, event_type: str, listener: Callable) -> Callable:
+        """Listen for an event."""
+        self._listeners.setdefault(event_type, []).append(listener)
+        return lambda: self._listeners[event_type].remove(listener)
+
+    async_listen_once = async_listen
+
+
+class Config:
+    """Configuration directory."""
+
+    def __init__(self, config_dir: str):
+        """Initialize the config."""
+        self.config_dir = config_dir
+
+    def path(self, *parts: str) -> str:
+        """Path inside the configuration directory."""
+        return os.path.join(self.config_dir, *parts)
+
+
+class HomeAssistant:
+    """Minimal core object backed by a real directory."""
+
+    def __init__(self, config_dir: str):
+        """Initialize the stand-in (call from a running loop)."""
+        self.loop = asyncio.get_running_loop()
+        self.bus = EventBus(self.loop)
+        self.config = Config(config_dir)
+        self.data: Dict[str, Any] = {}
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bench")
+        self._tasks: set = set()
+
+        # Bytes written by every Store
+        self.storage_bytes_written = 0
+
+    def async_add_executor_job(self, target: Callable, *args: Any) -> asyncio.Future:
+        """Run a function in the executor."""
+        return self.loop.run_in_executor(self._executor, target, *args)
+
+    def async_create_task(self, target, name: Optional[str] = None, eager_start: bool = False):
+        """Create a tracked task."""
+        task = self.loop.create_task(target, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async_create_background_task = async_create_task
+
+    async def async_block_till_done(self) -> None:
+        """Wait for all tracked tasks, including ones they start."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def async_stop(self) -> None:
+        """Wait for tasks and stop the executor."""
+        await self.async_block_till_done()
+        self._executor.shutdown(wait=True)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """Write a file via a temporary file and rename (runs in the executor)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+def _read(path: str) -> Optional[bytes]:
+    """Read a file if it exists (runs in the executor)."""
+    try:
+        with open(path, "rb") as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+class Store:
+    """JSON file store with Home Assistant's save and delayed-save behavior."""
+
+    def __init__(self, hass: HomeAssistant, version: int, key: str, **_kwargs: Any):
+        """Initialize the store."""
+        self.hass = hass
+        self.version = version
+        self.key = key
+        self.path = hass.config.path(STORAGE_DIR, key)
+        self._delay_handle: Optional[asyncio.TimerHandle] = None
+        self._data_func: Optional[Callable[[], Any]] = None
+        self._write_lock = asyncio.Lock()
+
+    async def async_load(self) -> Any:
+        """Load the stored data."""
+        raw = await self.hass.async_add_executor_job(_read, self.path)
+        if raw is None:
+            return None
+        return orjson.loads(raw)["data"]
+
+    async def async_save(self, data: Any) -> None:
+        """Save now, cancelling a pending delayed save."""
+        self._cancel_delay()
+        await self._async_write(data)
+
+    def async_delay_save(self, data_func: Callable[[], Any], delay: float = 0) -> None:
+        """Save after a delay; a new call restarts the delay."""
+        self._data_func = data_func
+        self._cancel_delay()
+        self._delay_handle = self.hass.loop.call_later(delay, self._async_callback_delayed)
+
+    def _cancel_delay(self) -> None:
+        """Cancel a pending delayed save."""
+        if self._delay_handle is not None:
+            self._delay_handle.cancel()
+            self._delay_handle = None
+
+    def _async_callback_delayed(self) -> None:
+        """Delay expired: build the data in the loop and write it."""
+        self._delay_handle = None
+        data_func, self._data_func = self._data_func, None
+        if data_func is not None:
+            self.hass.async_create_task(self._async_write(data_func()))
+
+    async def _async_write(self, data: Any) -> None:
+        """Encode and write in the executor, one write at a time."""
+        payload = {"version": self.version, "minor_version": 1, "key": self.key, "data": data}
+        async with self._write_lock:
+            written = await self.hass.async_add_executor_job(self._encode_and_write, payload)
+        self.hass.storage_bytes_written += written
+
+    def _encode_and_write(self, payload: dict) -> int:
+        """Encode with indentation like Home Assistant and write; return the size."""
+        data = orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        _write_atomic(self.path, data)
+        return len(data)
+
+
+def _noop(*_args: Any, **_kwargs: Any) -> Callable:
+    """Accept anything, do nothing, return an unsubscribe no-op."""
+    return lambda: None
+
+
+def _passthrough_decorator(*_args: Any, **_kwargs: Any) -> Callable:
+    """Decorator factory that leaves the function unchanged."""
+    return lambda func: func
+
+
+def install() -> None:
+    """Register the stand-in as the homeassistant package."""
+    def module(name: str, **attrs: Any) -> types.ModuleType:
+        mod = types.ModuleType(name)
+        mod.__dict__.update(attrs)
+        mod.__path__ = []  # importable as a package
+        sys.modules[name] = mod
+        parent, _, child = name.rpartition(".")
+        if parent:
+            setattr(sys.modules[parent], child, mod)
+        return mod
+
+    module("homeassistant")
+    module(
+        "homeassistant.core",
+        HomeAssistant=HomeAssistant,
+        Event=Event,
+        ServiceCall=object,
+        ServiceResponse=Optional[dict],
+        SupportsResponse=types.SimpleNamespace(NONE="none", OPTIONAL="optional", ONLY="only"),
+        callback=callback,
+    )
+    module(
+        "homeassistant.const",
+        EVENT_HOMEASSISTANT_STOP="homeassistant_stop",
+    )
+    module(
+        "homeassistant.exceptions",
+        HomeAssistantError=type("HomeAssistantError", (Exception,), {}),
+        ServiceValidationError=type("ServiceValidationError", (Exception,), {}),
+    )
+    module("homeassistant.config_entries", ConfigEntry=object, ConfigFlow=object)
+    module("homeassistant.helpers")
+    module("homeassistant.helpers.storage", Store=Store, STORAGE_DIR=STORAGE_DIR)
+    module("homeassistant.helpers.json", json_bytes=json_bytes)
+    module("homeassistant.helpers.event", async_track_time_interval=_noop)
+    module("homeassistant.helpers.start", async_at_started=_noop)
+    module("homeassistant.helpers.service", async_register_admin_service=_noop)
+    module("homeassistant.helpers.aiohttp_client", async_get_clientsession=_noop)
+    module("homeassistant.util")
+    module("homeassistant.util.json", json_loads=json_loads)
+    module("homeassistant.components")
+    module(
+        "homeassistant.components.websocket_api",
+        ActiveConnection=object,
+        websocket_command=_passthrough_decorator,
+        async_response=lambda func: func,
+        async_register_command=_noop,
+    )
+    module(
+        "homeassistant.components.websocket_api.messages",
+        construct_result_message=lambda iden, payload: (
+            b'{"id":' + str(iden).encode()
+            + b',"type":"result","success":true,"result":' + payload + b"}"
+        ),
+    )
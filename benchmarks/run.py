@@ -0,0 +1,511 @@
+"""
+Benchmark suite for Shopping List Manager.
+
+Runs ShoppingListManager in-process against the Home Assistant
+stand-in in fake_hass.py, with real files in a temporary directory.
+For each catalog size a synthetic catalog is generated once (from a
+fixed seed) and every benchmark starts from a freshly loaded manager.
+
+Usage:
+    python benchmarks/run.py
+    python benchmarks/run.py --sizes 1000 10000 --engine sqlite
+    python benchmarks/run.py --output new.json --baseline old.json
+
+Requires orjson and voluptuous (both Home Assistant dependencies).
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import fake_hass
+
+fake_hass.install()
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "custom_components"))
+
+# pylint: disable=wrong-import-position
+from shopping_list_manager.const import (  # noqa: E402
+    BATCH_MAX_OPS,
+    CATEGORY_ORDER,
+    DEFAULT_LIST_ID,
+    ENGINE_JOURNAL,
+    ENGINE_SQLITE,
+    ENGINE_STORE,
+    OP_ADD_PRODUCT,
+    OP_SET_QTY,
+)
+from shopping_list_manager.instrumentation import Instrumentation  # noqa: E402
+from shopping_list_manager.manager import ShoppingListManager  # noqa: E402
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_SEED = 1234
+# Fraction of the catalog on the default list
+ACTIVE_FRACTION = 0.05
+
+_ADJECTIVES = (
+    "Organic", "Fresh", "Frozen", "Whole", "Smoked", "Sweet", "Spicy", "Light",
+    "Classic", "Wild", "Roasted", "Salted", "Unsalted", "Greek", "Italian",
+)
+_NOUNS = (
+    "Milk", "Bread", "Butter", "Cheese", "Apples", "Bananas", "Tomatoes",
+    "Chicken", "Salmon", "Rice", "Pasta", "Coffee", "Tea", "Yoghurt", "Eggs",
+    "Carrots", "Potatoes", "Onions", "Beans", "Juice", "Crisps", "Biscuits",
+)
+
+
+# ============================================================================
+# Measurement helpers
+# ============================================================================
+
+def _summary(samples_ms: List[float]) -> dict:
+    """Exact percentiles of latency samples (milliseconds)."""
+    if not samples_ms:
+        return {"count": 0}
+    ordered = sorted(samples_ms)
+
+    def pct(fraction: float) -> float:
+        return round(ordered[min(int(fraction * len(ordered)), len(ordered) - 1)], 4)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 4),
+        "p50": pct(0.5),
+        "p95": pct(0.95),
+        "p99": pct(0.99),
+        "max": round(ordered[-1], 4),
+    }
+
+
+async def _timed(func: Callable[[], Awaitable[Any]]) -> float:
+    """Run a coroutine function once and return its duration in ms."""
+    started = time.perf_counter()
+    await func()
+    return (time.perf_counter() - started) * 1000
+
+
+def _storage_bytes(config_dir: str) -> Dict[str, int]:
+    """Size of every file under .storage."""
+    path = os.path.join(config_dir, fake_hass.STORAGE_DIR)
+    sizes = {}
+    for name in sorted(os.listdir(path)) if os.path.isdir(path) else ():
+        sizes[name] = os.path.getsize(os.path.join(path, name))
+    return sizes
+
+
+def _git_revision() -> Optional[str]:
+    """Current commit of the repository, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ============================================================================
+# Catalog
+# ============================================================================
+
+def _catalog(size: int, seed: int) -> List[Tuple[str, str, str]]:
+    """Deterministic synthetic catalog of (key, name, category)."""
+    rng = random.Random(seed)
+    categories = list(CATEGORY_ORDER)
+    return [
+        (
+            f"p{index}",
+            f"{rng.choice(_ADJECTIVES)} {rng.choice(_NOUNS)} {index}",
+            rng.choice(categories),
+        )
+        for index in range(size)
+    ]
+
+
+class Bench:
+    """One catalog size on one storage engine, in its own directory."""
+
+    def __init__(self, size: int, engine: str, seed: int, instrumentation: bool):
+        """Initialize the benchmark."""
+        self.size = size
+        self.engine = engine
+        self.seed = seed
+        self.instrumentation = instrumentation
+        self.catalog = _catalog(size, seed)
+        self.config_dir = tempfile.mkdtemp(prefix=f"slm_bench_{size}_")
+        self._snapshots: List[dict] = []
+
+    def cleanup(self) -> None:
+        """Remove the benchmark directory."""
+        shutil.rmtree(self.config_dir, ignore_errors=True)
+
+    async def _open(self) -> Tuple[fake_hass.HomeAssistant, ShoppingListManager]:
+        """Fresh stand-in and manager, loaded from disk."""
+        hass = fake_hass.HomeAssistant(self.config_dir)
+        manager = ShoppingListManager(
+            hass,
+            save_delay=0.05,
+            storage_engine=self.engine,
+            instrumentation=Instrumentation(enabled=self.instrumentation),
+        )
+        await manager.async_load()
+        return hass, manager
+
+    async def _close(self, hass: fake_hass.HomeAssistant, manager: ShoppingListManager) -> None:
+        """Flush, keep the instrumentation data and shut down."""
+        await manager.async_close()
+        await hass.async_stop()
+        if self.instrumentation:
+            self._snapshots.append(manager.instrumentation.snapshot())
+
+    async def generate(self) -> float:
+        """Write the catalog and the default list through the manager."""
+        hass, manager = await self._open()
+        started = time.perf_counter()
+        for start in range(0, self.size, BATCH_MAX_OPS):
+            await manager.async_apply_batch([
+                {"op": OP_ADD_PRODUCT, "key": key, "name": name, "category": category}
+                for key, name, category in self.catalog[start:start + BATCH_MAX_OPS]
+            ])
+        rng = random.Random(self.seed)
+        active = rng.sample(self.catalog, max(1, int(self.size * ACTIVE_FRACTION)))
+        for start in range(0, len(active), BATCH_MAX_OPS):
+            await manager.async_apply_batch([
+                {"op": OP_SET_QTY, "key": key, "qty": rng.randint(1, 5)}
+                for key, _, _ in active[start:start + BATCH_MAX_OPS]
+            ])
+        await manager.async_flush()
+        elapsed = (time.perf_counter() - started) * 1000
+        await manager.async_close()
+        await hass.async_stop()
+        return elapsed
+
+    # ------------------------------------------------------------------------
+    # Benchmarks
+    # ------------------------------------------------------------------------
+
+    async def bench_load(self, repeat: int = 3) -> dict:
+        """Startup: async_load of the whole catalog."""
+        samples, stats = [], {}
+        for _ in range(repeat):
+            hass = fake_hass.HomeAssistant(self.config_dir)
+            manager = ShoppingListManager(hass, storage_engine=self.engine)
+            samples.append(await _timed(manager.async_load))
+            stats = manager.get_load_stats()
+            await manager.async_close()
+            await hass.async_stop()
+        return {"ms": _summary(samples), "last": stats}
+
+    async def bench_memory(self) -> dict:
+        """Memory held by a loaded manager, traced with tracemalloc."""
+        hass = fake_hass.HomeAssistant(self.config_dir)
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        manager = ShoppingListManager(hass, storage_engine=self.engine)
+        await manager.async_load()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        await manager.async_close()
+        await hass.async_stop()
+        retained = current - before
+        return {
+            "retained_bytes": retained,
+            "peak_bytes": peak - before,
+            "bytes_per_product": round(retained / self.size, 1),
+        }
+
+    async def bench_add_product(self, count: int = 500) -> dict:
+        """Sequential new products, then the flush that writes them."""
+        hass, manager = await self._open()
+        samples = []
+        for index in range(count):
+            samples.append(await _timed(lambda index=index: manager.async_add_product(
+                f"bench_{index}", f"Benchmark product {index}", "other"
+            )))
+        flush_ms = await _timed(manager.async_flush)
+        result = {
+            "ms": _summary(samples),
+            "flush_ms": round(flush_ms, 3),
+            "persistence": manager.get_persistence_stats(),
+        }
+        await self._close(hass, manager)
+        return result
+
+    async def bench_set_qty_burst(self, count: int = 1000) -> dict:
+        """A burst of quantity changes on random products."""
+        hass, manager = await self._open()
+        rng = random.Random(self.seed + 1)
+        keys = [key for key, _, _ in self.catalog]
+        samples = []
+        started = time.perf_counter()
+        for _ in range(count):
+            key, qty = rng.choice(keys), rng.randint(0, 5)
+            samples.append(await _timed(lambda key=key, qty=qty: manager.async_set_qty(key, qty)))
+        burst_ms = (time.perf_counter() - started) * 1000
+        flush_ms = await _timed(manager.async_flush)
+        result = {
+            "ms": _summary(samples),
+            "ops_per_s": round(count / (burst_ms / 1000), 1),
+            "flush_ms": round(flush_ms, 3),
+            "events_fired": sum(hass.bus.fired.values()),
+            "persistence": manager.get_persistence_stats(),
+        }
+        await self._close(hass, manager)
+        return result
+
+    async def bench_full_state(self, count: int = 20) -> dict:
+        """Full state as a dict, and as JSON right after a write."""
+        hass, manager = await self._open()
+        keys = [key for key, _, _ in self.catalog]
+        as_dict = [await _timed(manager.async_get_full_state) for _ in range(count)]
+
+        async def json_after_write(index: int) -> None:
+            await manager.async_set_qty(keys[index % len(keys)], index % 3)
+            started = time.perf_counter()
+            manager.get_full_state_json(DEFAULT_LIST_ID)
+            json_samples.append((time.perf_counter() - started) * 1000)
+
+        json_samples: List[float] = []
+        for index in range(count):
+            await json_after_write(index)
+        result = {
+            "dict_ms": _summary(as_dict),
+            "json_after_write_ms": _summary(json_samples),
+            "json_bytes": len(manager.get_full_state_json(DEFAULT_LIST_ID)),
+        }
+        await self._close(hass, manager)
+        return result
+
+    async def bench_search(self, count: int = 200) -> dict:
+        """Prefix and one-typo searches for names in the catalog."""
+        hass, manager = await self._open()
+        rng = random.Random(self.seed + 2)
+        samples = []
+        for index in range(count):
+            word = rng.choice(rng.choice(self.catalog)[1].split()[:2])
+            if index % 2:
+                pos = rng.randrange(len(word))
+                query = word[:pos] + word[pos + 1:]  # drop one letter
+            else:
+                query = word[:rng.randint(3, max(3, len(word)))]
+            started = time.perf_counter()
+            manager.search_products(query, limit=20)
+            samples.append((time.perf_counter() - started) * 1000)
+        result = {"ms": _summary(samples)}
+        await self._close(hass, manager)
+        return result
+
+    async def bench_write_bytes(self, count: int = 200) -> dict:
+        """Bytes written per mutation, each flushed: JSON documents vs journal."""
+        result = {}
+        for engine in (ENGINE_STORE, ENGINE_JOURNAL):
+            # Both engines read the same documents; work on a copy
+            config_dir = tempfile.mkdtemp(prefix=f"slm_bench_{engine}_")
+            shutil.copytree(self.config_dir, config_dir, dirs_exist_ok=True)
+            hass = fake_hass.HomeAssistant(config_dir)
+            manager = ShoppingListManager(hass, save_delay=0, storage_engine=engine)
+            await manager.async_load()
+            rng = random.Random(self.seed + 3)
+            keys = [key for key, _, _ in self.catalog]
+
+            def written() -> int:
+                journal = manager.get_persistence_stats().get("journal", {})
+                return hass.storage_bytes_written + journal.get("bytes_written", 0)
+
+            before = written()
+            for _ in range(count):
+                await manager.async_set_qty(rng.choice(keys), rng.randint(0, 5))
+                await manager.async_flush()
+            total = written() - before
+            await manager.async_close()
+            await hass.async_stop()
+            shutil.rmtree(config_dir, ignore_errors=True)
+            result[engine] = {
+                "mutations": count,
+                "bytes": total,
+                "bytes_per_mutation": round(total / count, 1),
+            }
+        return result
+
+    async def bench_mixed(
+        self, readers: int = 8, writers: int = 2, duration: float = 2.0
+    ) -> dict:
+        """Concurrent readers and writers: read latency under a write storm."""
+        hass, manager = await self._open()
+        keys = [key for key, _, _ in self.catalog]
+        reads: List[float] = []
+        writes: List[float] = []
+        deadline = time.perf_counter() + duration
+
+        async def reader(index: int) -> None:
+            while time.perf_counter() < deadline:
+                if index % 2:
+                    reads.append(await _timed(manager.async_get_active))
+                else:
+                    reads.append(await _timed(manager.async_get_full_state))
+                await asyncio.sleep(0)
+
+        async def writer(index: int) -> None:
+            rng = random.Random(self.seed + 100 + index)
+            while time.perf_counter() < deadline:
+                key, qty = rng.choice(keys), rng.randint(0, 5)
+                writes.append(await _timed(lambda key=key, qty=qty: manager.async_set_qty(key, qty)))
+                await asyncio.sleep(0)
+
+        await asyncio.gather(
+            *(reader(index) for index in range(readers)),
+            *(writer(index) for index in range(writers)),
+        )
+        result = {
+            "readers": readers,
+            "writers": writers,
+            "duration_s": duration,
+            "read_ms": _summary(reads),
+            "write_ms": _summary(writes),
+            "reads_per_s": round(len(reads) / duration, 1),
+            "writes_per_s": round(len(writes) / duration, 1),
+        }
+        await self._close(hass, manager)
+        return result
+
+    async def run(self) -> dict:
+        """Generate the catalog and run every benchmark."""
+        results: Dict[str, Any] = {"generate_ms": round(await self.generate(), 1)}
+        results["storage_bytes"] = _storage_bytes(self.config_dir)
+        names = ["load", "memory", "add_product", "set_qty_burst", "full_state", "search", "mixed"]
+        if self.engine != ENGINE_SQLITE:
+            # Needs the JSON documents the store and journal engines share
+            names.append("write_bytes")
+        for name in names:
+            print(f"  {self.size:>7} {name}", file=sys.stderr)
+            results[name] = await getattr(self, f"bench_{name}")()
+        if self.instrumentation:
+            results["instrumentation"] = self._snapshots
+        return results
+
+
+# ============================================================================
+# Comparison
+# ============================================================================
+
+# Leaves compared against a baseline (lower is better)
+_COMPARED = ("mean", "p95", "p99")
+
+
+def _flatten(data: Any, prefix: str = "") -> Dict[str, float]:
+    """Numeric latency leaves of a results tree, keyed by dotted path."""
+    flat = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            path = f"{prefix}.{key}" if prefix else str(key)
+            if isinstance(value, (int, float)) and key in _COMPARED:
+                flat[path] = float(value)
+            elif isinstance(value, dict) and key not in ("persistence", "last"):
+                flat.update(_flatten(value, path))
+    return flat
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """
+    Compare latency leaves with a previous run.
+
+    Args:
+        current: Results of this run
+        baseline: Results of a previous run (same format)
+        threshold: Relative slowdown reported as a regression (0.1 = 10%)
+
+    Returns:
+        Paths of regressed metrics
+    """
+    now = _flatten(current["results"])
+    before = _flatten(baseline["results"])
+    regressions = []
+    for path in sorted(now.keys() & before.keys()):
+        old, new = before[path], now[path]
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(path)
+        print(f"{path:<50} {old:>10.3f} {new:>10.3f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+# ============================================================================
+# Main
+# ============================================================================
+
+async def _async_main(args: argparse.Namespace) -> dict:
+    """Run all sizes."""
+    results = {}
+    for size in args.sizes:
+        bench = Bench(size, args.engine, args.seed, args.instrumentation)
+        try:
+            results[str(size)] = await bench.run()
+        finally:
+            bench.cleanup()
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "engine": args.engine,
+            "seed": args.seed,
+            "sizes": args.sizes,
+        },
+        "results": results,
+    }
+
+
+def main() -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument(
+        "--engine", choices=(ENGINE_STORE, ENGINE_JOURNAL, ENGINE_SQLITE), default=ENGINE_STORE
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", help="Write results to this JSON file (default: stdout)")
+    parser.add_argument("--baseline", help="Compare with a previous results file")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1,
+        help="Relative slowdown reported as a regression (default 0.1)",
+    )
+    parser.add_argument(
+        "--instrumentation", action="store_true",
+        help="Enable the integration's instrumentation and include its data",
+    )
+    args = parser.parse_args()
+
+    report = asyncio.run(_async_main(args))
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(encoded + "\n")
+    else:
+        print(encoded)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
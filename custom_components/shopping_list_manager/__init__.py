@@ -2,138 +2,181 @@
 Shopping List Manager - Home Assistant Custom Integration
 Clean-slate architecture with enforced invariants
 """
+import asyncio
 import logging
+import time
+from datetime import timedelta
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.components import websocket_api
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import (
+    Event,
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.service import async_register_admin_service
+from homeassistant.helpers.start import async_at_started
 
-from .const import DOMAIN
+from .const import (
+    CONF_EVENT_DELAY,
+    CONF_INSTRUMENTATION,
+    CONF_SAVE_DELAY,
+    CONF_STORAGE_ENGINE,
+    CONF_UNDO_DEPTH,
+    CONF_UNDO_MEMORY,
+    DEFAULT_EVENT_DELAY,
+    DEFAULT_SAVE_DELAY,
+    DEFAULT_STORAGE_ENGINE,
+    DEFAULT_UNDO_DEPTH,
+    DEFAULT_UNDO_MEMORY,
+    DOMAIN,
+    IMAGE_RESCAN_INTERVAL,
+    PLATFORMS,
+    SERVICE_EXPORT_CATALOG,
+    SERVICE_IMPORT_CATALOG,
+    TRANSFER_DIR,
+    TRANSFER_FORMATS,
+)
+from .images import LocalImageIndex
+from .instrumentation import Instrumentation
 from .manager import ShoppingListManager
+from .thumbnails import ThumbnailCache
+from .transfer import detect_format, resolve_transfer_path
+from .websocket_api import async_register_commands
 
 _LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Shopping List Manager from a config entry."""
+    started = time.monotonic()
+    
     # Initialize the manager
-    manager = ShoppingListManager(hass)
-    await manager.async_load()
+    instrumentation = Instrumentation(
+        enabled=entry.options.get(CONF_INSTRUMENTATION, False)
+    )
+    thumbnails = ThumbnailCache(hass)
+    image_index = LocalImageIndex(hass)
+    manager = ShoppingListManager(
+        hass,
+        save_delay=entry.options.get(CONF_SAVE_DELAY, DEFAULT_SAVE_DELAY),
+        thumbnails=thumbnails,
+        storage_engine=entry.options.get(CONF_STORAGE_ENGINE, DEFAULT_STORAGE_ENGINE),
+        instrumentation=instrumentation,
+        event_delay=entry.options.get(CONF_EVENT_DELAY, DEFAULT_EVENT_DELAY),
+        undo_depth=entry.options.get(CONF_UNDO_DEPTH, DEFAULT_UNDO_DEPTH),
+        undo_memory=entry.options.get(CONF_UNDO_MEMORY, DEFAULT_UNDO_MEMORY),
+    )
+    
+    # Independent loads run concurrently (file I/O is in the executor)
+    await asyncio.gather(
+        manager.async_load(),
+        thumbnails.async_load(),
+        image_index.async_load(),
+    )
+    
+    # Writing repairs found during load must not delay startup
+    entry.async_on_unload(async_at_started(hass, manager.async_persist_repairs))
+    
+    # Flush coalesced writes at shutdown
+    async def _async_flush_on_stop(event: Event) -> None:
+        await manager.async_flush()
+        await thumbnails.async_shutdown()
+    
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_flush_on_stop)
+    )
+    
+    # Pick up added/removed local product images
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass, image_index.async_refresh, timedelta(seconds=IMAGE_RESCAN_INTERVAL)
+        )
+    )
     
     # Store manager in hass.data
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN]["manager"] = manager
+    hass.data[DOMAIN]["image_index"] = image_index
+    hass.data[DOMAIN]["thumbnails"] = thumbnails
+    hass.data[DOMAIN]["instrumentation"] = instrumentation
     
-    # Register WebSocket commands manually
-    register_websocket_commands(hass)
+    async_register_commands(hass)
+    register_services(hass)
     
-    _LOGGER.info("Shopping List Manager setup complete")
+    # Optional performance sensors (disabled by default in the entity registry)
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    
+    _LOGGER.info(
+        "Shopping List Manager setup complete in %.1f ms (load: %s)",
+        (time.monotonic() - started) * 1000,
+        manager.get_load_stats(),
+    )
     
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload Shopping List Manager."""
-    hass.data[DOMAIN].pop("manager", None)
+    if not await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+        return False
+    for service in (SERVICE_IMPORT_CATALOG, SERVICE_EXPORT_CATALOG):
+        hass.services.async_remove(DOMAIN, service)
+    hass.data[DOMAIN].pop("instrumentation", None)
+    hass.data[DOMAIN].pop("image_index", None)
+    manager = hass.data[DOMAIN].pop("manager", None)
+    if manager is not None:
+        # Cancels thumbnail swaps, then writes pending coalesced changes
+        await manager.async_close()
+    thumbnails = hass.data[DOMAIN].pop("thumbnails", None)
+    if thumbnails is not None:
+        await thumbnails.async_shutdown()
     return True
 
 
-def register_websocket_commands(hass: HomeAssistant) -> None:
-    """Register all WebSocket commands."""
-    import voluptuous as vol
-    from .models import InvariantError
-    
-    @websocket_api.websocket_command({
-        vol.Required("type"): "shopping_list_manager/add_product",
-        vol.Required("key"): str,
-        vol.Required("name"): str,
-        vol.Optional("category", default="other"): str,
-        vol.Optional("unit", default="pcs"): str,
-        vol.Optional("image", default=""): str,
-    })
-    @websocket_api.async_response
-    async def handle_add_product(hass, connection, msg):
-        """Add or update a product."""
-        manager = hass.data[DOMAIN]["manager"]
-        try:
-            product = await manager.async_add_product(
-                key=msg["key"],
-                name=msg["name"],
-                category=msg.get("category", "other"),
-                unit=msg.get("unit", "pcs"),
-                image=msg.get("image", "")
-            )
-            connection.send_result(msg["id"], product.to_dict())
-        except Exception as err:
-            _LOGGER.error("Error adding product: %s", err)
-            connection.send_error(msg["id"], "add_product_failed", str(err))
+def register_services(hass: HomeAssistant) -> None:
+    """
+    Register catalog import/export services.
     
-    @websocket_api.websocket_command({
-        vol.Required("type"): "shopping_list_manager/set_qty",
-        vol.Required("key"): str,
-        vol.Required("qty"): vol.All(int, vol.Range(min=0)),
-    })
-    @websocket_api.async_response
-    async def handle_set_qty(hass, connection, msg):
-        """Set quantity for a product."""
-        manager = hass.data[DOMAIN]["manager"]
-        try:
-            await manager.async_set_qty(key=msg["key"], qty=msg["qty"])
-            connection.send_result(msg["id"], {"success": True})
-        except InvariantError as err:
-            _LOGGER.warning("Invariant violation in set_qty: %s", err)
-            connection.send_error(msg["id"], "invariant_violation", str(err))
-        except Exception as err:
-            _LOGGER.error("Error setting quantity: %s", err)
-            connection.send_error(msg["id"], "set_qty_failed", str(err))
+    Both are admin-only and confined to <config>/shopping_list_manager/:
+    an export could otherwise overwrite configuration or .storage files,
+    and an import could read any file under the config directory.
+    """
+    import voluptuous as vol
     
-    @websocket_api.websocket_command({
-        vol.Required("type"): "shopping_list_manager/get_products",
+    schema = vol.Schema({
+        vol.Required("path"): str,
+        vol.Optional("format"): vol.In(TRANSFER_FORMATS),
     })
-    @websocket_api.async_response
-    async def handle_get_products(hass, connection, msg):
-        """Get all products."""
-        manager = hass.data[DOMAIN]["manager"]
-        try:
-            products = await manager.async_get_products()
-            connection.send_result(msg["id"], products)
-        except Exception as err:
-            _LOGGER.error("Error getting products: %s", err)
-            connection.send_error(msg["id"], "get_products_failed", str(err))
     
-    @websocket_api.websocket_command({
-        vol.Required("type"): "shopping_list_manager/get_active",
-    })
-    @websocket_api.async_response
-    async def handle_get_active(hass, connection, msg):
-        """Get active shopping list."""
+    async def async_transfer(call: ServiceCall) -> ServiceResponse:
+        """Import or export the catalog (path relative to the transfer dir)."""
         manager = hass.data[DOMAIN]["manager"]
         try:
-            active = await manager.async_get_active()
-            connection.send_result(msg["id"], active)
-        except Exception as err:
-            _LOGGER.error("Error getting active list: %s", err)
-            connection.send_error(msg["id"], "get_active_failed", str(err))
-    
-    @websocket_api.websocket_command({
-        vol.Required("type"): "shopping_list_manager/delete_product",
-        vol.Required("key"): str,
-    })
-    @websocket_api.async_response
-    async def handle_delete_product(hass, connection, msg):
-        """Delete a product."""
-        manager = hass.data[DOMAIN]["manager"]
+            path = resolve_transfer_path(
+                hass.config.path(TRANSFER_DIR), call.data["path"]
+            )
+        except ValueError as err:
+            raise ServiceValidationError(str(err)) from err
+        
         try:
-            await manager.async_delete_product(key=msg["key"])
-            connection.send_result(msg["id"], {"success": True})
-        except Exception as err:
-            _LOGGER.error("Error deleting product: %s", err)
-            connection.send_error(msg["id"], "delete_product_failed", str(err))
-    
-    # Register all commands with Home Assistant
-    websocket_api.async_register_command(hass, handle_add_product)
-    websocket_api.async_register_command(hass, handle_set_qty)
-    websocket_api.async_register_command(hass, handle_get_products)
-    websocket_api.async_register_command(hass, handle_get_active)
-    websocket_api.async_register_command(hass, handle_delete_product)
+            fmt = detect_format(path, call.data.get("format"))
+            if call.service == SERVICE_IMPORT_CATALOG:
+                return await manager.async_import_products(path, fmt)
+            return await manager.async_export_products(path, fmt)
+        except (OSError, ValueError) as err:
+            raise HomeAssistantError(f"{call.service} failed: {err}") from err
     
-    _LOGGER.info("Registered 5 WebSocket commands for Shopping List Manager")
\ No newline at end of file
+    for service in (SERVICE_IMPORT_CATALOG, SERVICE_EXPORT_CATALOG):
+        async_register_admin_service(
+            hass,
+            DOMAIN,
+            service,
+            async_transfer,
+            schema=schema,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
@@ -0,0 +1,651 @@
+"""Storage backends for Shopping List Manager."""
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import storage
+
+from .const import (
+    CHANGE_PRODUCT_DELETED,
+    CHANGE_PRODUCT_UPSERTED,
+    CHANGE_QTY_CHANGED,
+    DEFAULT_LIST_ID,
+    DOMAIN,
+    ENGINE_JOURNAL,
+    ENGINE_SQLITE,
+    STORAGE_KEY_ACTIVE,
+    STORAGE_KEY_JOURNAL,
+    STORAGE_KEY_LISTS,
+    STORAGE_KEY_PRODUCTS,
+    STORAGE_KEY_SQLITE,
+)
+from .instrumentation import Instrumentation
+from .models import (
+    ActiveItem,
+    Product,
+    StateSnapshot,
+    active_from_dict,
+    products_from_dict,
+    to_serializable,
+)
+from .persistence import CoalescingStore, JournalStore
+
+_LOGGER = logging.getLogger(__name__)
+
+# Loaded state: (products, list id -> active list, highest persisted revision or 0)
+LoadedState = Tuple[Dict[str, Product], Dict[str, Dict[str, ActiveItem]], int]
+
+# Journal-only change recording that a list was created (it may be empty)
+_JOURNAL_LIST_CREATED = "list_created"
+
+
+def _active_storage_key(list_id: str) -> str:
+    """Store key for a list (the default list keeps the original flat key)."""
+    if list_id == DEFAULT_LIST_ID:
+        return STORAGE_KEY_ACTIVE
+    return f"{DOMAIN}.{list_id}.active_list"
+
+
+def _replay_changes(
+    products: Dict[str, Product],
+    active_lists: Dict[str, Dict[str, ActiveItem]],
+    changes: List[dict],
+) -> None:
+    """
+    Apply journaled changes to plain dicts, in order.
+
+    Only records newer than the base may be replayed (see JournalStore).
+    Orphans are left to the invariant repair.
+    """
+    for change in changes:
+        if change["type"] == CHANGE_PRODUCT_UPSERTED:
+            products[change["key"]] = Product.from_dict(change["product"])
+        elif change["type"] == CHANGE_PRODUCT_DELETED:
+            products.pop(change["key"], None)
+            for active_list in active_lists.values():
+                active_list.pop(change["key"], None)
+        elif change["type"] == CHANGE_QTY_CHANGED:
+            active_list = active_lists.setdefault(change["list_id"], {})
+            if change["qty"] > 0:
+                active_list[change["key"]] = ActiveItem(qty=change["qty"])
+            else:
+                active_list.pop(change["key"], None)
+        elif change["type"] == _JOURNAL_LIST_CREATED:
+            active_lists.setdefault(change["list_id"], {})
+
+
+class StorageBackend:
+    """
+    Interface between ShoppingListManager and persistent storage.
+
+    The manager owns the in-memory state and calls the backend on the
+    event loop: once at startup to load, then after every commit with
+    the typed changes. Backends must never block the event loop; writes
+    may be deferred as long as async_flush makes them durable.
+    """
+
+    async def async_load(self) -> LoadedState:
+        """Load products and every list."""
+        raise NotImplementedError
+
+    @callback
+    def async_commit(
+        self,
+        revision: int,
+        changes: List[dict],
+        lists_changed: Set[str],
+        lists_created: Set[str],
+    ) -> None:
+        """Persist one committed transaction."""
+        raise NotImplementedError
+
+    @callback
+    def async_rewrite_list(self, list_id: str) -> None:
+        """Persist a list repaired in memory after load."""
+        raise NotImplementedError
+
+    async def async_flush(self) -> None:
+        """Make every committed change durable."""
+        raise NotImplementedError
+
+    async def async_close(self) -> None:
+        """Flush and release resources."""
+        await self.async_flush()
+
+    def stats(self) -> dict:
+        """Return backend counters."""
+        raise NotImplementedError
+
+
+class JsonStoreBackend(StorageBackend):
+    """
+    One JSON document per collection through Home Assistant's Store.
+
+    Products, the list registry and each list are separate
+    CoalescingStores, so a commit only rewrites what it touched and
+    bursts of commits are coalesced into one write per document.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        save_delay: float,
+        state_func: Callable[[], StateSnapshot],
+        instrumentation: Optional[Instrumentation] = None,
+    ):
+        """Initialize the backend."""
+        self.hass = hass
+        self._save_delay = save_delay
+        self._state_func = state_func
+        self._instrumentation = instrumentation
+
+        # Debounced; serialize the published state lazily at write time
+        self._store_products = CoalescingStore(
+            hass, STORAGE_KEY_PRODUCTS, self._data_products, save_delay, instrumentation
+        )
+        self._store_lists = CoalescingStore(
+            hass, STORAGE_KEY_LISTS, self._data_lists, save_delay, instrumentation
+        )
+        self._store_active: Dict[str, CoalescingStore] = {}
+
+        # Revision stamped into the list registry by journal compaction
+        self._base_revision = 0
+
+    def _active_store(self, list_id: str) -> CoalescingStore:
+        """Get (creating on first use) the store of one list."""
+        store = self._store_active.get(list_id)
+        if store is None:
+            store = CoalescingStore(
+                self.hass,
+                _active_storage_key(list_id),
+                lambda: self._data_active(list_id),
+                self._save_delay,
+                self._instrumentation,
+            )
+            self._store_active[list_id] = store
+        return store
+
+    def _data_products(self) -> Dict[str, Product]:
+        """Products for storage (called at write time, encoded by the Store)."""
+        return to_serializable(self._state_func().products)
+
+    def _data_active(self, list_id: str) -> Dict[str, ActiveItem]:
+        """One list for storage (called at write time, encoded by the Store)."""
+        return to_serializable(self._state_func().active(list_id))
+
+    def _data_lists(self) -> dict:
+        """List registry for storage (called at write time)."""
+        return {"lists": sorted(self._state_func().active_lists)}
+
+    async def async_load(self) -> LoadedState:
+        """
+        Load products and every list concurrently.
+
+        Files are read and parsed by the Store in the executor; building
+        model objects for a large catalog also runs in the executor.
+        """
+        products, active_lists = await asyncio.gather(
+            self._async_load_products(), self._async_load_lists()
+        )
+        return products, active_lists, 0
+
+    async def _async_load_products(self) -> Dict[str, Product]:
+        """Load the catalog."""
+        products_data = await self._store_products.async_load()
+        if not products_data:
+            return {}
+        return await self.hass.async_add_executor_job(products_from_dict, products_data)
+
+    async def _async_load_lists(self) -> Dict[str, Dict[str, ActiveItem]]:
+        """Load the list registry, then all lists at once."""
+        lists_data = await self._store_lists.async_load()
+        list_ids = set(lists_data["lists"]) if lists_data else set()
+        self._base_revision = lists_data.get("revision", 0) if lists_data else 0
+        list_ids.add(DEFAULT_LIST_ID)
+
+        list_ids = sorted(list_ids)
+        lists_data = await asyncio.gather(
+            *(self._active_store(list_id).async_load() for list_id in list_ids)
+        )
+        return {
+            list_id: active_from_dict(active_data) if active_data else {}
+            for list_id, active_data in zip(list_ids, lists_data)
+        }
+
+    @callback
+    def async_commit(
+        self,
+        revision: int,
+        changes: List[dict],
+        lists_changed: Set[str],
+        lists_created: Set[str],
+    ) -> None:
+        """Schedule a (coalesced) save of each changed document."""
+        if any(change["type"] != CHANGE_QTY_CHANGED for change in changes):
+            self._store_products.async_schedule_save()
+        for list_id in lists_changed:
+            self._active_store(list_id).async_schedule_save()
+        if lists_created:
+            self._store_lists.async_schedule_save()
+
+    @callback
+    def async_rewrite_list(self, list_id: str) -> None:
+        """Schedule a save of a repaired list."""
+        self._active_store(list_id).async_schedule_save()
+
+    async def async_flush(self) -> None:
+        """Write pending coalesced saves."""
+        await self._store_products.async_flush()
+        await self._store_lists.async_flush()
+        for store in list(self._store_active.values()):
+            await store.async_flush()
+
+    def stats(self) -> dict:
+        """
+        Return write coalescing counters.
+
+        Returns:
+            {
+                "products": {"save_requests": ..., "writes": ..., ...},
+                "lists": {...},
+                "active_lists": {"groceries": {...}, ...}
+            }
+        """
+        return {
+            "products": self._store_products.stats(),
+            "lists": self._store_lists.stats(),
+            "active_lists": {
+                list_id: store.stats()
+                for list_id, store in self._store_active.items()
+            },
+        }
+
+
+class JournalBackend(JsonStoreBackend):
+    """
+    Append-only journal over the JSON documents.
+
+    Commits are appended to the journal; the documents are the base
+    snapshot and are only rewritten when the journal is compacted.
+    The list registry is written last and carries the base revision,
+    so it only claims a base once every other document is written.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        save_delay: float,
+        state_func: Callable[[], StateSnapshot],
+        instrumentation: Optional[Instrumentation] = None,
+    ):
+        """Initialize the backend."""
+        super().__init__(hass, save_delay, state_func, instrumentation)
+        self._journal = JournalStore(
+            hass, STORAGE_KEY_JOURNAL, instrumentation=instrumentation
+        )
+        self._compact_task: Optional[asyncio.Task] = None
+
+    async def async_load(self) -> LoadedState:
+        """Load the base documents and the journal concurrently, then replay."""
+        (products, active_lists, revision), records = await asyncio.gather(
+            super().async_load(), self._journal.async_load()
+        )
+        revision = max(revision, self._base_revision)
+        replayed = 0
+        for record in records:
+            if record["r"] <= self._base_revision:
+                # Already in the base (crash during compaction)
+                continue
+            _replay_changes(products, active_lists, record["c"])
+            revision = max(revision, record["r"])
+            replayed += 1
+        if replayed:
+            _LOGGER.debug("Replayed %d journal records", replayed)
+        if replayed < len(records):
+            _LOGGER.info(
+                "Skipped %d journal records already in the base (revision %d)",
+                len(records) - replayed,
+                self._base_revision,
+            )
+        return products, active_lists, revision
+
+    @callback
+    def async_commit(
+        self,
+        revision: int,
+        changes: List[dict],
+        lists_changed: Set[str],
+        lists_created: Set[str],
+    ) -> None:
+        """
+        Append to the journal, compacting once it passes a threshold.
+
+        New lists get a record of their own, ahead of the commit's, so a
+        list survives a crash before compaction even if it ends up empty.
+        """
+        if lists_created:
+            self._journal.async_append(revision, [
+                {"type": _JOURNAL_LIST_CREATED, "list_id": list_id}
+                for list_id in sorted(lists_created)
+            ])
+        self._journal.async_append(revision, changes)
+        if self._journal.needs_compaction and (
+            self._compact_task is None or self._compact_task.done()
+        ):
+            self._compact_task = self.hass.async_create_background_task(
+                self._journal.async_compact(self._async_write_base),
+                f"{DOMAIN} journal compaction",
+            )
+
+    def _data_lists(self) -> dict:
+        """List registry with the base revision."""
+        return {**super()._data_lists(), "revision": self._base_revision}
+
+    async def _async_write_base(self, revision: int) -> None:
+        """Write every document, then the registry stamped with revision."""
+        await self._store_products.async_save()
+        for list_id in list(self._state_func().active_lists):
+            await self._active_store(list_id).async_save()
+        self._base_revision = revision
+        await self._store_lists.async_save()
+
+    async def async_flush(self) -> None:
+        """Write queued journal records (and any repaired list)."""
+        await self._journal.async_flush()
+        await super().async_flush()
+
+    def stats(self) -> dict:
+        """Return document and journal counters."""
+        stats = super().stats()
+        stats["journal"] = self._journal.stats()
+        return stats
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    unit TEXT NOT NULL,
+    image TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS products_name ON products (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS products_category ON products (category, name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS lists (
+    list_id TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS active_items (
+    list_id TEXT NOT NULL REFERENCES lists (list_id) ON DELETE CASCADE,
+    key TEXT NOT NULL REFERENCES products (key) ON DELETE CASCADE,
+    qty INTEGER NOT NULL CHECK (qty > 0),
+    PRIMARY KEY (list_id, key)
+);
+CREATE INDEX IF NOT EXISTS active_items_key ON active_items (key);
+"""
+
+_UPSERT_PRODUCT = (
+    "INSERT INTO products (key, name, category, unit, image) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (key) DO UPDATE SET name = excluded.name, "
+    "category = excluded.category, unit = excluded.unit, image = excluded.image"
+)
+_UPSERT_ITEM = (
+    "INSERT INTO active_items (list_id, key, qty) VALUES (?, ?, ?) "
+    "ON CONFLICT (list_id, key) DO UPDATE SET qty = excluded.qty"
+)
+_INSERT_LIST = "INSERT OR IGNORE INTO lists (list_id) VALUES (?)"
+
+
+class _SqliteDatabase:
+    """Synchronous SQLite access; only ever used from one executor thread."""
+
+    def __init__(self, path: str):
+        """Open (creating if needed) the database."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        # The active -> product invariant is a foreign key
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(_SCHEMA)
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """Read a meta value."""
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def load(self) -> Tuple[Dict[str, Product], Dict[str, Dict[str, ActiveItem]], int]:
+        """Read everything."""
+        products = {
+            row[0]: Product(*row)
+            for row in self._conn.execute(
+                "SELECT key, name, category, unit, image FROM products"
+            )
+        }
+        active_lists: Dict[str, Dict[str, ActiveItem]] = {
+            row[0]: {} for row in self._conn.execute("SELECT list_id FROM lists")
+        }
+        for list_id, key, qty in self._conn.execute(
+            "SELECT list_id, key, qty FROM active_items"
+        ):
+            active_lists[list_id][key] = ActiveItem(qty=qty)
+        revision = int(self.get_meta("revision") or 0)
+        return products, active_lists, revision
+
+    def import_state(
+        self,
+        products: Dict[str, Product],
+        active_lists: Dict[str, Dict[str, ActiveItem]],
+    ) -> None:
+        """Bulk insert a whole state in one transaction (migration)."""
+        with self._conn:
+            self._conn.executemany(
+                _UPSERT_PRODUCT,
+                (
+                    (p.key, p.name, p.category, p.unit, p.image)
+                    for p in products.values()
+                ),
+            )
+            self._conn.executemany(_INSERT_LIST, ((list_id,) for list_id in active_lists))
+            self._conn.executemany(
+                _UPSERT_ITEM,
+                (
+                    (list_id, key, item.qty)
+                    for list_id, active_list in active_lists.items()
+                    for key, item in active_list.items()
+                    # Orphans would violate the foreign key
+                    if key in products
+                ),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated', '1')"
+            )
+
+    def apply(self, revision: int, changes: Iterable[dict]) -> None:
+        """Apply one commit's changes as single-row statements in one transaction."""
+        with self._conn:
+            for change in changes:
+                if change["type"] == CHANGE_PRODUCT_UPSERTED:
+                    product = change["product"]
+                    self._conn.execute(_UPSERT_PRODUCT, (
+                        change["key"],
+                        product["name"],
+                        product["category"],
+                        product["unit"],
+                        product["image"],
+                    ))
+                elif change["type"] == CHANGE_PRODUCT_DELETED:
+                    # Cascades to every list
+                    self._conn.execute(
+                        "DELETE FROM products WHERE key = ?", (change["key"],)
+                    )
+                elif change["type"] == CHANGE_QTY_CHANGED:
+                    if change["qty"] > 0:
+                        self._conn.execute(_INSERT_LIST, (change["list_id"],))
+                        self._conn.execute(
+                            _UPSERT_ITEM, (change["list_id"], change["key"], change["qty"])
+                        )
+                    else:
+                        self._conn.execute(
+                            "DELETE FROM active_items WHERE list_id = ? AND key = ?",
+                            (change["list_id"], change["key"]),
+                        )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('revision', ?)",
+                (str(revision),),
+            )
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._conn.close()
+
+
+class SqliteBackend(StorageBackend):
+    """
+    SQLite database in .storage, written one row per change.
+
+    Each commit becomes one transaction of single-row upserts/deletes,
+    so save cost no longer grows with the catalog. Products are
+    indexed by name and category; active items reference products and
+    lists with ON DELETE CASCADE foreign keys, so the invariant also
+    holds in the database. All database work runs on one dedicated
+    executor thread, which also keeps commits in order.
+
+    On first start the existing JSON documents, with any journal
+    records not yet compacted into them, are migrated once; they are
+    left in place untouched.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        save_delay: float,
+        state_func: Callable[[], StateSnapshot],
+        instrumentation: Optional[Instrumentation] = None,
+    ):
+        """Initialize the backend."""
+        self.hass = hass
+        self._save_delay = save_delay
+        self._state_func = state_func
+        self._instrumentation = instrumentation
+        self._path = hass.config.path(storage.STORAGE_DIR, STORAGE_KEY_SQLITE)
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="shopping_list_sqlite"
+        )
+        self._db: Optional[_SqliteDatabase] = None
+        self._pending: Set[asyncio.Future] = set()
+
+        # Counters
+        self.transactions = 0
+        self.statements = 0
+
+    async def _async_run(self, func, *args):
+        """Run a database call on the database thread."""
+        return await self.hass.loop.run_in_executor(self._executor, func, *args)
+
+    async def async_load(self) -> LoadedState:
+        """Open the database, migrating the JSON documents on first use."""
+        self._db = await self._async_run(_SqliteDatabase, self._path)
+        if await self._async_run(self._db.get_meta, "migrated") is None:
+            # The journal engine's state is its base plus the journal
+            # replayed over it; without a journal it is just the base
+            products, active_lists, _ = await JournalBackend(
+                self.hass, self._save_delay, self._state_func
+            ).async_load()
+            await self._async_run(self._db.import_state, products, active_lists)
+            _LOGGER.info(
+                "Migrated %d products and %d lists to %s",
+                len(products),
+                len(active_lists),
+                self._path,
+            )
+        products, active_lists, revision = await self._async_run(self._db.load)
+        active_lists.setdefault(DEFAULT_LIST_ID, {})
+        return products, active_lists, revision
+
+    @callback
+    def async_commit(
+        self,
+        revision: int,
+        changes: List[dict],
+        lists_changed: Set[str],
+        lists_created: Set[str],
+    ) -> None:
+        """Queue the commit on the database thread."""
+        if self._db is None:
+            # Closed (unloading): there is nothing left to write to
+            _LOGGER.warning(
+                "Not writing revision %d to %s: database is closed", revision, self._path
+            )
+            return
+        future = self.hass.loop.run_in_executor(
+            self._executor, self._db.apply, revision, changes
+        )
+        self._pending.add(future)
+        future.add_done_callback(self._commit_done)
+        if self._instrumentation is not None and self._instrumentation.enabled:
+            # Queue wait + transaction time, as seen from the event loop
+            queued = time.perf_counter()
+            future.add_done_callback(
+                lambda _: self._instrumentation.record(
+                    "sqlite.commit", (time.perf_counter() - queued) * 1000
+                )
+            )
+        self.transactions += 1
+        self.statements += len(changes)
+
+    def _commit_done(self, future: asyncio.Future) -> None:
+        """Log failed commits."""
+        self._pending.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            _LOGGER.error("Error writing to %s: %s", self._path, future.exception())
+
+    @callback
+    def async_rewrite_list(self, list_id: str) -> None:
+        """Nothing to do: foreign keys keep orphans out of the database."""
+
+    async def async_flush(self) -> None:
+        """Wait for queued commits."""
+        if self._pending:
+            await asyncio.wait(list(self._pending))
+
+    async def async_close(self) -> None:
+        """Flush, close the database and stop its thread."""
+        await self.async_flush()
+        if self._db is not None:
+            await self._async_run(self._db.close)
+            self._db = None
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        """Return write counters."""
+        return {
+            "sqlite": {
+                "transactions": self.transactions,
+                "statements": self.statements,
+                "pending": len(self._pending),
+            }
+        }
+
+
+def create_backend(
+    hass: HomeAssistant,
+    engine: str,
+    save_delay: float,
+    state_func: Callable[[], StateSnapshot],
+    instrumentation: Optional[Instrumentation] = None,
+) -> StorageBackend:
+    """Create the storage backend for a storage_engine option value."""
+    if engine == ENGINE_SQLITE:
+        return SqliteBackend(hass, save_delay, state_func, instrumentation)
+    if engine == ENGINE_JOURNAL:
+        return JournalBackend(hass, save_delay, state_func, instrumentation)
+    return JsonStoreBackend(hass, save_delay, state_func, instrumentation)
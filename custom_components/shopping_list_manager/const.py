@@ -9,3 +9,117 @@ STORAGE_KEY_ACTIVE = f"{DOMAIN}.active_list"
 
 # Events
 EVENT_SHOPPING_LIST_UPDATED = f"{DOMAIN}_updated"
+CONF_EVENT_DELAY = "event_delay"
+DEFAULT_EVENT_DELAY = 0.25  # seconds; changes within this window share one event
+
+EVENT_IMPORT_PROGRESS = f"{DOMAIN}_import_progress"
+
+# Entity platforms
+PLATFORMS = ["sensor"]
+
+# Persistence
+CONF_SAVE_DELAY = "save_delay"
+DEFAULT_SAVE_DELAY = 1.0  # seconds; bursts of mutations within this window are coalesced
+CONF_STORAGE_ENGINE = "storage_engine"
+ENGINE_STORE = "store"  # full JSON documents via Home Assistant's Store
+ENGINE_JOURNAL = "journal"  # append-only change journal over a compacted base
+ENGINE_SQLITE = "sqlite"  # one row per product/item in a SQLite database
+DEFAULT_STORAGE_ENGINE = ENGINE_STORE
+STORAGE_KEY_JOURNAL = f"{DOMAIN}.journal"
+STORAGE_KEY_SQLITE = f"{DOMAIN}.db"
+JOURNAL_MAX_BYTES = 1024 * 1024  # compact once the journal reaches this size...
+JOURNAL_MAX_RECORDS = 1000  # ...or this many records
+
+# Change stream (subscribe deltas)
+CHANGE_PRODUCT_UPSERTED = "product_upserted"
+CHANGE_PRODUCT_DELETED = "product_deleted"
+CHANGE_QTY_CHANGED = "qty_changed"
+CHANGELOG_SIZE = 500  # recent mutations kept for since_revision catch-up
+
+# Batch operations
+OP_ADD_PRODUCT = "add_product"
+OP_SET_QTY = "set_qty"
+OP_ADJUST_QTY = "adjust_qty"
+OP_DELETE_PRODUCT = "delete_product"
+BATCH_MAX_OPS = 500
+
+# Idempotency (client op ids)
+OP_ID_MAX_LENGTH = 64
+OP_ID_TTL = 3600  # seconds an applied op id is remembered
+OP_ID_MAX_ENTRIES = 5000  # op ids remembered at most (oldest dropped first)
+REPLAY_APPLIED = "applied"  # replay op statuses
+REPLAY_DUPLICATE = "duplicate"
+REPLAY_FAILED = "failed"
+
+# Undo/redo
+CONF_UNDO_DEPTH = "undo_depth"
+DEFAULT_UNDO_DEPTH = 50  # mutations that can be undone
+CONF_UNDO_MEMORY = "undo_memory"
+DEFAULT_UNDO_MEMORY = 1024 * 1024  # bytes (estimated) the history may hold
+
+# WebSocket admission (per connection). The frontend shares one
+# connection between every card on a dashboard, so a dozen cards
+# loading at once (subscribe, get_view, resolve_image each) must fit.
+WS_RATE_LIMIT = 50  # tokens/s; most commands cost 1, batch 5, export 20
+WS_RATE_BURST = 200  # tokens a connection can spend at once
+WS_MAX_IN_FLIGHT = 16  # async commands running at once; more get a `busy` error
+
+# Category display order (mirrors CATEGORIES in www/shopping_list_card.js)
+CATEGORY_ORDER = {
+    "fruitveg": 1,
+    "meat": 2,
+    "fridge": 3,
+    "bakery": 4,
+    "frozen": 5,
+    "pantry": 6,
+    "drinks": 7,
+    "alcohol": 8,
+    "health": 9,
+    "baby": 10,
+    "pets": 11,
+    "household": 12,
+    "snacks": 13,
+    "other": 99,
+}
+
+# Catalog pagination
+SORT_NAME = "name"
+SORT_CATEGORY = "category"
+PRODUCT_FIELDS = ("key", "name", "category", "unit", "image")
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+VIEW_CACHE_SIZE = 32  # encoded views kept (one per list/sort/filter combination)
+
+# Catalog import/export
+SERVICE_IMPORT_CATALOG = "import_catalog"
+SERVICE_EXPORT_CATALOG = "export_catalog"
+FORMAT_CSV = "csv"
+FORMAT_JSONL = "jsonl"
+TRANSFER_FORMATS = (FORMAT_CSV, FORMAT_JSONL)
+TRANSFER_DIR = DOMAIN  # files are read and written only in <config>/shopping_list_manager/
+TRANSFER_CHUNK_SIZE = 500  # rows parsed, committed and reported at a time
+IMPORT_MAX_ERRORS = 20  # invalid rows reported in detail (all are counted)
+
+# Lists
+DEFAULT_LIST_ID = "groceries"
+LIST_ID_PATTERN = r"^[a-z0-9_]+$"
+STORAGE_KEY_LISTS = f"{DOMAIN}.lists"
+
+# Local images (config/www is served at /local)
+IMAGE_DIR = f"www/images/{DOMAIN}"
+IMAGE_URL_PATH = f"/local/images/{DOMAIN}"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp")
+IMAGE_RESCAN_INTERVAL = 30  # seconds between directory change checks
+RESOLVE_IMAGE_MAX_NAMES = 200
+
+# Thumbnails
+STORAGE_KEY_THUMBNAILS = f"{DOMAIN}.thumbnails"
+THUMBNAIL_DIR = f"www/{DOMAIN}/thumbs"
+THUMBNAIL_URL_PATH = f"/local/{DOMAIN}/thumbs"
+THUMBNAIL_SIZE = 96  # px, longest side
+THUMBNAIL_WORKERS = 2  # dedicated pool: never starves the shared executor
+THUMBNAIL_FETCH_TIMEOUT = 15  # seconds
+THUMBNAIL_MAX_SOURCE_BYTES = 10 * 1024 * 1024
+
+# Instrumentation
+CONF_INSTRUMENTATION = "instrumentation"  # start with instrumentation enabled
@@ -0,0 +1,27 @@
+"""Diagnostics support for Shopping List Manager."""
+from typing import Any, Dict
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> Dict[str, Any]:
+    """Return performance and storage diagnostics for the config entry."""
+    data = hass.data[DOMAIN]
+    manager = data["manager"]
+    return {
+        "options": dict(entry.options),
+        "revision": manager.revision,
+        "products": len(manager.state.products),
+        "lists": manager.get_lists(),
+        "load": manager.get_load_stats(),
+        "persistence": manager.get_persistence_stats(),
+        "history": manager.get_history_stats(),
+        "op_ids": manager.get_op_id_stats(),
+        "local_images": len(data["image_index"]),
+        "instrumentation": data["instrumentation"].snapshot(),
+    }
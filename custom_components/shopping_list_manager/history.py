@@ -0,0 +1,208 @@
+"""Bounded undo/redo history for Shopping List Manager."""
+from collections import deque
+from typing import Deque, Dict, List, Mapping, Optional, Set, Tuple
+
+from .const import (
+    CHANGE_PRODUCT_DELETED,
+    CHANGE_QTY_CHANGED,
+    PRODUCT_FIELDS,
+)
+from .models import Product, StateSnapshot
+
+# Rough per-item cost of an entry (dict slot, tuple key, int) used for
+# the memory budget; product strings are counted on top
+_ITEM_OVERHEAD_BYTES = 120
+
+
+class HistoryEntry:
+    """
+    The inverse of one committed transaction.
+
+    Holds only the previous value of what the transaction touched: the
+    old Product (None if it didn't exist) per product key, and the old
+    quantity per (list, product). Products are immutable and shared
+    with the snapshot they came from, so an entry costs O(changes),
+    never a copy of the catalog.
+    """
+
+    __slots__ = ("products", "quantities", "keys", "ops", "size")
+
+    def __init__(
+        self,
+        products: Dict[str, Optional[Product]],
+        quantities: Dict[Tuple[str, str], int],
+        ops: List[str],
+    ):
+        """Initialize from previous values."""
+        self.products = products
+        self.quantities = quantities
+        self.ops = ops
+        self.keys = list(dict.fromkeys(
+            [*products, *(key for _, key in quantities)]
+        ))
+        self.size = sum(
+            _ITEM_OVERHEAD_BYTES + (
+                sum(len(getattr(product, field)) for field in PRODUCT_FIELDS)
+                if product is not None else 0
+            )
+            for product in products.values()
+        ) + _ITEM_OVERHEAD_BYTES * len(quantities)
+
+    @classmethod
+    def capture(
+        cls,
+        state: StateSnapshot,
+        membership: Mapping[str, Set[str]],
+        changes: List[dict],
+        ops: List[str],
+    ) -> "HistoryEntry":
+        """
+        Record what a transaction's changes overwrite.
+
+        Args:
+            state: Published snapshot before the transaction
+            membership: Reverse index (key -> lists) before the transaction
+            changes: The transaction's typed changes
+            ops: Op names to describe the entry with
+        """
+        products: Dict[str, Optional[Product]] = {}
+        quantities: Dict[Tuple[str, str], int] = {}
+
+        def remember_qty(list_id: str, key: str) -> None:
+            if (list_id, key) not in quantities:
+                item = state.active_lists.get(list_id, {}).get(key)
+                quantities[(list_id, key)] = item.qty if item else 0
+
+        for change in changes:
+            key = change["key"]
+            if change["type"] == CHANGE_QTY_CHANGED:
+                remember_qty(change["list_id"], key)
+                continue
+            if key not in products:
+                products[key] = state.products.get(key)
+            if change["type"] == CHANGE_PRODUCT_DELETED:
+                # A delete also clears the product from every list
+                for list_id in membership.get(key, ()):
+                    remember_qty(list_id, key)
+
+        return cls(products, quantities, ops)
+
+    def apply(self, tx) -> None:
+        """
+        Restore the previous values in a transaction.
+
+        Products come back first so their quantities can be restored;
+        products that didn't exist are deleted last (which also clears
+        them from every list). A quantity whose product is gone by now
+        (changed outside the history) is skipped to keep the invariant.
+        """
+        for key, product in self.products.items():
+            if product is not None and tx.products.get(key) != product:
+                tx.put_product(product)
+        for (list_id, key), qty in self.quantities.items():
+            if self.products.get(key, True) is None or key not in tx.products:
+                continue
+            item = tx.active(list_id).get(key)
+            if (item.qty if item else 0) != qty:
+                tx.set_qty(key, qty, list_id)
+        for key, product in self.products.items():
+            if product is None:
+                tx.delete_product(key)
+
+    def as_dict(self) -> dict:
+        """Short description for clients."""
+        return {"ops": self.ops, "keys": self.keys}
+
+
+class UndoHistory:
+    """
+    Undo and redo stacks of HistoryEntry, bounded by depth and memory.
+
+    Recording a new entry clears the redo stack. The oldest entries
+    are dropped once either bound is exceeded; an entry too large for
+    the whole budget isn't recorded, and since older entries can't be
+    replayed past a change that can't be undone, the history is
+    cleared instead.
+    """
+
+    def __init__(self, depth: int, memory: int):
+        """Initialize empty stacks."""
+        self.depth = depth
+        self.memory = memory
+        self._undo: Deque[HistoryEntry] = deque()
+        self._redo: Deque[HistoryEntry] = deque()
+        self._size = 0
+
+    @property
+    def can_undo(self) -> bool:
+        """Whether there is anything to undo."""
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        """Whether there is anything to redo."""
+        return bool(self._redo)
+
+    def record(self, entry: HistoryEntry) -> None:
+        """Record the inverse of a new mutation."""
+        self._redo.clear()
+        self._push(self._undo, entry)
+        self._recount()
+
+    def pop_undo(self) -> Optional[HistoryEntry]:
+        """Take the most recent entry to undo."""
+        return self._pop(self._undo)
+
+    def pop_redo(self) -> Optional[HistoryEntry]:
+        """Take the most recent entry to redo."""
+        return self._pop(self._redo)
+
+    def push_undo(self, entry: HistoryEntry) -> None:
+        """Record the inverse of a redo (keeps the redo stack)."""
+        self._push(self._undo, entry)
+        self._recount()
+
+    def push_redo(self, entry: HistoryEntry) -> None:
+        """Record the inverse of an undo."""
+        self._push(self._redo, entry)
+        self._recount()
+
+    def clear(self) -> None:
+        """Forget everything."""
+        self._undo.clear()
+        self._redo.clear()
+        self._size = 0
+
+    def stats(self) -> dict:
+        """Sizes for diagnostics."""
+        return {
+            "undo": len(self._undo),
+            "redo": len(self._redo),
+            "bytes": self._size,
+            "depth": self.depth,
+            "memory": self.memory,
+        }
+
+    def _pop(self, stack: Deque[HistoryEntry]) -> Optional[HistoryEntry]:
+        if not stack:
+            return None
+        entry = stack.pop()
+        self._size -= entry.size
+        return entry
+
+    def _push(self, stack: Deque[HistoryEntry], entry: HistoryEntry) -> None:
+        if entry.size > self.memory:
+            self.clear()
+            return
+        stack.append(entry)
+        self._size += entry.size
+
+    def _recount(self) -> None:
+        """Drop the oldest entries until both bounds hold."""
+        for stack in (self._undo, self._redo):
+            while len(stack) > self.depth:
+                self._size -= stack.popleft().size
+        while self._size > self.memory:
+            # Oldest undo entries go first, then the oldest redo entries
+            stack = self._undo if self._undo else self._redo
+            self._size -= stack.popleft().size
@@ -0,0 +1,80 @@
+"""Dedupe table of recently applied client op ids."""
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+# Returned by AppliedOps.get for an op id that isn't known
+MISSING = object()
+
+
+class AppliedOps:
+    """
+    Results of recently applied mutations, keyed by client op id.
+
+    A client that lost its connection mid-request can't tell whether
+    the mutation was applied; resending it with the same op id returns
+    the stored result instead of applying it twice. Entries expire
+    after `ttl` seconds, and the oldest are dropped beyond
+    `max_entries`, so memory stays bounded however many clients retry.
+    Entries are kept in insertion order, which is also expiry order,
+    so pruning only ever looks at the front.
+
+    Writer-side only: read and written under the manager lock.
+    """
+
+    __slots__ = ("ttl", "max_entries", "_entries", "hits")
+
+    def __init__(self, ttl: float, max_entries: int):
+        """Initialize an empty table."""
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, str, Any]]" = OrderedDict()
+        self.hits = 0
+
+    def get(self, op_id: Optional[str], op: str) -> Any:
+        """
+        Result stored for an op id, or MISSING.
+
+        Args:
+            op_id: Client op id (None never matches)
+            op: Op the caller is about to apply
+
+        Raises:
+            ValueError: If the op id was used for a different op
+        """
+        if op_id is None:
+            return MISSING
+        self._prune()
+        entry = self._entries.get(op_id)
+        if entry is None:
+            return MISSING
+        if entry[1] != op:
+            raise ValueError(f"op_id '{op_id}' was already used for {entry[1]}")
+        self.hits += 1
+        return entry[2]
+
+    def add(self, op_id: Optional[str], op: str, result: Any) -> None:
+        """Remember the result of an applied op (no-op without an op id)."""
+        if op_id is None:
+            return
+        self._entries[op_id] = (time.monotonic() + self.ttl, op, result)
+        self._entries.move_to_end(op_id)
+        self._prune()
+
+    def stats(self) -> dict:
+        """Sizes for diagnostics."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "ttl": self.ttl,
+            "max_entries": self.max_entries,
+        }
+
+    def _prune(self) -> None:
+        """Drop expired entries, then the oldest beyond max_entries."""
+        now = time.monotonic()
+        entries = self._entries
+        while entries and next(iter(entries.values()))[0] <= now:
+            entries.popitem(last=False)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
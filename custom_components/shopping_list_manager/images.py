@@ -0,0 +1,207 @@
+"""Local product image index for Shopping List Manager."""
+import logging
+import os
+import re
+from urllib.parse import quote
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import IMAGE_DIR, IMAGE_EXTENSIONS, IMAGE_URL_PATH
+
+_LOGGER = logging.getLogger(__name__)
+
+_SEPARATORS = re.compile(r"[\s\-_.]+")
+
+# Minimum score for a match to be returned (any shared token)
+MIN_IMAGE_SCORE = 20
+
+
+def _singular(token: str) -> str:
+    """Crude English singular: berries -> berry, tomatoes -> tomato, eggs -> egg."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith(("oes", "ses", "xes", "ches", "shes")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Split a product name or file stem into lowercase tokens."""
+    return [token for token in _SEPARATORS.split(text.casefold()) if token]
+
+
+def _scan(path: str) -> Tuple[Optional[float], List[str]]:
+    """List image files in a directory (runs in the executor)."""
+    try:
+        mtime = os.stat(path).st_mtime
+        with os.scandir(path) as entries:
+            files = [
+                entry.name for entry in entries
+                if entry.is_file()
+                and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+            ]
+    except FileNotFoundError:
+        return None, []
+    return mtime, files
+
+
+class LocalImageIndex:
+    """
+    In-memory index of www/images/shopping_list_manager.
+
+    Built once in the executor at setup and refreshed incrementally
+    (only added/removed files are reindexed) when the directory changes.
+    Matching mirrors the card's former client-side scoring, with
+    plural-insensitive stems and tokens:
+
+        100 - same stem            "Milk" vs "milk.png", "Carrot" vs "carrots.jpg"
+         80 - stem starts with name "Milk" vs "milk_whole.png"
+         70 - name starts with stem "Whole milk" vs "whole.png"
+         50 - name contains stem    "Semi skimmed milk" vs "milk.png"
+         40 - stem contains name    "milk" vs "chocolate_milk.png"
+         20 - any shared token      "organic_milk" vs "milk_2litre.png"
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize an empty index."""
+        self.hass = hass
+        self._path = hass.config.path(IMAGE_DIR)
+        self._mtime: Optional[float] = None
+        # filename -> (raw stem, plural-insensitive stem)
+        self._files: Dict[str, Tuple[str, str]] = {}
+        # plural-insensitive stem -> filenames
+        self._stems: Dict[str, Set[str]] = {}
+        # singular token -> filenames
+        self._postings: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        """Number of indexed image files."""
+        return len(self._files)
+
+    async def async_load(self) -> None:
+        """Build the index from disk."""
+        self._mtime, files = await self.hass.async_add_executor_job(_scan, self._path)
+        self._apply(files)
+        _LOGGER.debug("Indexed %d local images in %s", len(self._files), self._path)
+
+    async def async_refresh(self, *_args) -> None:
+        """
+        Pick up added/removed files.
+
+        Cheap when nothing changed: only the directory mtime is
+        compared. Suitable as an async_track_time_interval callback.
+        """
+        mtime, files = await self.hass.async_add_executor_job(_scan, self._path)
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        self._apply(files)
+
+    def _apply(self, files: Iterable[str]) -> None:
+        """Diff a directory listing against the index and update it."""
+        current = set(files)
+        removed = [name for name in self._files if name not in current]
+        added = [name for name in current if name not in self._files]
+        for name in removed:
+            self._remove(name)
+        for name in added:
+            self._add(name)
+        if removed or added:
+            _LOGGER.debug(
+                "Image index updated: %d added, %d removed", len(added), len(removed)
+            )
+
+    def _add(self, filename: str) -> None:
+        """Index one file."""
+        tokens = tokenize(os.path.splitext(filename)[0])
+        if not tokens:
+            return
+        stem = "_".join(tokens)
+        singular = "_".join(_singular(token) for token in tokens)
+        self._files[filename] = (stem, singular)
+        self._stems.setdefault(singular, set()).add(filename)
+        for token in tokens:
+            self._postings.setdefault(_singular(token), set()).add(filename)
+
+    def _remove(self, filename: str) -> None:
+        """Drop one file from the index."""
+        entry = self._files.pop(filename, None)
+        if entry is None:
+            return
+        self._discard(self._stems, entry[1], filename)
+        for token in entry[0].split("_"):
+            self._discard(self._postings, _singular(token), filename)
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[str]], key: str, filename: str) -> None:
+        """Remove a filename from an inverted index bucket."""
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.discard(filename)
+            if not bucket:
+                del index[key]
+
+    @callback
+    def resolve(self, name: str) -> Optional[str]:
+        """
+        Find the best local image for a product name.
+
+        Args:
+            name: Product name
+
+        Returns:
+            URL under /local, or None if nothing matches
+        """
+        tokens = tokenize(name)
+        if not tokens or not self._files:
+            return None
+        product = "_".join(tokens)
+        singular = "_".join(_singular(token) for token in tokens)
+
+        exact = self._stems.get(singular)
+        if exact:
+            # Prefer the file whose raw stem matches exactly, then by name
+            return self._url(min(
+                exact, key=lambda filename: (self._files[filename][0] != product, filename)
+            ))
+
+        # Files sharing a token always score at least 20, so only they
+        # are scored. Without a shared token, substring rules ("milk" in
+        # "buttermilk") can still match: scan (directories hold hundreds
+        # of files, not millions)
+        candidates: Set[str] = set()
+        for token in tokens:
+            candidates.update(self._postings.get(_singular(token), ()))
+
+        best: Optional[Tuple[int, str]] = None
+        for filename in candidates or self._files:
+            score = self._score(product, singular, filename)
+            if score >= MIN_IMAGE_SCORE and (
+                best is None or (-score, filename) < (-best[0], best[1])
+            ):
+                best = (score, filename)
+        return self._url(best[1]) if best else None
+
+    def _score(self, product: str, singular: str, filename: str) -> int:
+        """Score a file against a normalized product name (0-80, 100 handled earlier)."""
+        stem, stem_singular = self._files[filename]
+        for name, file_stem in ((product, stem), (singular, stem_singular)):
+            if file_stem.startswith(name):
+                return 80
+            if name.startswith(file_stem):
+                return 70
+            if file_stem in name:
+                return 50
+            if name in file_stem:
+                return 40
+        if set(singular.split("_")) & set(stem_singular.split("_")):
+            return 20
+        return 0
+
+    @staticmethod
+    def _url(filename: str) -> str:
+        """Public URL of an indexed file."""
+        return f"{IMAGE_URL_PATH}/{quote(filename)}"
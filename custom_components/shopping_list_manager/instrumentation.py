@@ -0,0 +1,327 @@
+"""Performance instrumentation for Shopping List Manager."""
+import asyncio
+import bisect
+import functools
+import inspect
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from homeassistant.components.websocket_api.messages import construct_result_message
+from homeassistant.core import callback
+from homeassistant.helpers.json import json_bytes
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+LATENCY_BUCKETS_MS = (
+    0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000,
+)
+# Histogram bucket upper bounds in bytes
+SIZE_BUCKETS = (
+    256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216,
+)
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum, min, max and percentile estimates."""
+
+    __slots__ = ("_bounds", "_counts", "count", "total", "min", "max")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        """Initialize an empty histogram."""
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def record(self, value: float) -> None:
+        """Add one observation."""
+        self._counts[bisect.bisect_left(self._bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given fraction of observations."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self._counts):
+            seen += bucket_count
+            if seen >= rank:
+                if index < len(self._bounds):
+                    return min(self._bounds[index], self.max)
+                return self.max
+        return self.max
+
+    def as_dict(self) -> dict:
+        """Summary for diagnostics."""
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "buckets": {
+                (f"<={bound}" if index < len(self._bounds) else f">{self._bounds[-1]}"): n
+                for index, (bound, n) in enumerate(
+                    zip(self._bounds + (self._bounds[-1],), self._counts)
+                )
+                if n
+            },
+        }
+
+
+class Instrumentation:
+    """
+    Runtime-switchable performance counters.
+
+    Off by default. Method timings are installed as instance
+    attributes when enabled and removed when disabled, so instrumented
+    objects run their plain methods while off. Other probes (lock,
+    stores, WebSocket commands) are guarded by a single attribute check.
+    """
+
+    def __init__(self, enabled: bool = False):
+        """Initialize instrumentation."""
+        self.enabled = False
+        self._latency: Dict[str, Histogram] = {}
+        self._sizes: Dict[str, Histogram] = {}
+        self._counters: Dict[str, int] = {}
+        self._watched: List[Tuple[Any, Tuple[str, ...], str]] = []
+        self._since: Optional[float] = None
+        if enabled:
+            self.enable()
+
+    def watch(self, target: Any, methods: Iterable[str], prefix: str) -> None:
+        """Time the given methods of an object while enabled."""
+        entry = (target, tuple(methods), prefix)
+        self._watched.append(entry)
+        if self.enabled:
+            self._install(*entry)
+
+    def enable(self) -> None:
+        """Start collecting."""
+        if self.enabled:
+            return
+        self.enabled = True
+        self._since = time.time()
+        for entry in self._watched:
+            self._install(*entry)
+        _LOGGER.info("Performance instrumentation enabled")
+
+    def disable(self) -> None:
+        """Stop collecting (counters are kept until reset)."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        for target, methods, _ in self._watched:
+            for name in methods:
+                target.__dict__.pop(name, None)
+        _LOGGER.info("Performance instrumentation disabled")
+
+    def reset(self) -> None:
+        """Clear all collected data."""
+        self._latency.clear()
+        self._sizes.clear()
+        self._counters.clear()
+        self._since = time.time() if self.enabled else None
+
+    def _install(self, target: Any, methods: Tuple[str, ...], prefix: str) -> None:
+        """Shadow methods with timed wrappers on the instance."""
+        for name in methods:
+            method = getattr(type(target), name)
+            metric = f"{prefix}.{name}"
+            if inspect.iscoroutinefunction(method):
+                wrapper = self._wrap_async(method.__get__(target), metric)
+            else:
+                wrapper = self._wrap_sync(method.__get__(target), metric)
+            target.__dict__[name] = wrapper
+
+    def _wrap_async(self, bound: Callable, metric: str) -> Callable:
+        """Timed wrapper of a coroutine method."""
+        @functools.wraps(bound)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await bound(*args, **kwargs)
+            finally:
+                self.record(metric, (time.perf_counter() - started) * 1000)
+        return wrapper
+
+    def _wrap_sync(self, bound: Callable, metric: str) -> Callable:
+        """Timed wrapper of a plain method."""
+        @functools.wraps(bound)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return bound(*args, **kwargs)
+            finally:
+                self.record(metric, (time.perf_counter() - started) * 1000)
+        return wrapper
+
+    def record(self, metric: str, milliseconds: float) -> None:
+        """Add a latency observation."""
+        histogram = self._latency.get(metric)
+        if histogram is None:
+            histogram = self._latency[metric] = Histogram(LATENCY_BUCKETS_MS)
+        histogram.record(milliseconds)
+
+    def record_size(self, metric: str, size: int) -> None:
+        """Add a payload size observation (bytes)."""
+        histogram = self._sizes.get(metric)
+        if histogram is None:
+            histogram = self._sizes[metric] = Histogram(SIZE_BUCKETS)
+        histogram.record(size)
+
+    def count(self, metric: str, amount: int = 1) -> None:
+        """Increment a counter."""
+        self._counters[metric] = self._counters.get(metric, 0) + amount
+
+    def latency(self, metric: str) -> Optional[Histogram]:
+        """Latency histogram of a metric, if anything was recorded."""
+        return self._latency.get(metric)
+
+    def counter(self, metric: str) -> int:
+        """Current value of a counter."""
+        return self._counters.get(metric, 0)
+
+    def snapshot(self) -> dict:
+        """Everything collected, for diagnostics and the WebSocket API."""
+        return {
+            "enabled": self.enabled,
+            "since": self._since,
+            "latency_ms": {
+                metric: histogram.as_dict()
+                for metric, histogram in sorted(self._latency.items())
+            },
+            "payload_bytes": {
+                metric: histogram.as_dict()
+                for metric, histogram in sorted(self._sizes.items())
+            },
+            "counters": dict(sorted(self._counters.items())),
+        }
+
+
+class InstrumentedLock:
+    """asyncio.Lock that records wait and hold times while instrumentation is on."""
+
+    __slots__ = ("_lock", "_instrumentation", "_acquired_at")
+
+    def __init__(self, instrumentation: Instrumentation):
+        """Initialize the lock."""
+        self._lock = asyncio.Lock()
+        self._instrumentation = instrumentation
+        self._acquired_at: Optional[float] = None
+
+    def locked(self) -> bool:
+        """Return True if the lock is held."""
+        return self._lock.locked()
+
+    async def __aenter__(self) -> None:
+        """Acquire, timing the wait."""
+        if not self._instrumentation.enabled:
+            await self._lock.acquire()
+            return
+        started = time.perf_counter()
+        await self._lock.acquire()
+        self._acquired_at = time.perf_counter()
+        self._instrumentation.record("lock.wait", (self._acquired_at - started) * 1000)
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Release, timing the hold."""
+        acquired_at = self._acquired_at
+        self._acquired_at = None
+        self._lock.release()
+        if acquired_at is not None and self._instrumentation.enabled:
+            self._instrumentation.record(
+                "lock.hold", (time.perf_counter() - acquired_at) * 1000
+            )
+
+
+class _MeasuredConnection:
+    """Connection proxy that records the size of every message sent."""
+
+    def __init__(self, connection, instrumentation: Instrumentation, metric: str):
+        """Wrap a connection."""
+        self._connection = connection
+        self._instrumentation = instrumentation
+        self._metric = metric
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate everything else."""
+        return getattr(self._connection, name)
+
+    def send_message(self, message) -> None:
+        """Send, recording the encoded size."""
+        if self._instrumentation.enabled:
+            size = (
+                len(message) if isinstance(message, (bytes, str))
+                else len(json_bytes(message))
+            )
+            self._instrumentation.record_size(self._metric, size)
+        self._connection.send_message(message)
+
+    def send_result(self, msg_id: int, result: Any = None) -> None:
+        """Encode the result once, record its size and send it."""
+        self.send_message(construct_result_message(msg_id, json_bytes(result)))
+
+
+def timed_command(name: str) -> Callable:
+    """
+    Time a WebSocket handler and record its response sizes.
+
+    Place directly above the handler (below async_response), so the
+    time covers the work and not just scheduling it.
+    """
+    def decorator(handler: Callable) -> Callable:
+        metric = f"ws.{name}"
+
+        def _instrumentation(hass) -> Optional[Instrumentation]:
+            instrumentation = hass.data.get(DOMAIN, {}).get("instrumentation")
+            if instrumentation is None or not instrumentation.enabled:
+                return None
+            return instrumentation
+
+        if inspect.iscoroutinefunction(handler):
+            @functools.wraps(handler)
+            async def async_wrapper(hass, connection, msg):
+                instrumentation = _instrumentation(hass)
+                if instrumentation is None:
+                    return await handler(hass, connection, msg)
+                started = time.perf_counter()
+                try:
+                    return await handler(
+                        hass, _MeasuredConnection(connection, instrumentation, metric), msg
+                    )
+                finally:
+                    instrumentation.record(metric, (time.perf_counter() - started) * 1000)
+            return async_wrapper
+
+        @callback
+        @functools.wraps(handler)
+        def wrapper(hass, connection, msg):
+            instrumentation = _instrumentation(hass)
+            if instrumentation is None:
+                return handler(hass, connection, msg)
+            started = time.perf_counter()
+            try:
+                return handler(
+                    hass, _MeasuredConnection(connection, instrumentation, metric), msg
+                )
+            finally:
+                instrumentation.record(metric, (time.perf_counter() - started) * 1000)
+        return wrapper
+
+    return decorator
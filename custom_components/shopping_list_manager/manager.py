@@ -1,48 +1,229 @@
 """Core Shopping List Manager with invariant enforcement."""
 import asyncio
+import base64
+import json
 import logging
-from typing import Dict, Optional, List
+import re
+import time
+from collections import deque
+from dataclasses import replace
+from types import MappingProxyType
+from typing import Any, Callable, Deque, Dict, Iterable, Optional, List, Mapping, Set, Tuple
 
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import storage
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.json import json_bytes
 
 from .const import (
+    CHANGE_PRODUCT_DELETED,
+    CHANGE_PRODUCT_UPSERTED,
+    CHANGE_QTY_CHANGED,
+    CHANGELOG_SIZE,
+    DEFAULT_EVENT_DELAY,
+    DEFAULT_LIST_ID,
+    DEFAULT_SAVE_DELAY,
+    DEFAULT_STORAGE_ENGINE,
+    DEFAULT_UNDO_DEPTH,
+    DEFAULT_UNDO_MEMORY,
     DOMAIN,
+    EVENT_IMPORT_PROGRESS,
     EVENT_SHOPPING_LIST_UPDATED,
-    STORAGE_KEY_ACTIVE,
-    STORAGE_KEY_PRODUCTS,
-    STORAGE_VERSION,
+    IMPORT_MAX_ERRORS,
+    LIST_ID_PATTERN,
+    OP_ADD_PRODUCT,
+    OP_ADJUST_QTY,
+    OP_DELETE_PRODUCT,
+    OP_ID_MAX_ENTRIES,
+    OP_ID_TTL,
+    OP_SET_QTY,
+    PRODUCT_FIELDS,
+    REPLAY_APPLIED,
+    REPLAY_DUPLICATE,
+    REPLAY_FAILED,
+    SORT_CATEGORY,
+    SORT_NAME,
+    TRANSFER_CHUNK_SIZE,
+    VIEW_CACHE_SIZE,
 )
-from .models import Product, ActiveItem, InvariantError, validate_invariant
+from .backends import create_backend
+from .history import HistoryEntry, UndoHistory
+from .idempotency import MISSING, AppliedOps
+from .instrumentation import Instrumentation, InstrumentedLock
+from .models import (
+    ActiveItem,
+    InvariantError,
+    Product,
+    RevisionConflictError,
+    StateSnapshot,
+    to_serializable,
+    validate_invariant,
+)
+from .search import ProductSearchIndex
+from .thumbnails import ThumbnailCache
+from .transfer import iter_import_chunks, write_export
+from .views import SortedIndex, category_group
 
 _LOGGER = logging.getLogger(__name__)
 
+_LIST_ID_RE = re.compile(LIST_ID_PATTERN)
+
+# Public methods timed while instrumentation is enabled
+TIMED_METHODS = (
+    "async_add_product",
+    "async_set_qty",
+    "async_adjust_qty",
+    "async_delete_product",
+    "async_apply_batch",
+    "async_replay",
+    "async_undo",
+    "async_redo",
+    "async_get_products",
+    "async_get_active",
+    "async_get_full_state",
+    "get_products_json",
+    "get_active_json",
+    "get_full_state_json",
+    "search_products",
+    "get_products_page",
+    "get_view",
+    "get_view_json",
+)
+
+
+def validate_list_id(list_id: str) -> str:
+    """Validate a list id (letters, numbers, underscores)."""
+    if not _LIST_ID_RE.match(list_id):
+        raise ValueError(
+            f"Invalid list_id '{list_id}': use lowercase letters, numbers, underscores"
+        )
+    return list_id
+
+
+def _encode_cursor(sort: str, sort_key: tuple) -> str:
+    """Encode the position after sort_key as an opaque cursor."""
+    return base64.urlsafe_b64encode(json_bytes([sort, *sort_key])).decode()
+
+
+def _decode_cursor(cursor: str, sort: str) -> tuple:
+    """Decode a cursor produced by _encode_cursor for the same sort."""
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError as err:
+        raise ValueError(f"Invalid cursor: {cursor}") from err
+    if not isinstance(decoded, list) or not decoded or decoded[0] != sort:
+        raise ValueError(f"Cursor does not belong to sort '{sort}'")
+    return tuple(decoded[1:])
+
 
 class ShoppingListManager:
     """
     Manages shopping list with enforced invariants.
     
     Architecture principles:
-    1. Products and active_list are separate concerns
-    2. Products are authoritative, persistent data
-    3. Active list is ephemeral state
+    1. Products and active lists are separate concerns
+    2. Products are authoritative, persistent data shared by all lists
+    3. Active lists are ephemeral state, one store per named list
     4. Invariant is enforced on every mutation
-    5. Lock ensures atomic operations
+    5. Lock serializes writers only; readers are lock-free and read an
+       immutable snapshot that writers replace (copy-on-write)
+    6. Persistence is write-behind: mutations mark stores dirty and
+       bursts are coalesced into a single write
+    7. Every mutation bumps a revision and is pushed to subscribers
+       as a typed delta, and kept in a bounded changelog for
+       since_revision catch-up
+    8. Full-state reads are served from JSON encoded once per change,
+       keyed on the identity of the immutable snapshot mappings
+    9. A trigram search index and the sorted catalog orders (by name,
+       by category then name) are kept in step with the catalog on
+       every commit
+    10. A reverse index (product key -> lists containing it) lets a
+        product delete touch only the lists that hold it
+    11. Product image URLs are swapped for small cached thumbnails,
+        generated off the event loop after the product is committed
+    12. Persistence is a pluggable backend (JSON documents, journal
+        or SQLite) that is handed each commit's typed changes
+    13. Update events carry what changed and are coalesced over a
+        short window, so a burst fires one event
+    14. Each commit records its inverse (the previous values of what it
+        touched) in a bounded undo history; undo and redo are ordinary
+        commits
+    15. Mutations may carry a client op id; results are remembered for
+        a while, so a resent op returns its first result instead of
+        being applied (saved, pushed, fired) again
     """
     
-    def __init__(self, hass: HomeAssistant):
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        save_delay: float = DEFAULT_SAVE_DELAY,
+        thumbnails: Optional[ThumbnailCache] = None,
+        storage_engine: str = DEFAULT_STORAGE_ENGINE,
+        instrumentation: Optional[Instrumentation] = None,
+        event_delay: float = DEFAULT_EVENT_DELAY,
+        undo_depth: int = DEFAULT_UNDO_DEPTH,
+        undo_memory: int = DEFAULT_UNDO_MEMORY,
+    ):
         """Initialize the manager."""
         self.hass = hass
-        self._products: Dict[str, Product] = {}
-        self._active_list: Dict[str, ActiveItem] = {}
-        self._lock = asyncio.Lock()
+        self.instrumentation = instrumentation or Instrumentation()
+        self.instrumentation.watch(self, TIMED_METHODS, "manager")
+        self._lock = InstrumentedLock(self.instrumentation)
+        self._thumbnails = thumbnails
+        # Background thumbnail swaps, cancelled on close
+        self._thumbnail_tasks: Set[asyncio.Task] = set()
         
-        # Storage instances
-        self._store_products = storage.Store(
-            hass, STORAGE_VERSION, STORAGE_KEY_PRODUCTS
+        # Published state. Revisions are seeded from a millisecond clock so
+        # they keep increasing across restarts: a revision a client saw
+        # before a restart can never be mistaken for a current one.
+        self._state = StateSnapshot(
+            revision=int(time.time() * 1000),
+            products=MappingProxyType({}),
+            active_lists=MappingProxyType({DEFAULT_LIST_ID: MappingProxyType({})}),
         )
-        self._store_active = storage.Store(
-            hass, STORAGE_VERSION, STORAGE_KEY_ACTIVE
+        
+        # Reverse index: product key -> ids of lists it is active on.
+        # Writer-side only (updated on commit), readers never need it.
+        self._membership: Dict[str, Set[str]] = {}
+        
+        # Change stream: subscriptions are [listener, list_id filter, last revision sent]
+        self._subscriptions: List[list] = []
+        self._changelog: Deque[Tuple[int, List[dict]]] = deque(maxlen=CHANGELOG_SIZE)
+        
+        # Update event being collected, fired when the window closes
+        self._event_delay = event_delay
+        self._pending_event: Optional[_UpdateEvent] = None
+        self._event_timer: Optional[asyncio.TimerHandle] = None
+        
+        # Inverses of recent commits (writer-side only)
+        self._history = UndoHistory(undo_depth, undo_memory)
+        
+        # Results of recent mutations by client op id (writer-side only)
+        self._applied_ops = AppliedOps(OP_ID_TTL, OP_ID_MAX_ENTRIES)
+        
+        # Pre-encoded read caches: (source mapping(s), encoded JSON).
+        # Copy-on-write publishes new mappings on mutation, so an identity
+        # check is all the invalidation needed.
+        self._json_products: Optional[Tuple[Any, bytes]] = None
+        self._json_active: Dict[str, Tuple[Any, bytes]] = {}
+        self._json_full_state: Dict[str, Tuple[Any, Any, bytes]] = {}
+        self._validated: Dict[str, Tuple[Any, Any]] = {}
+        
+        # Incrementally maintained search index and sorted orders
+        # (pagination and views)
+        self._search_index = ProductSearchIndex()
+        self._sort_indexes: Dict[str, SortedIndex] = {
+            sort: SortedIndex(sort) for sort in (SORT_NAME, SORT_CATEGORY)
+        }
+        
+        # Encoded views: parameters -> (products, active list, encoded JSON)
+        self._json_views: Dict[tuple, Tuple[Any, Any, bytes]] = {}
+        
+        # Lists repaired on load, persisted once Home Assistant has started
+        self._pending_repairs: Set[str] = set()
+        self._load_stats: Dict[str, Any] = {}
+        
+        # Persistence (JSON documents read the published state lazily)
+        self._backend = create_backend(
+            hass, storage_engine, save_delay, lambda: self._state, self.instrumentation
         )
     
     async def async_load(self) -> None:
@@ -52,69 +233,482 @@ class ShoppingListManager:
         If invariant is violated on load, we repair by removing
         orphaned active_list entries rather than failing.
         """
+        started = time.monotonic()
         async with self._lock:
-            # Load products first (authoritative)
-            products_data = await self._store_products.async_load()
-            if products_data:
-                self._products = {
-                    key: Product.from_dict(data)
-                    for key, data in products_data.items()
-                }
+            products, active_lists, stored_revision = await self._backend.async_load()
+            revision = max(self._state.revision, stored_revision)
+            loaded = time.monotonic()
             
-            # Load active list
-            active_data = await self._store_active.async_load()
-            if active_data:
-                self._active_list = {
-                    key: ActiveItem.from_dict(data)
-                    for key, data in active_data.items()
-                }
+            # Repair and index building touch every product: off the loop.
+            # Nothing is published until they are done.
+            (
+                repaired, membership, search_index, sort_indexes
+            ) = await self.hass.async_add_executor_job(
+                self._prepare_loaded, products, active_lists
+            )
+            self._pending_repairs.update(repaired)
             
-            # Repair invariant violations from storage
-            await self._async_repair_invariant()
+            # Publish without bumping the revision: nothing changed
+            self._state = StateSnapshot(
+                revision=revision,
+                products=MappingProxyType(products),
+                active_lists=MappingProxyType({
+                    list_id: MappingProxyType(active_list)
+                    for list_id, active_list in active_lists.items()
+                }),
+            )
+            self._membership = membership
+            self._search_index = search_index
+            self._sort_indexes = sort_indexes
             
+            finished = time.monotonic()
+            self._load_stats = {
+                "products": len(products),
+                "lists": len(active_lists),
+                "active_items": sum(
+                    len(active_list) for active_list in active_lists.values()
+                ),
+                "read_ms": round((loaded - started) * 1000, 1),
+                "index_ms": round((finished - loaded) * 1000, 1),
+                "total_ms": round((finished - started) * 1000, 1),
+            }
             _LOGGER.info(
-                "Loaded %d products and %d active items",
-                len(self._products),
-                len(self._active_list)
+                "Loaded %d products and %d lists (%d active items) in %.1f ms",
+                self._load_stats["products"],
+                self._load_stats["lists"],
+                self._load_stats["active_items"],
+                self._load_stats["total_ms"],
             )
     
-    async def _async_repair_invariant(self) -> None:
+    @staticmethod
+    def _prepare_loaded(
+        products: Dict[str, Product],
+        active_lists: Dict[str, Dict[str, ActiveItem]],
+    ) -> Tuple[
+        List[str], Dict[str, Set[str]], ProductSearchIndex, Dict[str, SortedIndex]
+    ]:
+        """
+        Repair loaded state and build its indexes (runs in the executor).
+        
+        Returns:
+            (ids of repaired lists, membership index, search index,
+             sort -> sorted index)
+        """
+        repaired = [
+            list_id for list_id, active_list in active_lists.items()
+            if ShoppingListManager._repair_invariant(list_id, products, active_list)
+        ]
+        
+        membership: Dict[str, Set[str]] = {}
+        for list_id, active_list in active_lists.items():
+            for key in active_list:
+                membership.setdefault(key, set()).add(list_id)
+        
+        search_index = ProductSearchIndex()
+        for product in products.values():
+            search_index.add(product)
+        
+        sort_indexes = {}
+        for sort in (SORT_NAME, SORT_CATEGORY):
+            sort_indexes[sort] = SortedIndex(sort)
+            sort_indexes[sort].build(products.values())
+        
+        return repaired, membership, search_index, sort_indexes
+    
+    @callback
+    def async_persist_repairs(self, _hass: Optional[HomeAssistant] = None) -> None:
+        """
+        Write lists repaired during load.
+        
+        Deferred until Home Assistant has started (see async_at_started)
+        so that startup never waits on a repair write.
+        """
+        for list_id in self._pending_repairs:
+            self._backend.async_rewrite_list(list_id)
+        self._pending_repairs.clear()
+    
+    def get_load_stats(self) -> dict:
+        """
+        Get startup timings of the last load.
+        
+        Returns:
+            {
+                "products": 10000,
+                "lists": 2,
+                "active_items": 12,
+                "read_ms": 80.2,
+                "index_ms": 310.5,
+                "total_ms": 390.7
+            }
+        """
+        return dict(self._load_stats)
+    
+    @staticmethod
+    def _repair_invariant(
+        list_id: str,
+        products: Dict[str, Product],
+        active_list: Dict[str, ActiveItem],
+    ) -> bool:
         """
         Repair invariant violations by removing orphaned active items.
         
         This is defensive - should only happen if storage was manually edited
         or data corruption occurred.
+        
+        Returns:
+            True if anything was removed (the list must be persisted)
         """
         orphaned_keys = []
-        for key in self._active_list:
-            if key not in self._products:
+        for key in active_list:
+            if key not in products:
                 orphaned_keys.append(key)
         
         if orphaned_keys:
             _LOGGER.warning(
-                "Found %d orphaned active items, removing: %s",
+                "Found %d orphaned active items in list %s, removing: %s",
                 len(orphaned_keys),
+                list_id,
                 orphaned_keys
             )
             for key in orphaned_keys:
-                del self._active_list[key]
+                del active_list[key]
+        
+        return bool(orphaned_keys)
+    
+    async def async_flush(self) -> None:
+        """
+        Write any pending changes to storage immediately.
+        
+        Called on unload and at Home Assistant shutdown so that
+        coalesced writes are never lost. Does not take the lock:
+        the data written is the current published snapshot. A pending
+        update event is fired right away.
+        """
+        self._fire_update_event()
+        await self._backend.async_flush()
+    
+    async def async_close(self) -> None:
+        """Stop background thumbnail work, then flush and release storage (unload)."""
+        tasks = list(self._thumbnail_tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._fire_update_event()
+        await self._backend.async_close()
+    
+    def get_persistence_stats(self) -> dict:
+        """
+        Get write coalescing counters.
+        
+        Returns:
+            {
+                "products": {"save_requests": ..., "writes": ..., ...},
+                "lists": {...},
+                "active_lists": {"groceries": {...}, ...}
+            }
             
-            # Persist the repair
-            await self._async_save_active()
+            (the shape depends on the storage backend)
+        """
+        return self._backend.stats()
+    
+    def get_history_stats(self) -> dict:
+        """
+        Get undo/redo history sizes.
+        
+        Returns:
+            {"undo": 12, "redo": 0, "bytes": 4210, "depth": 50, "memory": 1048576}
+        """
+        return self._history.stats()
     
-    async def _async_save_products(self) -> None:
-        """Persist products to storage."""
-        data = {key: product.to_dict() for key, product in self._products.items()}
-        await self._store_products.async_save(data)
+    def get_op_id_stats(self) -> dict:
+        """
+        Get op id dedupe table sizes.
+        
+        Returns:
+            {"entries": 120, "hits": 3, "ttl": 3600, "max_entries": 5000}
+        """
+        return self._applied_ops.stats()
     
-    async def _async_save_active(self) -> None:
-        """Persist active list to storage."""
-        data = {key: item.to_dict() for key, item in self._active_list.items()}
-        await self._store_active.async_save(data)
+    @callback
+    def _queue_update_event(self, revision: int, changes: List[dict]) -> None:
+        """
+        Add a commit's changes to the pending update event.
+        
+        The window starts at the first change and is not extended by
+        later ones, so a steady stream of changes still fires an event
+        every event_delay seconds.
+        """
+        if self._pending_event is None:
+            self._pending_event = _UpdateEvent(revision - 1)
+        self._pending_event.add(revision, changes)
+        if self._event_delay <= 0:
+            self._fire_update_event()
+        elif self._event_timer is None:
+            self._event_timer = self.hass.loop.call_later(
+                self._event_delay, self._fire_update_event
+            )
     
+    @callback
     def _fire_update_event(self) -> None:
-        """Fire event to notify listeners of changes."""
-        self.hass.bus.async_fire(EVENT_SHOPPING_LIST_UPDATED)
+        """Fire the pending update event, if any."""
+        if self._event_timer is not None:
+            self._event_timer.cancel()
+            self._event_timer = None
+        event, self._pending_event = self._pending_event, None
+        if event is None:
+            return
+        self.hass.bus.async_fire(EVENT_SHOPPING_LIST_UPDATED, event.as_dict())
+        if self.instrumentation.enabled:
+            self.instrumentation.count("events.fired")
+            self.instrumentation.count("events.changes", event.changes)
+    
+    @callback
+    def _commit_transaction(self, tx: "_Transaction", record: bool = True) -> None:
+        """
+        Publish a transaction's state, bump the revision and notify.
+        
+        Mappings the transaction copied are published; untouched ones are
+        carried over from the current snapshot. The new snapshot is
+        published with a single assignment, and subscribers are notified
+        in the same synchronous step, so a subscriber's snapshot + deltas
+        never miss or repeat a change. Each changed store gets exactly one
+        (coalesced) save, and its changes join the pending update event.
+        
+        With record, the transaction's inverse is added to the undo
+        history (captured from the state it replaces).
+        """
+        if not tx.changes:
+            return
+        
+        if record:
+            self._history.record(HistoryEntry.capture(
+                self._state, self._membership, tx.changes, _ops_of(tx.changes)
+            ))
+        
+        state = self._state
+        revision = state.revision + 1
+        active_lists = state.active_lists
+        if tx.lists_changed:
+            active_lists = MappingProxyType({
+                list_id: (
+                    MappingProxyType(active_list)
+                    if list_id in tx.lists_changed else active_list
+                )
+                for list_id, active_list in tx.active_lists.items()
+            })
+        self._state = StateSnapshot(
+            revision=revision,
+            products=(
+                MappingProxyType(tx.products) if tx.products_changed
+                else state.products
+            ),
+            active_lists=active_lists,
+        )
+        
+        self._backend.async_commit(
+            revision, tx.changes, tx.lists_changed, tx.lists_created
+        )
+        if tx.products_changed:
+            self._update_catalog_indexes(tx.changes)
+        self._update_membership(tx.changes)
+        
+        self._changelog.append((revision, tx.changes))
+        self._notify(revision, tx.changes)
+        self._queue_update_event(revision, tx.changes)
+    
+    @callback
+    def _notify(self, revision: int, changes: List[dict]) -> None:
+        """
+        Push a delta to each subscriber, filtered to its list.
+        
+        Subscribers to one list skip other lists' qty changes, so each
+        delta carries prev_revision (the last revision that subscriber
+        was sent) to let it detect a genuine gap.
+        """
+        for subscription in list(self._subscriptions):
+            listener, list_id, prev_revision = subscription
+            if list_id is None:
+                relevant = changes
+            else:
+                relevant = [
+                    change for change in changes
+                    if change["type"] != CHANGE_QTY_CHANGED
+                    or change["list_id"] == list_id
+                ]
+                if not relevant:
+                    continue
+            subscription[2] = revision
+            if self.instrumentation.enabled:
+                self.instrumentation.count("deltas.sent")
+            try:
+                listener({
+                    "revision": revision,
+                    "prev_revision": prev_revision,
+                    "changes": relevant,
+                })
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error in change listener")
+    
+    def _update_membership(self, changes: List[dict]) -> None:
+        """Apply changes to the product -> lists reverse index, in order."""
+        for change in changes:
+            if change["type"] == CHANGE_QTY_CHANGED:
+                if change["qty"] > 0:
+                    self._membership.setdefault(change["key"], set()).add(
+                        change["list_id"]
+                    )
+                else:
+                    lists = self._membership.get(change["key"])
+                    if lists is not None:
+                        lists.discard(change["list_id"])
+                        if not lists:
+                            del self._membership[change["key"]]
+            elif change["type"] == CHANGE_PRODUCT_DELETED:
+                self._membership.pop(change["key"], None)
+    
+    def _update_catalog_indexes(self, changes: List[dict]) -> None:
+        """Apply catalog changes to the search and sort indexes."""
+        products = self._state.products
+        for change in changes:
+            if change["type"] == CHANGE_PRODUCT_UPSERTED:
+                # Final state only: a key upserted then deleted in one
+                # transaction is gone from the published catalog
+                product = products.get(change["key"])
+                if product is None:
+                    continue
+                self._search_index.add(product)
+                for index in self._sort_indexes.values():
+                    index.upsert(product)
+            elif change["type"] == CHANGE_PRODUCT_DELETED:
+                self._search_index.remove(change["key"])
+                for index in self._sort_indexes.values():
+                    index.discard(change["key"])
+    
+    def _changed_keys_since(
+        self,
+        since_revision: int,
+        change_types: Tuple[str, ...],
+        list_id: Optional[str] = None,
+    ) -> Optional[Set[str]]:
+        """
+        Collect keys touched by changes after since_revision.
+        
+        With list_id, qty changes of other lists are ignored.
+        
+        Returns:
+            Set of keys, or None if the changelog no longer covers
+            since_revision (caller must fall back to a full snapshot)
+        """
+        current = self._state.revision
+        if since_revision > current:
+            return None
+        
+        oldest = self._changelog[0][0] if self._changelog else current + 1
+        if since_revision < oldest - 1:
+            return None
+        
+        keys: Set[str] = set()
+        for revision, changes in reversed(self._changelog):
+            if revision <= since_revision:
+                break
+            for change in changes:
+                if change["type"] not in change_types:
+                    continue
+                if (
+                    list_id is not None
+                    and change["type"] == CHANGE_QTY_CHANGED
+                    and change["list_id"] != list_id
+                ):
+                    continue
+                keys.add(change["key"])
+        return keys
+    
+    @property
+    def revision(self) -> int:
+        """Current revision (incremented on every mutation)."""
+        return self._state.revision
+    
+    @property
+    def state(self) -> StateSnapshot:
+        """Current immutable state snapshot (lock-free)."""
+        return self._state
+    
+    @callback
+    def async_subscribe(
+        self,
+        listener: Callable[[dict], None],
+        list_id: Optional[str] = None,
+    ) -> Callable[[], None]:
+        """
+        Subscribe to change deltas.
+        
+        The listener is called with:
+            {
+                "revision": 42,
+                "prev_revision": 40,
+                "changes": [
+                    {"type": "product_upserted", "key": "milk", "product": {...}},
+                    {"type": "product_deleted", "key": "milk"},
+                    {"type": "qty_changed", "list_id": "groceries",
+                     "key": "milk", "qty": 2}
+                ]
+            }
+        
+        Args:
+            listener: Called synchronously after each relevant commit
+            list_id: Only deliver qty changes of this list (catalog
+                changes are always delivered); None for every list
+        
+        Returns:
+            Callable that removes the listener
+        """
+        subscription = [listener, list_id, self._state.revision]
+        self._subscriptions.append(subscription)
+        
+        @callback
+        def unsubscribe() -> None:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+        
+        return unsubscribe
+    
+    @callback
+    def async_get_snapshot(self, list_id: str = DEFAULT_LIST_ID) -> dict:
+        """
+        Get full state of one list tagged with the current revision.
+        
+        Synchronous so that it can be paired atomically with
+        async_subscribe: no mutation can interleave between the two.
+        
+        Returns:
+            {
+                "revision": 42,
+                "products": {...},
+                "active_list": {...}
+            }
+        """
+        state = self._state
+        return {
+            "revision": state.revision,
+            "products": {key: p.to_dict() for key, p in state.products.items()},
+            "active_list": {
+                key: a.to_dict() for key, a in state.active(list_id).items()
+            },
+        }
+    
+    @callback
+    def get_lists(self) -> Dict[str, int]:
+        """
+        Get all lists and their number of active items (lock-free).
+        
+        Returns:
+            Dictionary of list id -> number of active items
+        """
+        return {
+            list_id: len(active_list)
+            for list_id, active_list in self._state.active_lists.items()
+        }
     
     # ========================================================================
     # PUBLIC API - All operations enforce invariants
@@ -126,7 +720,8 @@ class ShoppingListManager:
         name: str,
         category: str = "other",
         unit: str = "pcs",
-        image: str = ""
+        image: str = "",
+        op_id: Optional[str] = None,
     ) -> Product:
         """
         Add or update a product in the catalog.
@@ -135,7 +730,9 @@ class ShoppingListManager:
         - Creates/updates product metadata
         - Does NOT modify quantities
         - Is idempotent
-        - Persists to storage
+        - Schedules a (coalesced) save
+        - Uses the cached thumbnail of the image if there is one,
+          otherwise generates it in the background
         
         Args:
             key: Unique product identifier
@@ -143,123 +740,622 @@ class ShoppingListManager:
             category: Product category
             unit: Unit of measurement
             image: Image URL
+            op_id: Client op id; if already applied, the Product it
+                produced is returned and nothing is applied
             
         Returns:
             The created/updated Product
+        
+        Raises:
+            ValueError: If op_id was used for a different op
         """
+        if self._thumbnails is not None:
+            image = self._thumbnails.lookup(image) or image
+        
         async with self._lock:
-            product = Product(
-                key=key,
-                name=name,
-                category=category,
-                unit=unit,
-                image=image
-            )
+            replayed = self._applied_ops.get(op_id, OP_ADD_PRODUCT)
+            if replayed is not MISSING:
+                return Product.from_dict(replayed)
             
-            self._products[key] = product
-            await self._async_save_products()
+            tx = _Transaction(self._state, self._membership)
+            product = tx.add_product(key, name, category, unit, image)
             
             _LOGGER.debug("Added/updated product: %s (%s)", name, key)
-            self._fire_update_event()
-            
-            return product
+            self._commit_transaction(tx)
+            self._applied_ops.add(op_id, OP_ADD_PRODUCT, _op_result(OP_ADD_PRODUCT, product))
+        
+        self._schedule_thumbnails([product])
+        return product
     
-    async def async_set_qty(self, key: str, qty: int) -> None:
+    async def async_set_qty(
+        self,
+        key: str,
+        qty: int,
+        list_id: str = DEFAULT_LIST_ID,
+        op_id: Optional[str] = None,
+    ) -> None:
         """
-        Set quantity for a product on the shopping list.
+        Set quantity for a product on a shopping list.
         
         This operation:
         - REQUIRES product to exist (enforces invariant)
-        - qty > 0: adds/updates active_list
-        - qty == 0: removes from active_list
-        - Persists state
+        - qty > 0: adds/updates the list (creating the list if needed)
+        - qty == 0: removes from the list
+        - Schedules a (coalesced) save of that list only
         - Fires update event
         
         Args:
             key: Product key (must exist in catalog)
             qty: New quantity (0 to remove, >0 to add/update)
+            list_id: List to update
+            op_id: Client op id; nothing is applied if it already was
             
         Raises:
             InvariantError: If product doesn't exist
-            ValueError: If qty is negative
+            ValueError: If qty is negative, list_id is invalid or op_id
+                was used for a different op
         """
         if qty < 0:
             raise ValueError(f"Quantity cannot be negative: {qty}")
         
         async with self._lock:
-            # INVARIANT ENFORCEMENT: Product must exist
-            if key not in self._products:
-                raise InvariantError(
-                    f"Cannot set quantity for unknown product '{key}'. "
-                    f"Product must be created first with add_product."
+            if self._applied_ops.get(op_id, OP_SET_QTY) is not MISSING:
+                return
+            
+            tx = _Transaction(self._state, self._membership)
+            tx.set_qty(key, qty, list_id)
+            
+            _LOGGER.debug("Set qty for %s on %s: %d", key, list_id, qty)
+            self._commit_transaction(tx)
+            self._applied_ops.add(op_id, OP_SET_QTY, _op_result(OP_SET_QTY, qty))
+    
+    async def async_adjust_qty(
+        self,
+        key: str,
+        delta: int,
+        list_id: str = DEFAULT_LIST_ID,
+        expected_revision: Optional[int] = None,
+        op_id: Optional[str] = None,
+    ) -> dict:
+        """
+        Change a quantity by a relative amount, atomically.
+        
+        The new quantity is computed under the lock from the current
+        state, so taps from several clients at once all count (unlike a
+        client-side read-modify-write followed by set_qty). Clamped at
+        zero; reaching zero removes the item. A change that leaves the
+        quantity as it is (decrementing 0) is not committed.
+        
+        With expected_revision the adjust is a compare-and-set: it is
+        rejected if this item (its quantity on this list, or the product
+        itself being deleted) changed after that revision. Changes to
+        other items don't conflict.
+        
+        A delta isn't idempotent, so this is where an op id matters most:
+        resending an applied op id returns the qty it produced (with the
+        current revision) and applies nothing.
+        
+        Args:
+            key: Product key (must exist in catalog)
+            delta: Amount to add (negative to remove)
+            list_id: List to update
+            expected_revision: Revision the caller's view of the item is from
+            op_id: Client op id
+        
+        Returns:
+            {"key": "milk", "list_id": "groceries", "qty": 3, "revision": 42}
+        
+        Raises:
+            InvariantError: If product doesn't exist
+            RevisionConflictError: If the item changed after expected_revision
+            ValueError: If list_id is invalid or op_id was used for a
+                different op
+        """
+        async with self._lock:
+            replayed = self._applied_ops.get(op_id, OP_ADJUST_QTY)
+            if replayed is not MISSING:
+                return {
+                    "key": key,
+                    "list_id": list_id,
+                    "qty": replayed["qty"],
+                    "revision": self._state.revision,
+                }
+            
+            if expected_revision is not None:
+                changed = self._changed_keys_since(
+                    expected_revision,
+                    (CHANGE_QTY_CHANGED, CHANGE_PRODUCT_DELETED),
+                    list_id,
                 )
+                # Not covered by the changelog: can't prove it's unchanged
+                if changed is None or key in changed:
+                    raise RevisionConflictError(
+                        f"'{key}' on {list_id} changed after revision {expected_revision}",
+                        qty=self.get_active_qty(key, list_id),
+                        revision=self._state.revision,
+                    )
             
-            # Update or remove from active list
-            if qty > 0:
-                self._active_list[key] = ActiveItem(qty=qty)
-                _LOGGER.debug("Set qty for %s: %d", key, qty)
-            else:
-                # qty == 0: remove from list
-                if key in self._active_list:
-                    del self._active_list[key]
-                    _LOGGER.debug("Removed %s from active list", key)
+            tx = _Transaction(self._state, self._membership)
+            qty = tx.adjust_qty(key, delta, list_id)
             
-            await self._async_save_active()
-            self._fire_update_event()
+            _LOGGER.debug("Adjusted qty for %s on %s by %d: %d", key, list_id, delta, qty)
+            self._commit_transaction(tx)
+            self._applied_ops.add(op_id, OP_ADJUST_QTY, _op_result(OP_ADJUST_QTY, qty))
+            return {
+                "key": key,
+                "list_id": list_id,
+                "qty": qty,
+                "revision": self._state.revision,
+            }
     
-    async def async_delete_product(self, key: str) -> None:
+    async def async_delete_product(self, key: str, op_id: Optional[str] = None) -> None:
         """
         Delete a product from the catalog.
         
         This operation:
         - Removes product from catalog
-        - Removes from active list (maintains invariant)
-        - Persists both changes
+        - Removes from every list holding it (maintains invariant),
+          found through the reverse index rather than a scan of all lists
+        - Schedules a (coalesced) save of the changed stores
         
         Args:
             key: Product key to delete
+            op_id: Client op id; nothing is applied if it already was
+        
+        Raises:
+            ValueError: If op_id was used for a different op
         """
         async with self._lock:
-            if key not in self._products:
-                _LOGGER.warning("Attempted to delete non-existent product: %s", key)
+            if self._applied_ops.get(op_id, OP_DELETE_PRODUCT) is not MISSING:
                 return
             
-            # Remove from catalog
-            del self._products[key]
+            tx = _Transaction(self._state, self._membership)
+            deleted = tx.delete_product(key)
+            if deleted:
+                _LOGGER.debug("Deleted product: %s", key)
+                self._commit_transaction(tx)
+            else:
+                _LOGGER.warning("Attempted to delete non-existent product: %s", key)
+            self._applied_ops.add(
+                op_id, OP_DELETE_PRODUCT, _op_result(OP_DELETE_PRODUCT, deleted)
+            )
+    
+    async def async_apply_batch(
+        self, ops: List[dict], op_id: Optional[str] = None
+    ) -> dict:
+        """
+        Apply an ordered list of mutations atomically.
+        
+        Every op is validated against the invariant in order on a
+        copy-on-write working set, so later ops see the effect of earlier
+        ones (add_product then set_qty works). If any op fails, nothing
+        is applied. On success the lock is taken once, each changed store
+        is saved once and a single aggregated delta/event is emitted.
+        
+        Args:
+            ops: List of operations, each one of:
+                {"op": "add_product", "key": ..., "name": ...,
+                 "category": ..., "unit": ..., "image": ...}
+                {"op": "set_qty", "key": ..., "qty": ..., "list_id": ...}
+                {"op": "adjust_qty", "key": ..., "delta": ..., "list_id": ...}
+                {"op": "delete_product", "key": ...}
+            op_id: Client op id of the whole batch; if already applied,
+                its result is returned and nothing is applied
+        
+        Returns:
+            {
+                "revision": 42,
+                "results": [
+                    {"op": "add_product", "key": "milk", "result": {...product}},
+                    {"op": "set_qty", "key": "milk", "result": {"qty": 1}},
+                    {"op": "delete_product", "key": "egg", "result": {"deleted": true}}
+                ]
+            }
+        
+        Raises:
+            InvariantError: If an op would violate the invariant
+            ValueError: If an op is malformed or op_id was used for a
+                different op
+        """
+        async with self._lock:
+            replayed = self._applied_ops.get(op_id, _BATCH)
+            if replayed is not MISSING:
+                return replayed
             
-            # Remove from active list (maintain invariant)
-            if key in self._active_list:
-                del self._active_list[key]
+            tx = _Transaction(self._state, self._membership)
+            results = []
             
-            await self._async_save_products()
-            await self._async_save_active()
+            for index, op in enumerate(ops):
+                try:
+                    results.append(tx.apply_op(op))
+                except InvariantError as err:
+                    raise InvariantError(f"Batch op {index}: {err}") from err
+                except (KeyError, ValueError) as err:
+                    raise ValueError(f"Batch op {index}: {err}") from err
             
-            _LOGGER.debug("Deleted product: %s", key)
-            self._fire_update_event()
+            _LOGGER.debug("Applied batch of %d ops", len(ops))
+            self._commit_transaction(tx)
+            reply = {"revision": self._state.revision, "results": results}
+            self._applied_ops.add(op_id, _BATCH, reply)
+        
+        self._schedule_thumbnails([
+            tx.products[result["key"]] for result in results
+            if result["op"] == OP_ADD_PRODUCT and result["key"] in tx.products
+        ])
+        return reply
     
-    async def async_get_products(self) -> Dict[str, dict]:
+    async def async_replay(self, ops: List[dict]) -> dict:
         """
-        Get all products in the catalog.
+        Apply ops a client queued while offline, skipping those already applied.
+        
+        Each op carries its client op id. Ops whose id was already
+        applied (sent before the connection dropped, or earlier in this
+        replay) are reported as duplicates with their first result. Results
+        are the same whichever command applied the op (see _op_result).
+        Unlike a batch, the others are applied or rejected one by one:
+        an op that no longer fits (its product was deleted meanwhile)
+        fails alone. Ops validate before they write, so a failed op
+        leaves nothing behind. Everything applied is still committed
+        once, with one save, one delta and one event, so a reconnecting
+        client costs a single commit however long it was offline.
+        
+        Args:
+            ops: Batch ops (see async_apply_batch), each with an "op_id"
+        
+        Returns:
+            {
+                "revision": 43,
+                "results": [
+                    {"op_id": "a1", "op": "adjust_qty", "key": "milk",
+                     "status": "applied", "result": {"qty": 3}},
+                    {"op_id": "a0", "op": "set_qty", "key": "eggs",
+                     "status": "duplicate", "result": {"qty": 0}},
+                    {"op_id": "a2", "op": "set_qty", "key": "gone",
+                     "status": "failed",
+                     "error": {"code": "invariant_violation", "message": "..."}}
+                ]
+            }
+        """
+        async with self._lock:
+            tx = _Transaction(self._state, self._membership)
+            results = []
+            applied: Dict[str, Tuple[str, Any]] = {}
+            
+            for op in ops:
+                op_id, kind = op["op_id"], op.get("op")
+                entry = {"op_id": op_id, "op": kind, "key": op.get("key")}
+                try:
+                    if op_id in applied:
+                        if applied[op_id][0] != kind:
+                            raise ValueError(
+                                f"op_id '{op_id}' was already used for {applied[op_id][0]}"
+                            )
+                        replayed = applied[op_id][1]
+                    else:
+                        replayed = self._applied_ops.get(op_id, kind)
+                    if replayed is not MISSING:
+                        entry.update(status=REPLAY_DUPLICATE, result=replayed)
+                    else:
+                        result = tx.apply_op(op)["result"]
+                        applied[op_id] = (kind, result)
+                        entry.update(status=REPLAY_APPLIED, result=result)
+                except InvariantError as err:
+                    entry.update(status=REPLAY_FAILED, error={
+                        "code": "invariant_violation", "message": str(err)
+                    })
+                except (KeyError, ValueError) as err:
+                    entry.update(status=REPLAY_FAILED, error={
+                        "code": "invalid_request", "message": str(err)
+                    })
+                results.append(entry)
+            
+            _LOGGER.debug(
+                "Replayed %d ops (%d applied)", len(ops), len(applied)
+            )
+            self._commit_transaction(tx)
+            for op_id, (kind, result) in applied.items():
+                self._applied_ops.add(op_id, kind, result)
+            revision = self._state.revision
+        
+        self._schedule_thumbnails([
+            tx.products[entry["key"]] for entry in results
+            if entry["op"] == OP_ADD_PRODUCT
+            and entry["status"] == REPLAY_APPLIED
+            and entry["key"] in tx.products
+        ])
+        return {"revision": revision, "results": results}
+    
+    async def async_undo(self) -> dict:
+        """
+        Revert the most recent mutation.
+        
+        The previous values recorded for it are restored in one
+        transaction, which is persisted, pushed to subscribers and fires
+        an update event like any other commit. Its own inverse goes on
+        the redo stack. Undo is global: it reverts the last change made
+        by any client.
         
         Returns:
-            Dictionary of product key -> product data
+            {
+                "applied": true,             # false if there was nothing to undo,
+                                             # or it no longer changed anything
+                "revision": 43,
+                "ops": ["delete_product"],   # what the reverted mutation did
+                "keys": ["milk"],            # products it touched
+                "can_undo": true,
+                "can_redo": true
+            }
         """
         async with self._lock:
-            return {key: product.to_dict() for key, product in self._products.items()}
+            return self._apply_history(
+                self._history.pop_undo(), self._history.push_redo
+            )
     
-    async def async_get_active(self) -> Dict[str, dict]:
+    async def async_redo(self) -> dict:
         """
-        Get active shopping list.
+        Re-apply the most recently undone mutation.
+        
+        Only possible until a new mutation is made, which clears the
+        redo stack.
         
         Returns:
-            Dictionary of product key -> active item data (qty only)
+            Same shape as async_undo
         """
         async with self._lock:
-            return {key: item.to_dict() for key, item in self._active_list.items()}
+            return self._apply_history(
+                self._history.pop_redo(), self._history.push_undo
+            )
+    
+    @callback
+    def _apply_history(
+        self,
+        entry: Optional[HistoryEntry],
+        push_inverse: Callable[[HistoryEntry], None],
+    ) -> dict:
+        """Commit a history entry and record its inverse with push_inverse."""
+        result = {"applied": False}
+        if entry is not None:
+            tx = _Transaction(self._state, self._membership)
+            entry.apply(tx)
+            if tx.changes:
+                push_inverse(HistoryEntry.capture(
+                    self._state, self._membership, tx.changes, entry.ops
+                ))
+                self._commit_transaction(tx, record=False)
+                _LOGGER.debug("Reverted %s of %s", entry.ops, entry.keys)
+                result["applied"] = True
+            else:
+                # Already undone by later changes: the entry is dropped,
+                # not moved to the other stack
+                _LOGGER.debug("Dropped %s of %s: nothing to revert", entry.ops, entry.keys)
+            result.update(entry.as_dict())
+        result.update(
+            revision=self._state.revision,
+            can_undo=self._history.can_undo,
+            can_redo=self._history.can_redo,
+        )
+        return result
+    
+    async def async_import_products(self, path: str, fmt: str) -> dict:
+        """
+        Upsert products from a CSV or JSON-lines file.
+        
+        The file is read and validated in the executor, one chunk at
+        a time, so memory use does not depend on the file size. Each
+        chunk is one commit (one coalesced save, one delta) and fires
+        an import progress event. Invalid rows are skipped and reported,
+        and products identical to the catalog entry are not rewritten.
+        Image URLs use an existing thumbnail if there is one, but new
+        thumbnails are not generated for imports.
+        
+        Args:
+            path: File to read
+            fmt: FORMAT_CSV or FORMAT_JSONL
+        
+        Returns:
+            {
+                "rows": 20000,
+                "imported": 19990,
+                "unchanged": 5,
+                "error_count": 5,
+                "errors": ["line 17: 'key' and 'name' are required", ...],
+                "revision": 42
+            }
+        
+        Raises:
+            OSError: If the file can't be read
+            ValueError: If a CSV file has no usable header
+        """
+        summary = {"rows": 0, "imported": 0, "unchanged": 0, "error_count": 0}
+        errors: List[str] = []
+        chunks = iter_import_chunks(path, fmt, TRANSFER_CHUNK_SIZE)
+        try:
+            while True:
+                chunk = await self.hass.async_add_executor_job(next, chunks, None)
+                if chunk is None:
+                    break
+                products, chunk_errors, rows = chunk
+                
+                async with self._lock:
+                    tx = _Transaction(self._state, self._membership)
+                    for product in products:
+                        if self._thumbnails is not None:
+                            thumbnail = self._thumbnails.lookup(product.image)
+                            if thumbnail is not None:
+                                product = replace(product, image=thumbnail)
+                        if tx.products.get(product.key) == product:
+                            summary["unchanged"] += 1
+                            continue
+                        tx.put_product(product)
+                    summary["imported"] += len(tx.changes)
+                    self._commit_transaction(tx)
+                
+                summary["rows"] += rows
+                summary["error_count"] += len(chunk_errors)
+                errors.extend(chunk_errors[:IMPORT_MAX_ERRORS - len(errors)])
+                self.hass.bus.async_fire(
+                    EVENT_IMPORT_PROGRESS, {"path": path, "done": False, **summary}
+                )
+        finally:
+            await self.hass.async_add_executor_job(chunks.close)
+        
+        summary["revision"] = self._state.revision
+        self.hass.bus.async_fire(
+            EVENT_IMPORT_PROGRESS, {"path": path, "done": True, **summary}
+        )
+        _LOGGER.info("Imported %s: %s", path, summary)
+        return {**summary, "errors": errors}
+    
+    async def async_export_products(self, path: str, fmt: str) -> dict:
+        """
+        Write the catalog to a CSV or JSON-lines file.
+        
+        The current snapshot is immutable, so it is encoded and written
+        in the executor chunk by chunk, without the lock and without
+        building the whole file in memory.
+        
+        Args:
+            path: File to write (replaced atomically)
+            fmt: FORMAT_CSV or FORMAT_JSONL
+        
+        Returns:
+            {"products": 20000, "bytes": 1843200, "revision": 42}
+        """
+        state = self._state
+        size = await self.hass.async_add_executor_job(
+            write_export, path, state.products.values(), fmt, TRANSFER_CHUNK_SIZE
+        )
+        _LOGGER.info("Exported %d products to %s", len(state.products), path)
+        return {
+            "products": len(state.products),
+            "bytes": size,
+            "revision": state.revision,
+        }
+    
+    def _schedule_thumbnails(self, products: List[Product]) -> None:
+        """Start background thumbnail generation for products with image URLs."""
+        if self._thumbnails is None:
+            return
+        for product in products:
+            if self._thumbnails.wants_thumbnail(product.image):
+                task = self.hass.async_create_background_task(
+                    self._async_apply_thumbnail(product.key, product.image),
+                    f"{DOMAIN} thumbnail {product.key}",
+                )
+                self._thumbnail_tasks.add(task)
+                task.add_done_callback(self._thumbnail_tasks.discard)
+    
+    async def _async_apply_thumbnail(self, key: str, source: str) -> None:
+        """Swap a product's image for its thumbnail once generated."""
+        url = await self._thumbnails.async_get_thumbnail(source)
+        if url is None:
+            return
+        
+        async with self._lock:
+            product = self._state.products.get(key)
+            # Skip if the product was deleted or given another image meanwhile
+            if product is None or product.image != source:
+                return
+            tx = _Transaction(self._state, self._membership)
+            tx.add_product(key, product.name, product.category, product.unit, url)
+            _LOGGER.debug("Using thumbnail for %s: %s", key, url)
+            # Not something the user did, so not something to undo
+            self._commit_transaction(tx, record=False)
+    
+    async def async_get_products(
+        self, since_revision: Optional[int] = None
+    ) -> Dict[str, dict]:
+        """
+        Get all products in the catalog.
+        
+        Args:
+            since_revision: If given, only return what changed after
+                this revision (when the changelog still covers it)
+        
+        Returns:
+            Without since_revision: dictionary of product key -> product data
+            
+            With since_revision:
+                {"revision": 42, "full": false,
+                 "upserted": {key: product data}, "deleted": [key, ...]}
+            or, if the changelog no longer covers since_revision:
+                {"revision": 42, "full": true, "products": {...}}
+        """
+        state = self._state
+        if since_revision is None:
+            return {key: p.to_dict() for key, p in state.products.items()}
+        
+        keys = self._changed_keys_since(
+            since_revision, (CHANGE_PRODUCT_UPSERTED, CHANGE_PRODUCT_DELETED)
+        )
+        if keys is None:
+            return {
+                "revision": state.revision,
+                "full": True,
+                "products": {key: p.to_dict() for key, p in state.products.items()},
+            }
+        
+        return {
+            "revision": state.revision,
+            "full": False,
+            "upserted": {
+                key: state.products[key].to_dict()
+                for key in keys if key in state.products
+            },
+            "deleted": sorted(key for key in keys if key not in state.products),
+        }
+    
+    async def async_get_active(
+        self,
+        since_revision: Optional[int] = None,
+        list_id: str = DEFAULT_LIST_ID,
+    ) -> Dict[str, dict]:
+        """
+        Get one active shopping list.
+        
+        Args:
+            list_id: List to read (unknown lists are empty)
+            since_revision: If given, only return what changed after
+                this revision (when the changelog still covers it)
+        
+        Returns:
+            Without since_revision: dictionary of product key -> active
+            item data (qty only)
+            
+            With since_revision:
+                {"revision": 42, "full": false,
+                 "upserted": {key: {"qty": n}}, "deleted": [key, ...]}
+            or, if the changelog no longer covers since_revision:
+                {"revision": 42, "full": true, "active_list": {...}}
+        """
+        state = self._state
+        active_list = state.active(list_id)
+        if since_revision is None:
+            return {key: a.to_dict() for key, a in active_list.items()}
+        
+        keys = self._changed_keys_since(
+            since_revision, (CHANGE_QTY_CHANGED, CHANGE_PRODUCT_DELETED), list_id
+        )
+        if keys is None:
+            return {
+                "revision": state.revision,
+                "full": True,
+                "active_list": {key: a.to_dict() for key, a in active_list.items()},
+            }
+        
+        return {
+            "revision": state.revision,
+            "full": False,
+            "upserted": {
+                key: active_list[key].to_dict()
+                for key in keys if key in active_list
+            },
+            "deleted": sorted(key for key in keys if key not in active_list),
+        }
     
-    async def async_get_full_state(self) -> dict:
+    async def async_get_full_state(self, list_id: str = DEFAULT_LIST_ID) -> dict:
         """
-        Get complete state for frontend.
+        Get complete state of one list for frontend.
         
         Returns combined view with product metadata + quantities.
         This is a convenience method for UI rendering.
@@ -270,14 +1366,318 @@ class ShoppingListManager:
                 "active_list": {...}
             }
         """
-        async with self._lock:
-            # Validate invariant before returning state
-            validate_invariant(self._products, self._active_list)
-            
-            return {
-                "products": {key: p.to_dict() for key, p in self._products.items()},
-                "active_list": {key: a.to_dict() for key, a in self._active_list.items()}
+        state = self._state
+        
+        # Validate invariant before returning state
+        self._validate_state(state, list_id)
+        
+        return {
+            "products": {key: p.to_dict() for key, p in state.products.items()},
+            "active_list": {
+                key: a.to_dict() for key, a in state.active(list_id).items()
             }
+        }
+    
+    def _validate_state(self, state: StateSnapshot, list_id: str) -> None:
+        """Validate the invariant once per published products/list pair."""
+        active_list = state.active(list_id)
+        validated = self._validated.get(list_id)
+        if (
+            validated is not None
+            and validated[0] is state.products
+            and validated[1] is active_list
+        ):
+            return
+        validate_invariant(state.products, active_list)
+        self._validated[list_id] = (state.products, active_list)
+    
+    @callback
+    def get_products_json(self) -> bytes:
+        """
+        Get all products as pre-encoded JSON.
+        
+        Encoded once per catalog change and shared by every reader.
+        """
+        products = self._state.products
+        cached = self._json_products
+        if cached is None or cached[0] is not products:
+            cached = (products, json_bytes(to_serializable(products)))
+            self._json_products = cached
+        return cached[1]
+    
+    @callback
+    def get_active_json(self, list_id: str = DEFAULT_LIST_ID) -> bytes:
+        """
+        Get one active shopping list as pre-encoded JSON.
+        
+        Encoded once per change of that list and shared by every reader.
+        """
+        active_list = self._state.active(list_id)
+        cached = self._json_active.get(list_id)
+        if cached is None or cached[0] is not active_list:
+            cached = (active_list, json_bytes(to_serializable(active_list)))
+            self._json_active[list_id] = cached
+        return cached[1]
+    
+    @callback
+    def get_full_state_json(self, list_id: str = DEFAULT_LIST_ID) -> bytes:
+        """
+        Get complete state of one list as pre-encoded JSON.
+        
+        Same shape as async_get_full_state. The invariant is validated
+        when the cache is rebuilt, not on every read.
+        """
+        state = self._state
+        active_list = state.active(list_id)
+        cached = self._json_full_state.get(list_id)
+        if (
+            cached is None
+            or cached[0] is not state.products
+            or cached[1] is not active_list
+        ):
+            self._validate_state(state, list_id)
+            cached = (
+                state.products,
+                active_list,
+                b"".join((
+                    b'{"products":',
+                    self.get_products_json(),
+                    b',"active_list":',
+                    self.get_active_json(list_id),
+                    b"}",
+                )),
+            )
+            self._json_full_state[list_id] = cached
+        return cached[2]
+    
+    @callback
+    def search_products(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        category: Optional[str] = None,
+    ) -> dict:
+        """
+        Search the catalog by name (typo tolerant, ranked, lock-free).
+        
+        Args:
+            query: Free text
+            limit: Maximum number of results
+            offset: Number of ranked results to skip
+            category: Only return products in this category
+        
+        Returns:
+            {
+                "revision": 42,
+                "total": 3,
+                "exact_match": false,
+                "results": [{...product data, "score": 1.5}, ...]
+            }
+        """
+        found = self._search_index.search(query, limit, offset, category)
+        products = self._state.products
+        return {
+            "revision": self._state.revision,
+            "total": found["total"],
+            "exact_match": found["exact_match"],
+            "results": [
+                {**products[hit["key"]].to_dict(), "score": hit["score"]}
+                for hit in found["results"]
+            ],
+        }
+    
+    @callback
+    def get_products_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        sort: str = SORT_NAME,
+        category: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> dict:
+        """
+        Get one page of the catalog in a stable order (lock-free).
+        
+        Pagination is keyset-based: the cursor encodes the position after
+        the last returned product, so pages stay consistent while the
+        catalog changes (no skipped or repeated products).
+        
+        Args:
+            limit: Maximum number of products in the page
+            cursor: next_cursor from the previous page, None for the first
+            sort: "name" or "category" (category order, then name)
+            category: Only return products in this category
+            fields: Product fields to include ("key" is always included)
+        
+        Returns:
+            {
+                "revision": 42,
+                "products": [{"key": "milk", "name": "Milk", ...}, ...],
+                "next_cursor": "..." or None on the last page
+            }
+        
+        Raises:
+            ValueError: If sort, fields or cursor are invalid
+        """
+        if sort not in (SORT_NAME, SORT_CATEGORY):
+            raise ValueError(f"Unknown sort '{sort}'")
+        if fields is not None:
+            unknown = set(fields) - set(PRODUCT_FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown fields: {sorted(unknown)}")
+            fields = [f for f in PRODUCT_FIELDS if f == "key" or f in fields]
+        
+        state = self._state
+        order = self._sort_indexes[sort]
+        start = 0 if cursor is None else order.bisect_right(
+            _decode_cursor(cursor, sort)
+        )
+        
+        page: List[dict] = []
+        last_key: Optional[tuple] = None
+        index = start
+        while index < len(order) and len(page) < limit:
+            sort_key = order[index]
+            index += 1
+            product = state.products[sort_key[-1]]
+            if category is not None and product.category != category:
+                continue
+            data = product.to_dict()
+            page.append(data if fields is None else {f: data[f] for f in fields})
+            last_key = sort_key
+        
+        return {
+            "revision": state.revision,
+            "products": page,
+            "next_cursor": (
+                _encode_cursor(sort, last_key)
+                if last_key is not None and index < len(order) else None
+            ),
+        }
+    
+    @callback
+    def get_view(
+        self,
+        list_id: str = DEFAULT_LIST_ID,
+        sort: str = SORT_CATEGORY,
+        category: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        split: bool = True,
+    ) -> dict:
+        """
+        Get the catalog in display order, grouped, with quantities (lock-free).
+        
+        Read from the maintained sort indexes, so nothing is re-sorted:
+        inactive products are read straight from the catalog order, and
+        only the list's active items (usually a handful) are ordered.
+        
+        Args:
+            list_id: List whose quantities are used
+            sort: "category" (grouped by category) or "name" (one group)
+            category: Only include products in this category
+            fields: Product fields to include ("key" is always included)
+            split: Separate active and inactive sections; if False, the
+                whole catalog is returned in one "products" section
+        
+        Returns:
+            {
+                "revision": 42,
+                "list_id": "groceries",
+                "sort": "category",
+                "active": [
+                    {"category": "fridge", "products": [
+                        {"key": "milk", "name": "Milk", ..., "qty": 2}, ...
+                    ]},
+                    ...
+                ],
+                "inactive": [...]
+            }
+            
+            ("category" is None for groups when sorting by name)
+        
+        Raises:
+            ValueError: If sort or fields are invalid
+        """
+        if sort not in (SORT_NAME, SORT_CATEGORY):
+            raise ValueError(f"Unknown sort '{sort}'")
+        if fields is not None:
+            unknown = set(fields) - set(PRODUCT_FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown fields: {sorted(unknown)}")
+            fields = [f for f in PRODUCT_FIELDS if f == "key" or f in fields]
+        
+        state = self._state
+        products = state.products
+        active_list = state.active(list_id)
+        index = self._sort_indexes[sort]
+        grouped = sort == SORT_CATEGORY
+        
+        def sections(keys: Iterable[str]) -> List[dict]:
+            groups: List[dict] = []
+            items: List[dict] = []
+            current: Any = ()  # no group yet
+            for key in keys:
+                product = products[key]
+                if category is not None and product.category != category:
+                    continue
+                group = category_group(product) if grouped else None
+                if group != current:
+                    items = []
+                    groups.append({"category": group, "products": items})
+                    current = group
+                data = product.to_dict()
+                if fields is not None:
+                    data = {f: data[f] for f in fields}
+                item = active_list.get(key)
+                data["qty"] = item.qty if item else 0
+                items.append(data)
+            return groups
+        
+        view: Dict[str, Any] = {
+            "revision": state.revision,
+            "list_id": list_id,
+            "sort": sort,
+        }
+        if not split:
+            view["products"] = sections(index.keys())
+        else:
+            view["active"] = sections(sorted(active_list, key=index.position))
+            view["inactive"] = sections(
+                key for key in index.keys() if key not in active_list
+            )
+        return view
+    
+    @callback
+    def get_view_json(
+        self,
+        list_id: str = DEFAULT_LIST_ID,
+        sort: str = SORT_CATEGORY,
+        category: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        split: bool = True,
+    ) -> bytes:
+        """
+        Get a view (see get_view) as pre-encoded JSON.
+        
+        Encoded once per change of the catalog or the list, per set of
+        parameters, and shared by every reader.
+        """
+        state = self._state
+        active_list = state.active(list_id)
+        params = (list_id, sort, category, tuple(fields) if fields is not None else None, split)
+        cached = self._json_views.get(params)
+        if (
+            cached is None
+            or cached[0] is not state.products
+            or cached[1] is not active_list
+        ):
+            view = self.get_view(list_id, sort, category, fields, split)
+            if len(self._json_views) >= VIEW_CACHE_SIZE:
+                self._json_views.clear()
+            cached = (state.products, active_list, json_bytes(view))
+            self._json_views[params] = cached
+        return cached[2]
     
     def get_product(self, key: str) -> Optional[Product]:
         """
@@ -289,17 +1689,280 @@ class ShoppingListManager:
         Returns:
             Product if exists, None otherwise
         """
-        return self._products.get(key)
+        return self._state.products.get(key)
     
-    def get_active_qty(self, key: str) -> int:
+    def get_active_qty(self, key: str, list_id: str = DEFAULT_LIST_ID) -> int:
         """
         Get quantity for a product (synchronous, lock-free read).
         
         Args:
             key: Product key
+            list_id: List to read
             
         Returns:
-            Quantity if on active list, 0 otherwise
+            Quantity if on the list, 0 otherwise
         """
-        item = self._active_list.get(key)
+        item = self._state.active(list_id).get(key)
         return item.qty if item else 0
+
+
+class _Transaction:
+    """
+    Copy-on-write working set for one writer critical section.
+    
+    Reads go to the published snapshot until the first write to a
+    mapping, which copies it. Nothing is visible to readers until the
+    manager commits the transaction; abandoning it (e.g. on an error
+    part-way through a batch) leaves the published state untouched.
+    """
+    
+    def __init__(self, state: StateSnapshot, membership: Mapping[str, Set[str]]):
+        """Start a transaction on top of a published snapshot."""
+        self.products: Mapping[str, Product] = state.products
+        self.active_lists: Mapping[str, Mapping[str, ActiveItem]] = state.active_lists
+        self.products_changed = False
+        self.lists_changed: Set[str] = set()
+        self.lists_created: Set[str] = set()
+        self.changes: List[dict] = []
+        self._membership = membership
+        self._lists_copied = False
+    
+    def active(self, list_id: str) -> Mapping[str, ActiveItem]:
+        """Working view of one list."""
+        return self.active_lists.get(list_id, {})
+    
+    def _writable_products(self) -> Dict[str, Product]:
+        """Copy products on first write."""
+        if not self.products_changed:
+            self.products = dict(self.products)
+            self.products_changed = True
+        return self.products
+    
+    def _writable_active(self, list_id: str) -> Dict[str, ActiveItem]:
+        """Copy one list (and the list table) on first write to it."""
+        if list_id in self.lists_changed:
+            return self.active_lists[list_id]
+        if not self._lists_copied:
+            self.active_lists = dict(self.active_lists)
+            self._lists_copied = True
+        if list_id not in self.active_lists:
+            self.lists_created.add(list_id)
+        active_list = dict(self.active_lists.get(list_id, {}))
+        self.active_lists[list_id] = active_list
+        self.lists_changed.add(list_id)
+        return active_list
+    
+    def add_product(
+        self,
+        key: str,
+        name: str,
+        category: str = "other",
+        unit: str = "pcs",
+        image: str = "",
+    ) -> Product:
+        """Create or replace a product."""
+        product = Product(
+            key=key,
+            name=name,
+            category=category,
+            unit=unit,
+            image=image
+        )
+        self.put_product(product)
+        return product
+    
+    def put_product(self, product: Product) -> None:
+        """Insert or replace a validated product."""
+        key = product.key
+        self._writable_products()[key] = product
+        self.changes.append({
+            "type": CHANGE_PRODUCT_UPSERTED,
+            "key": key,
+            "product": product.to_dict(),
+        })
+    
+    def set_qty(self, key: str, qty: int, list_id: str = DEFAULT_LIST_ID) -> None:
+        """Set quantity on one list, enforcing the invariant."""
+        if qty < 0:
+            raise ValueError(f"Quantity cannot be negative: {qty}")
+        validate_list_id(list_id)
+        
+        # INVARIANT ENFORCEMENT: Product must exist
+        if key not in self.products:
+            raise InvariantError(
+                f"Cannot set quantity for unknown product '{key}'. "
+                f"Product must be created first with add_product."
+            )
+        
+        item = self.active(list_id).get(key)
+        if qty == (item.qty if item else 0):
+            # Nothing to change: no revision, save, event or undo entry
+            return
+        
+        if qty > 0:
+            self._writable_active(list_id)[key] = ActiveItem(qty=qty)
+        else:
+            # qty == 0: remove from list
+            del self._writable_active(list_id)[key]
+        
+        self.changes.append({
+            "type": CHANGE_QTY_CHANGED,
+            "list_id": list_id,
+            "key": key,
+            "qty": qty,
+        })
+    
+    def adjust_qty(self, key: str, delta: int, list_id: str = DEFAULT_LIST_ID) -> int:
+        """Change a quantity relative to the working state, clamped at zero."""
+        validate_list_id(list_id)
+        item = self.active(list_id).get(key)
+        current = item.qty if item else 0
+        qty = max(0, current + delta)
+        # set_qty enforces the invariant and skips no-op changes
+        self.set_qty(key, qty, list_id)
+        return qty
+    
+    def delete_product(self, key: str) -> bool:
+        """Delete a product and its active entries. Returns False if unknown."""
+        if key not in self.products:
+            return False
+        
+        del self._writable_products()[key]
+        
+        # Remove from every list holding it (maintain invariant): the
+        # published reverse index, plus lists already touched in this
+        # transaction that it doesn't reflect yet
+        for list_id in self._membership.get(key, set()) | self.lists_changed:
+            if key in self.active(list_id):
+                del self._writable_active(list_id)[key]
+        
+        self.changes.append({"type": CHANGE_PRODUCT_DELETED, "key": key})
+        return True
+    
+    def apply_op(self, op: dict) -> dict:
+        """Apply one batch op and return its per-op result."""
+        kind = op.get("op")
+        key = op["key"]
+        
+        if kind == OP_ADD_PRODUCT:
+            product = self.add_product(
+                key=key,
+                name=op["name"],
+                category=op.get("category", "other"),
+                unit=op.get("unit", "pcs"),
+                image=op.get("image", ""),
+            )
+            value: Any = product
+        elif kind == OP_SET_QTY:
+            self.set_qty(key, op["qty"], op.get("list_id", DEFAULT_LIST_ID))
+            value = op["qty"]
+        elif kind == OP_ADJUST_QTY:
+            value = self.adjust_qty(key, op["delta"], op.get("list_id", DEFAULT_LIST_ID))
+        elif kind == OP_DELETE_PRODUCT:
+            value = self.delete_product(key)
+        else:
+            raise ValueError(f"Unknown op '{kind}'")
+        
+        return {"op": kind, "key": key, "result": _op_result(kind, value)}
+
+
+# Op name of whole batches in the op id dedupe table
+_BATCH = "batch"
+
+
+def _op_result(kind: str, value: Any) -> dict:
+    """
+    Result of one applied op, as reported by batch and replay.
+    
+    Also what is stored for the op's id, whichever command applied it,
+    so a duplicate is reported the same way everywhere.
+    
+    Args:
+        kind: Op name
+        value: The Product (add_product), the new qty (set_qty,
+            adjust_qty) or whether the product existed (delete_product)
+    """
+    if kind == OP_ADD_PRODUCT:
+        return value.to_dict()
+    if kind == OP_DELETE_PRODUCT:
+        return {"deleted": value}
+    return {"qty": value}
+
+# Op name reported in update events for each change type
+_CHANGE_OPS = {
+    CHANGE_PRODUCT_UPSERTED: OP_ADD_PRODUCT,
+    CHANGE_QTY_CHANGED: OP_SET_QTY,
+    CHANGE_PRODUCT_DELETED: OP_DELETE_PRODUCT,
+}
+
+
+def _ops_of(changes: List[dict]) -> List[str]:
+    """Distinct op names of a commit's changes, in order."""
+    return list(dict.fromkeys(_CHANGE_OPS[change["type"]] for change in changes))
+
+
+class _UpdateEvent:
+    """
+    Changes collected for one coalesced update event.
+    
+    Merged per key, so the event's size depends on how many products
+    changed, not on how many times. Only the last quantity of an item
+    is kept. A deleted product is also dropped from upserted and
+    quantities; if it is added again later in the window, it is listed
+    in both deleted and upserted.
+    """
+    
+    def __init__(self, prev_revision: int):
+        """Start an event after the given revision."""
+        self.prev_revision = prev_revision
+        self.revision = prev_revision
+        self.changes = 0
+        self.ops: Set[str] = set()
+        self.upserted: Set[str] = set()
+        self.deleted: Set[str] = set()
+        self.quantities: Dict[str, Dict[str, int]] = {}
+    
+    def add(self, revision: int, changes: List[dict]) -> None:
+        """Merge one commit's changes."""
+        self.revision = revision
+        self.changes += len(changes)
+        for change in changes:
+            kind = change["type"]
+            key = change["key"]
+            self.ops.add(_CHANGE_OPS[kind])
+            if kind == CHANGE_QTY_CHANGED:
+                self.quantities.setdefault(change["list_id"], {})[key] = change["qty"]
+            elif kind == CHANGE_PRODUCT_UPSERTED:
+                self.upserted.add(key)
+            else:
+                self.deleted.add(key)
+                self.upserted.discard(key)
+                for quantities in self.quantities.values():
+                    quantities.pop(key, None)
+    
+    def as_dict(self) -> dict:
+        """
+        Event data.
+        
+        Returns:
+            {
+                "revision": 1700000000123,
+                "prev_revision": 1700000000120,
+                "ops": ["set_qty"],
+                "upserted": [],
+                "deleted": [],
+                "quantities": {"groceries": {"milk": 2, "eggs": 0}}
+            }
+        """
+        return {
+            "revision": self.revision,
+            "prev_revision": self.prev_revision,
+            "ops": sorted(self.ops),
+            "upserted": sorted(self.upserted),
+            "deleted": sorted(self.deleted),
+            "quantities": {
+                list_id: quantities
+                for list_id, quantities in self.quantities.items()
+                if quantities
+            },
+        }
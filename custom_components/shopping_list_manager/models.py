@@ -1,15 +1,23 @@
 """Data models for Shopping List Manager."""
-from dataclasses import dataclass, asdict
-from typing import Dict
+import sys
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Mapping
 
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class Product:
     """
     Product catalog entry - authoritative product definition.
     
     Products exist independently of the shopping list.
     They define WHAT can be shopped, not HOW MUCH is needed.
+    
+    Immutable and slotted: instances are shared between published
+    snapshots, and a large catalog carries no per-instance __dict__.
+    Low-cardinality strings (category, unit) are interned.
     """
     key: str
     name: str
@@ -39,14 +47,16 @@ class Product:
         )
     
     def __post_init__(self):
-        """Validate product data."""
+        """Validate product data and intern repeated strings."""
         if not self.key:
             raise ValueError("Product key cannot be empty")
         if not self.name:
             raise ValueError("Product name cannot be empty")
+        object.__setattr__(self, "category", sys.intern(self.category))
+        object.__setattr__(self, "unit", sys.intern(self.unit))
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ActiveItem:
     """
     Shopping list state - quantity only.
@@ -72,6 +82,74 @@ class ActiveItem:
             raise ValueError("Quantity cannot be negative")
 
 
+# Slot setters of Product, for building instances without the frozen
+# dataclass __init__ (one object.__setattr__ call per field, then
+# __post_init__), which made loading a large catalog ~50% slower
+_SET_KEY, _SET_NAME, _SET_CATEGORY, _SET_UNIT, _SET_IMAGE = (
+    Product.__dict__[field].__set__ for field in ("key", "name", "category", "unit", "image")
+)
+
+
+def products_from_dict(data: Mapping[str, dict]) -> Dict[str, Product]:
+    """
+    Build a catalog from stored data in one pass.
+    
+    Fills the slots directly, with the same validation and interning
+    as Product.__post_init__.
+    """
+    intern = sys.intern
+    products = {}
+    for key, item in data.items():
+        if not item["key"]:
+            raise ValueError("Product key cannot be empty")
+        if not item["name"]:
+            raise ValueError("Product name cannot be empty")
+        product = object.__new__(Product)
+        _SET_KEY(product, item["key"])
+        _SET_NAME(product, item["name"])
+        _SET_CATEGORY(product, intern(item.get("category", "other")))
+        _SET_UNIT(product, intern(item.get("unit", "pcs")))
+        _SET_IMAGE(product, item.get("image", ""))
+        products[key] = product
+    return products
+
+
+def active_from_dict(data: Mapping[str, dict]) -> Dict[str, ActiveItem]:
+    """Build an active list from stored data in one pass."""
+    return {key: ActiveItem(qty=item["qty"]) for key, item in data.items()}
+
+
+def to_serializable(items: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Prepare a whole catalog or active list for JSON encoding.
+    
+    Returns a plain dict of model instances, without building a dict
+    per object: Home Assistant's orjson-based encoders serialize slotted
+    dataclasses natively, producing the same shape as to_dict().
+    """
+    return dict(items)
+
+
+@dataclass(frozen=True)
+class StateSnapshot:
+    """
+    Immutable, published view of the manager state.
+    
+    Readers take a reference to the current snapshot and never need
+    the lock. Writers build new mappings (copy-on-write) and publish
+    a new snapshot with a single assignment, so a reader always sees
+    a consistent products/active lists/revision triple. A write to one
+    list copies only that list; the others are shared unchanged.
+    """
+    revision: int
+    products: Mapping[str, Product]
+    active_lists: Mapping[str, Mapping[str, ActiveItem]]
+    
+    def active(self, list_id: str) -> Mapping[str, ActiveItem]:
+        """Active items of a list (empty if the list doesn't exist)."""
+        return self.active_lists.get(list_id, _EMPTY)
+
+
 class InvariantError(Exception):
     """
     Raised when the core data model invariant is violated.
@@ -84,8 +162,23 @@ class InvariantError(Exception):
     pass
 
 
-def validate_invariant(products: Dict[str, Product], 
-                       active_list: Dict[str, ActiveItem]) -> None:
+class RevisionConflictError(Exception):
+    """
+    Raised when a compare-and-set write finds its item changed.
+    
+    Carries the item's current quantity and the current revision, so
+    the caller can retry from them without refetching.
+    """
+    
+    def __init__(self, message: str, qty: int, revision: int):
+        """Initialize with the current state of the item."""
+        super().__init__(message)
+        self.qty = qty
+        self.revision = revision
+
+
+def validate_invariant(products: Mapping[str, Product],
+                       active_list: Mapping[str, ActiveItem]) -> None:
     """
     Validate the core data model invariant.
     
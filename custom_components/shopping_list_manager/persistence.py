@@ -0,0 +1,315 @@
+"""Write-behind persistence for Shopping List Manager."""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import storage
+from homeassistant.helpers.json import json_bytes
+from homeassistant.util.json import json_loads
+
+from .const import DOMAIN, JOURNAL_MAX_BYTES, JOURNAL_MAX_RECORDS, STORAGE_VERSION
+from .instrumentation import Instrumentation
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CoalescingStore:
+    """
+    Debounced wrapper around a Home Assistant Store.
+
+    Mutations only mark the store dirty. Bursts of mutations within
+    the save delay are coalesced into a single write, built on top of
+    Store.async_delay_save (which also flushes pending writes at
+    Home Assistant's final write stage).
+
+    The data function is only called when a write actually happens,
+    so serialization cost is paid once per write, not once per mutation.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        key: str,
+        data_func: Callable[[], Any],
+        delay: float,
+        instrumentation: Optional[Instrumentation] = None,
+    ):
+        """Initialize the store."""
+        self._store = storage.Store(hass, STORAGE_VERSION, key)
+        self._key = key
+        self._instrumentation = instrumentation
+        self._metric = f"store.{key.removeprefix(f'{DOMAIN}.')}"
+        self._data_func = data_func
+        self._delay = delay
+        self._dirty = False
+
+        # Counters
+        self.save_requests = 0
+        self.writes = 0
+
+    @property
+    def dirty(self) -> bool:
+        """Return True if there are changes not yet written."""
+        return self._dirty
+
+    async def async_load(self) -> Optional[Any]:
+        """Load data from storage."""
+        return await self._store.async_load()
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Mark the store dirty and schedule a delayed write."""
+        self.save_requests += 1
+        self._dirty = True
+        self._store.async_delay_save(self._serialize, self._delay)
+
+    async def async_flush(self) -> None:
+        """
+        Write pending changes immediately.
+
+        Cancels any scheduled delayed write. No-op if the store is clean.
+        """
+        if not self._dirty:
+            return
+        await self.async_save()
+        _LOGGER.debug("Flushed %s", self._key)
+
+    async def async_save(self) -> None:
+        """Write the current data immediately, dirty or not."""
+        if self._instrumentation is None or not self._instrumentation.enabled:
+            await self._store.async_save(self._serialize())
+            return
+        started = time.perf_counter()
+        await self._store.async_save(self._serialize())
+        self._instrumentation.record(
+            f"{self._metric}.save", (time.perf_counter() - started) * 1000
+        )
+
+    def _serialize(self) -> Any:
+        """Produce data for a write and mark the store clean."""
+        self._dirty = False
+        self.writes += 1
+        instrumentation = self._instrumentation
+        if instrumentation is None or not instrumentation.enabled:
+            return self._data_func()
+        
+        # Measure the data build and the encoded size (the Store encodes
+        # with the same encoder; this costs one extra encode while on)
+        started = time.perf_counter()
+        data = self._data_func()
+        instrumentation.record(
+            f"{self._metric}.serialize", (time.perf_counter() - started) * 1000
+        )
+        instrumentation.record_size(self._metric, len(json_bytes(data)))
+        return data
+
+    def stats(self) -> dict:
+        """Return write coalescing counters."""
+        return {
+            "save_requests": self.save_requests,
+            "writes": self.writes,
+            "writes_saved": max(self.save_requests - self.writes, 0),
+            "dirty": self._dirty,
+        }
+
+
+def _read_journal(path: str) -> Tuple[List[bytes], int]:
+    """
+    Read complete journal lines (runs in the executor).
+
+    A crash while appending can leave a partial last line: it is
+    dropped and the file truncated back to the last complete record.
+
+    Returns:
+        (lines, size of the valid part of the file)
+    """
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except FileNotFoundError:
+        # Fresh install: .storage may not exist until something is saved
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return [], 0
+
+    end = data.rfind(b"\n") + 1
+    if end != len(data):
+        _LOGGER.warning(
+            "Dropping %d bytes of incomplete journal record in %s",
+            len(data) - end,
+            path,
+        )
+        with open(path, "r+b") as file:
+            file.truncate(end)
+    return data[:end].splitlines(), end
+
+
+def _append_journal(path: str, data: bytes) -> None:
+    """Append records and fsync (runs in the executor)."""
+    with open(path, "ab") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def _truncate_journal(path: str) -> None:
+    """Empty the journal (runs in the executor)."""
+    with open(path, "wb") as file:
+        file.flush()
+        os.fsync(file.fileno())
+
+
+class JournalStore:
+    """
+    Append-only journal of committed changes.
+
+    Each commit is appended as one compact JSON line
+    {"r": revision, "c": [changes]}, so write cost is proportional to
+    the size of the change, not of the catalog. Records appended while
+    a write is in progress are batched into the next write; each write
+    is fsynced.
+
+    The journal sits on top of a base snapshot (the regular stores).
+    Compaction writes the base, stamped with the revision of the last
+    record written to the journal, then empties the journal. Loading
+    skips records at or below the base revision: after a crash between
+    the two steps those records are older than the base, and replaying
+    them would bring back state the base has since overwritten or
+    deleted.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        key: str,
+        max_bytes: int = JOURNAL_MAX_BYTES,
+        max_records: int = JOURNAL_MAX_RECORDS,
+        instrumentation: Optional[Instrumentation] = None,
+    ):
+        """Initialize the journal."""
+        self.hass = hass
+        self._instrumentation = instrumentation
+        self._path = hass.config.path(storage.STORAGE_DIR, key)
+        self._max_bytes = max_bytes
+        self._max_records = max_records
+        self._lock = asyncio.Lock()
+        self._buffer: List[bytes] = []
+        self._buffer_revision = 0
+        self._write_task: Optional[asyncio.Task] = None
+
+        # Revision of the last record written to the file
+        self.revision = 0
+
+        # Size of the journal on disk
+        self.size = 0
+        self.records = 0
+
+        # Counters
+        self.appends = 0
+        self.bytes_written = 0
+        self.compactions = 0
+
+    @property
+    def needs_compaction(self) -> bool:
+        """Return True once the journal (with queued records) has passed a threshold."""
+        return (
+            self.size >= self._max_bytes
+            or self.records + len(self._buffer) >= self._max_records
+        )
+
+    async def async_load(self) -> List[dict]:
+        """
+        Read all complete records, oldest first.
+
+        Returns:
+            [{"r": revision, "c": [changes]}, ...]
+        """
+        lines, self.size = await self.hass.async_add_executor_job(
+            _read_journal, self._path
+        )
+        records = []
+        for line in lines:
+            try:
+                records.append(json_loads(line))
+            except ValueError:
+                _LOGGER.warning("Skipping corrupt journal record in %s", self._path)
+        self.records = len(records)
+        if records:
+            self.revision = records[-1]["r"]
+        return records
+
+    @callback
+    def async_append(self, revision: int, changes: List[dict]) -> None:
+        """Queue a commit for appending; written in order, in the background."""
+        self._buffer.append(json_bytes({"r": revision, "c": changes}) + b"\n")
+        self._buffer_revision = revision
+        self.appends += 1
+        if self._write_task is None or self._write_task.done():
+            self._write_task = self.hass.async_create_background_task(
+                self._async_write(), f"{self._path} append"
+            )
+
+    async def _async_write(self) -> None:
+        """Write everything queued so far."""
+        async with self._lock:
+            await self._async_write_buffer()
+
+    async def _async_write_buffer(self) -> None:
+        """Write the queued records (lock must be held)."""
+        if not self._buffer:
+            return
+        records = len(self._buffer)
+        data = b"".join(self._buffer)
+        revision = self._buffer_revision
+        self._buffer = []
+        started = time.perf_counter()
+        await self.hass.async_add_executor_job(_append_journal, self._path, data)
+        if self._instrumentation is not None and self._instrumentation.enabled:
+            self._instrumentation.record(
+                "journal.append", (time.perf_counter() - started) * 1000
+            )
+            self._instrumentation.record_size("journal.append", len(data))
+        self.size += len(data)
+        self.records += records
+        self.revision = revision
+        self.bytes_written += len(data)
+
+    async def async_flush(self) -> None:
+        """Write queued records immediately."""
+        async with self._lock:
+            await self._async_write_buffer()
+
+    async def async_compact(self, write_base: Callable[[int], Awaitable[None]]) -> None:
+        """
+        Fold the journal into the base snapshot.
+
+        Args:
+            write_base: Writes the current state to the base stores,
+                stamped with the given base revision (every record in
+                the journal is at or below it). Records committed while
+                it runs stay queued and are appended to the emptied
+                journal afterwards.
+        """
+        async with self._lock:
+            await self._async_write_buffer()
+            await write_base(self.revision)
+            await self.hass.async_add_executor_job(_truncate_journal, self._path)
+            self.size = 0
+            self.records = 0
+            self.compactions += 1
+        _LOGGER.debug("Compacted %s", self._path)
+        # Anything queued during compaction
+        await self._async_write()
+
+    def stats(self) -> dict:
+        """Return journal counters."""
+        return {
+            "appends": self.appends,
+            "bytes_written": self.bytes_written,
+            "size": self.size,
+            "records": self.records,
+            "compactions": self.compactions,
+            "pending": len(self._buffer),
+        }
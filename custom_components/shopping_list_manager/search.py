@@ -0,0 +1,218 @@
+"""In-memory product search index for Shopping List Manager."""
+import heapq
+import re
+from itertools import islice
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .models import Product
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+# Minimum trigram similarity for a candidate that isn't a substring match
+MIN_SIMILARITY = 0.2
+
+# Most products scored per query (plus exact matches). A short or
+# common query can share a trigram with most of the catalog; beyond
+# this, products sharing its rarer trigrams and with shorter names win.
+MAX_CANDIDATES = 500
+
+
+def normalize(text: str) -> str:
+    """Normalize text for matching: casefold, non-word chars to single spaces."""
+    return _NON_WORD.sub(" ", text.casefold()).strip()
+
+
+def trigrams(normalized: str) -> FrozenSet[str]:
+    """
+    Trigrams of normalized text, pg_trgm style.
+
+    Each word is padded with two leading and one trailing space, so
+    short queries still produce word-prefix trigrams ("mi" -> "  m", " mi").
+    """
+    grams: Set[str] = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return frozenset(grams)
+
+
+def _discard(index: dict, value, key: str) -> None:
+    """Remove a key from an index entry, dropping the entry once empty."""
+    keys = index.get(value)
+    if keys is not None:
+        keys.discard(key)
+        if not keys:
+            del index[value]
+
+
+class ProductSearchIndex:
+    """
+    Trigram index over Product.name.
+
+    Updated incrementally on add/delete, so queries never scan the
+    whole catalog. Candidates come from the query's rarest trigrams
+    first, and at most MAX_CANDIDATES of them (plus exact matches) are
+    scored. Trigram similarity makes matching tolerant of typos; exact,
+    prefix and substring matches are ranked above it.
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._postings: Dict[str, Set[str]] = {}
+        # key -> (normalized name, trigrams, display name, category)
+        self._entries: Dict[str, Tuple[str, FrozenSet[str], str, str]] = {}
+        # number of trigrams -> keys
+        self._sizes: Dict[int, Set[str]] = {}
+        # category -> keys
+        self._categories: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        """Number of indexed products."""
+        return len(self._entries)
+
+    def add(self, product: Product) -> None:
+        """Index a product (replacing any previous entry for its key)."""
+        self.remove(product.key)
+        name = normalize(product.name)
+        grams = trigrams(name)
+        self._entries[product.key] = (name, grams, product.name, product.category)
+        self._sizes.setdefault(len(grams), set()).add(product.key)
+        self._categories.setdefault(product.category, set()).add(product.key)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(product.key)
+
+    def remove(self, key: str) -> None:
+        """Remove a product from the index (no-op if not indexed)."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        _discard(self._sizes, len(entry[1]), key)
+        _discard(self._categories, entry[3], key)
+        for gram in entry[1]:
+            _discard(self._postings, gram, key)
+
+    def clear(self) -> None:
+        """Remove everything from the index."""
+        self._postings.clear()
+        self._entries.clear()
+        self._sizes.clear()
+        self._categories.clear()
+
+    def _candidates(self, query_grams: FrozenSet[str], category: Optional[str]) -> Set[str]:
+        """
+        Keys to score for a query: possible exact matches, then
+        trigram matches.
+
+        An exact match has exactly the query's trigrams, so those are
+        found from the postings and the trigram count. Postings (limited
+        to the category, if any) are then added rarest first while they
+        fit in MAX_CANDIDATES. The first one that doesn't fit fills the
+        remaining room through _shortest.
+        """
+        empty: Set[str] = set()
+        postings = [self._postings.get(gram, empty) for gram in query_grams]
+        if category is not None:
+            in_category = self._categories.get(category, empty)
+            postings = [keys & in_category for keys in postings]
+        postings.sort(key=len)
+
+        candidates = self._sizes.get(len(query_grams), empty) & postings[0]
+        for keys in postings[1:]:
+            candidates &= keys
+        postings = [keys for keys in postings if keys]
+        for index, keys in enumerate(postings):
+            if len(candidates) + len(keys) <= MAX_CANDIDATES:
+                candidates |= keys
+                continue
+            room = MAX_CANDIDATES - len(candidates)
+            if room > 0:
+                candidates.update(self._shortest(keys - candidates, postings[index + 1:], room))
+            break
+        return candidates
+
+    def _shortest(self, keys: Set[str], others: List[Set[str]], wanted: int) -> Set[str]:
+        """
+        About `wanted` of keys, those with the fewest trigrams first.
+
+        For the same shared trigrams, fewer trigrams means more similar.
+        Where one length has more keys than are wanted, those that also
+        have the next rarest query trigrams (others) are preferred.
+        """
+        chosen: Set[str] = set()
+        for size in sorted(self._sizes):
+            found = self._sizes[size] & keys
+            for other in others:
+                if len(found) <= wanted:
+                    break
+                found = found & other or found
+            chosen.update(islice(found, wanted))
+            wanted -= len(found)
+            if wanted <= 0:
+                break
+        return chosen
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        category: Optional[str] = None,
+    ) -> dict:
+        """
+        Find products matching a query, best first.
+
+        Args:
+            query: Free text (typos tolerated)
+            limit: Maximum number of results
+            offset: Number of ranked results to skip
+            category: Only return products in this category
+
+        Returns:
+            {
+                "total": 3,              # matches among the products scored
+                "exact_match": false,
+                "results": [{"key": "milk", "score": 1.5}, ...]
+            }
+        """
+        normalized = normalize(query)
+        if not normalized:
+            return {"total": 0, "exact_match": False, "results": []}
+
+        query_grams = trigrams(normalized)
+        word_start = f" {normalized}"
+        scored: List[Tuple[float, str, str]] = []
+        exact_match = False
+        for key in self._candidates(query_grams, category):
+            name, grams, display, product_category = self._entries[key]
+            if category is not None and product_category != category:
+                continue
+
+            common = len(query_grams & grams)
+            score = common / (len(query_grams) + len(grams) - common)
+            if name == normalized:
+                score += 1.0
+                exact_match = True
+            elif name.startswith(normalized):
+                score += 0.5
+            elif word_start in name:
+                score += 0.3
+            elif normalized in name:
+                score += 0.2
+            elif score < MIN_SIMILARITY:
+                continue
+
+            scored.append((score, display.casefold(), key))
+
+        # Top-k without sorting every candidate
+        top = heapq.nsmallest(
+            offset + limit, scored, key=lambda item: (-item[0], item[1], item[2])
+        )
+        return {
+            "total": len(scored),
+            "exact_match": exact_match,
+            "results": [
+                {"key": key, "score": round(score, 3)}
+                for score, _, key in top[offset:offset + limit]
+            ],
+        }
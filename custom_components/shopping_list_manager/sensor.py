@@ -0,0 +1,95 @@
+"""Performance diagnostic sensors for Shopping List Manager."""
+from datetime import timedelta
+from typing import Callable, NamedTuple, Optional
+
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN
+from .instrumentation import Instrumentation
+
+# Sensors poll the in-memory counters; nothing is pushed per operation
+SCAN_INTERVAL = timedelta(seconds=30)
+
+
+class _Probe(NamedTuple):
+    """One sensor: what it reads from the instrumentation."""
+
+    key: str
+    name: str
+    read: Callable[[Instrumentation], Optional[float]]
+    unit: Optional[str]
+    state_class: SensorStateClass
+
+
+def _p95(metric: str) -> Callable[[Instrumentation], Optional[float]]:
+    """Reader of a latency p95."""
+    def read(instrumentation: Instrumentation) -> Optional[float]:
+        histogram = instrumentation.latency(metric)
+        return histogram.percentile(0.95) if histogram else None
+    return read
+
+
+def _counter(metric: str) -> Callable[[Instrumentation], Optional[float]]:
+    """Reader of a counter."""
+    return lambda instrumentation: instrumentation.counter(metric)
+
+
+PROBES = (
+    _Probe("lock_wait_p95", "Lock wait p95", _p95("lock.wait"),
+           UnitOfTime.MILLISECONDS, SensorStateClass.MEASUREMENT),
+    _Probe("lock_hold_p95", "Lock hold p95", _p95("lock.hold"),
+           UnitOfTime.MILLISECONDS, SensorStateClass.MEASUREMENT),
+    _Probe("set_qty_p95", "set_qty p95", _p95("ws.set_qty"),
+           UnitOfTime.MILLISECONDS, SensorStateClass.MEASUREMENT),
+    _Probe("events_fired", "Update events fired", _counter("events.fired"),
+           None, SensorStateClass.TOTAL_INCREASING),
+    _Probe("deltas_sent", "Deltas sent", _counter("deltas.sent"),
+           None, SensorStateClass.TOTAL_INCREASING),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
+) -> None:
+    """Set up the diagnostic sensors."""
+    instrumentation = hass.data[DOMAIN]["instrumentation"]
+    async_add_entities(
+        PerformanceSensor(entry, instrumentation, probe) for probe in PROBES
+    )
+
+
+class PerformanceSensor(SensorEntity):
+    """
+    A single instrumentation value.
+
+    Disabled in the entity registry by default and unavailable while
+    instrumentation is off.
+    """
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self, entry: ConfigEntry, instrumentation: Instrumentation, probe: _Probe
+    ):
+        """Initialize the sensor."""
+        self._instrumentation = instrumentation
+        self._probe = probe
+        self._attr_unique_id = f"{entry.entry_id}_{probe.key}"
+        self._attr_name = probe.name
+        self._attr_native_unit_of_measurement = probe.unit
+        self._attr_state_class = probe.state_class
+
+    @property
+    def available(self) -> bool:
+        """Only report values while collecting."""
+        return self._instrumentation.enabled
+
+    async def async_update(self) -> None:
+        """Read the current value."""
+        self._attr_native_value = self._probe.read(self._instrumentation)
@@ -0,0 +1,218 @@
+"""Product image thumbnails for Shopping List Manager."""
+import asyncio
+import hashlib
+import io
+import ipaddress
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Set
+from urllib.parse import unquote, urlsplit
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import storage
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import (
+    STORAGE_KEY_THUMBNAILS,
+    STORAGE_VERSION,
+    THUMBNAIL_DIR,
+    THUMBNAIL_FETCH_TIMEOUT,
+    THUMBNAIL_MAX_SOURCE_BYTES,
+    THUMBNAIL_SIZE,
+    THUMBNAIL_URL_PATH,
+    THUMBNAIL_WORKERS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _read_file(path: str) -> bytes:
+    """Read a local source image (runs in the thumbnail pool)."""
+    if os.path.getsize(path) > THUMBNAIL_MAX_SOURCE_BYTES:
+        raise ValueError(f"Image too large: {path}")
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def _store_thumbnail(data: bytes, directory: str, size: int) -> str:
+    """
+    Hash, downscale and write a WebP thumbnail (runs in the thumbnail pool).
+
+    Files are named by the hash of the source bytes, so identical
+    images are rendered once. Written to a temporary file and renamed,
+    so a half-written thumbnail is never served; the temporary name is
+    unique, so workers rendering the same image don't collide.
+
+    Returns:
+        Thumbnail filename
+    """
+    filename = f"{hashlib.sha256(data).hexdigest()[:32]}.webp"
+    path = os.path.join(directory, filename)
+    if os.path.exists(path):
+        return filename
+
+    # Pillow is only needed here, in the worker thread
+    from PIL import Image  # pylint: disable=import-outside-toplevel
+
+    with Image.open(io.BytesIO(data)) as image:
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=directory, suffix=".tmp", delete=False
+        ) as file:
+            tmp_path = file.name
+            try:
+                image.save(file, "WEBP", quality=80, method=4)
+            except BaseException:
+                file.close()
+                os.unlink(tmp_path)
+                raise
+    os.replace(tmp_path, path)
+    return filename
+
+
+class ThumbnailCache:
+    """
+    Content-addressed thumbnail cache under www.
+
+    Each source image (remote URL or /local file) is fetched once,
+    downscaled in a small dedicated thread pool (so a burst of new
+    products can't starve Home Assistant's shared executor) and stored
+    as <sha256 of source bytes>.webp. Identical images share one file.
+
+    The source -> thumbnail mapping is persisted, so a source is never
+    fetched again once it has a thumbnail. Remote sources must resolve
+    to public addresses (redirects aren't followed), and no more than
+    THUMBNAIL_MAX_SOURCE_BYTES is read from any source.
+    """
+
+    def __init__(self, hass: HomeAssistant, size: int = THUMBNAIL_SIZE):
+        """Initialize the cache."""
+        self.hass = hass
+        self._size = size
+        self._dir = hass.config.path(THUMBNAIL_DIR)
+        self._store = storage.Store(hass, STORAGE_VERSION, STORAGE_KEY_THUMBNAILS)
+        self._pool = ThreadPoolExecutor(
+            max_workers=THUMBNAIL_WORKERS, thread_name_prefix="shopping_list_thumbs"
+        )
+        # source -> thumbnail URL
+        self._thumbnails: Dict[str, str] = {}
+        # source -> in-flight generation, so concurrent requests share it
+        self._pending: Dict[str, asyncio.Future] = {}
+        # Every generation task not yet finished, cancelled on shutdown
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def async_load(self) -> None:
+        """Load the source -> thumbnail mapping."""
+        data = await self._store.async_load()
+        if data:
+            self._thumbnails = dict(data["thumbnails"])
+
+    async def async_shutdown(self) -> None:
+        """Cancel pending generation, write the mapping and stop the thread pool."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        await self._store.async_save(self._data())
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _data(self) -> dict:
+        """Mapping for storage."""
+        return {"thumbnails": self._thumbnails}
+
+    @staticmethod
+    def wants_thumbnail(image: str) -> bool:
+        """True for image URLs that can be thumbnailed (not emoji, not thumbnails)."""
+        if image.startswith(THUMBNAIL_URL_PATH):
+            return False
+        return image.startswith(("http://", "https://", "/local/"))
+
+    @callback
+    def lookup(self, source: str) -> Optional[str]:
+        """Thumbnail URL of an already processed source, if any."""
+        return self._thumbnails.get(source)
+
+    async def async_get_thumbnail(self, source: str) -> Optional[str]:
+        """
+        Get (generating if needed) the thumbnail of an image.
+
+        Args:
+            source: Remote URL or /local/... path
+
+        Returns:
+            Thumbnail URL, or None if the source couldn't be processed
+        """
+        url = self._thumbnails.get(source)
+        if url is not None:
+            return url
+        pending = self._pending.get(source)
+        if pending is None:
+            pending = self.hass.async_create_task(self._async_generate(source))
+            self._pending[source] = pending
+            self._tasks.add(pending)
+            pending.add_done_callback(self._tasks.discard)
+        try:
+            return await asyncio.shield(pending)
+        finally:
+            if pending.done():
+                self._pending.pop(source, None)
+
+    async def _async_generate(self, source: str) -> Optional[str]:
+        """Fetch, hash and render one source."""
+        try:
+            data = await self._async_fetch(source)
+            filename = await self.hass.loop.run_in_executor(
+                self._pool, _store_thumbnail, data, self._dir, self._size
+            )
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("Could not create thumbnail for %s: %s", source, err)
+            return None
+
+        url = f"{THUMBNAIL_URL_PATH}/{filename}"
+        self._thumbnails[source] = url
+        self._store.async_delay_save(self._data, 10)
+        _LOGGER.debug("Thumbnail for %s: %s", source, url)
+        return url
+
+    async def _async_check_public(self, source: str) -> None:
+        """Refuse URLs whose host resolves to a private or loopback address."""
+        host = urlsplit(source).hostname
+        if not host:
+            raise ValueError(f"No host in {source}")
+        for *_, sockaddr in await self.hass.loop.getaddrinfo(host, None):
+            if not ipaddress.ip_address(sockaddr[0]).is_global:
+                raise ValueError(f"Refusing non-public address {sockaddr[0]}: {source}")
+
+    async def _async_fetch(self, source: str) -> bytes:
+        """Read source bytes from a /local path or over HTTP."""
+        if source.startswith("/local/"):
+            www = os.path.realpath(self.hass.config.path("www"))
+            # Percent-decoded like the /local static route does; the
+            # containment check below applies to the decoded path
+            relative = unquote(urlsplit(source).path[len("/local/"):])
+            path = os.path.realpath(os.path.join(www, relative))
+            if os.path.commonpath([www, path]) != www:
+                raise ValueError(f"Path outside www: {source}")
+            return await self.hass.loop.run_in_executor(self._pool, _read_file, path)
+
+        if not source.startswith(("http://", "https://")):
+            raise ValueError(f"Unsupported image source: {source}")
+        await self._async_check_public(source)
+        session = async_get_clientsession(self.hass)
+        async with asyncio.timeout(THUMBNAIL_FETCH_TIMEOUT):
+            async with session.get(source, allow_redirects=False) as response:
+                response.raise_for_status()
+                if (response.content_length or 0) > THUMBNAIL_MAX_SOURCE_BYTES:
+                    raise ValueError(f"Image too large: {source}")
+                data = bytearray()
+                async for chunk in response.content.iter_chunked(65536):
+                    data.extend(chunk)
+                    if len(data) > THUMBNAIL_MAX_SOURCE_BYTES:
+                        raise ValueError(f"Image too large: {source}")
+        return bytes(data)
@@ -0,0 +1,200 @@
+"""Streaming catalog import/export for Shopping List Manager."""
+import csv
+import io
+import json
+import os
+import tempfile
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from homeassistant.helpers.json import json_bytes
+
+from .const import FORMAT_CSV, FORMAT_JSONL, PRODUCT_FIELDS, TRANSFER_FORMATS
+from .models import Product
+
+# (valid products, "line N: reason" errors, rows read) for one chunk
+ImportChunk = Tuple[List[Product], List[str], int]
+
+
+def resolve_transfer_path(transfer_dir: str, path: str) -> str:
+    """
+    Resolve a user-supplied path inside the transfer directory.
+
+    The path is relative to transfer_dir. Symlinks are resolved first, so
+    neither `..` nor a link can reach files outside it (secrets.yaml,
+    .storage, ...).
+
+    Raises:
+        ValueError: If the path is absolute or resolves outside transfer_dir
+    """
+    if os.path.isabs(path):
+        raise ValueError(f"Path must be relative to {transfer_dir}: {path}")
+    base = os.path.realpath(transfer_dir)
+    resolved = os.path.realpath(os.path.join(base, path))
+    if resolved == base or os.path.commonpath([base, resolved]) != base:
+        raise ValueError(f"Path is outside {transfer_dir}: {path}")
+    return resolved
+
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    """
+    Resolve the file format from an explicit value or the file extension.
+
+    Raises:
+        ValueError: If the format can't be determined
+    """
+    if fmt is None:
+        extension = os.path.splitext(path)[1].lower().lstrip(".")
+        fmt = {"csv": FORMAT_CSV, "jsonl": FORMAT_JSONL, "ndjson": FORMAT_JSONL}.get(
+            extension
+        )
+    if fmt not in TRANSFER_FORMATS:
+        raise ValueError(
+            f"Unknown format for {path}, expected one of {', '.join(TRANSFER_FORMATS)}"
+        )
+    return fmt
+
+
+def _product_from_row(row: dict) -> Product:
+    """Validate one input row with Product's rules."""
+    values = {}
+    for field in PRODUCT_FIELDS:
+        value = row.get(field)
+        if value is None or value == "":
+            continue
+        if not isinstance(value, str):
+            raise ValueError(f"'{field}' must be a string")
+        values[field] = value.strip()
+    if "key" not in values or "name" not in values:
+        raise ValueError("'key' and 'name' are required")
+    return Product(**values)
+
+
+def _csv_rows(file: io.TextIOBase) -> Iterator[Tuple[int, dict]]:
+    """(line number, row) pairs of a CSV file with a header row."""
+    reader = csv.DictReader(file)
+    if reader.fieldnames is None or not {"key", "name"} <= set(reader.fieldnames):
+        raise ValueError("CSV header must include 'key' and 'name' columns")
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _jsonl_rows(file: io.TextIOBase) -> Iterator[Tuple[int, dict]]:
+    """(line number, object) pairs of a JSON-lines file; bad lines yield None."""
+    for line_num, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_num, row if isinstance(row, dict) else None
+
+
+def iter_import_chunks(path: str, fmt: str, chunk_size: int) -> Iterator[ImportChunk]:
+    """
+    Read and validate a catalog file one chunk at a time.
+
+    A generator: each next() reads only the next chunk_size rows, so
+    it can be advanced from the executor and memory use does not
+    grow with the file. Invalid rows are reported, not raised.
+
+    Raises:
+        OSError: If the file can't be read
+        ValueError: If a CSV file has no usable header
+    """
+    rows_of = _csv_rows if fmt == FORMAT_CSV else _jsonl_rows
+    with open(path, encoding="utf-8-sig", newline="") as file:
+        products: List[Product] = []
+        errors: List[str] = []
+        rows = 0
+        for line_num, row in rows_of(file):
+            rows += 1
+            if row is None:
+                errors.append(f"line {line_num}: not a JSON object")
+            else:
+                try:
+                    products.append(_product_from_row(row))
+                except (TypeError, ValueError) as err:
+                    errors.append(f"line {line_num}: {err}")
+            if rows == chunk_size:
+                yield products, errors, rows
+                products, errors, rows = [], [], 0
+        if rows:
+            yield products, errors, rows
+
+
+def iter_export(products: Iterable[Product], fmt: str, chunk_size: int) -> Iterator[bytes]:
+    """
+    Encode products as CSV (with header) or JSON lines, one chunk at a time.
+
+    Args:
+        products: Products to export (an immutable snapshot's values)
+        fmt: FORMAT_CSV or FORMAT_JSONL
+        chunk_size: Products per yielded chunk
+
+    Yields:
+        UTF-8 encoded chunks
+    """
+    if fmt == FORMAT_CSV:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(PRODUCT_FIELDS)
+        count = 0
+        for product in products:
+            writer.writerow([getattr(product, field) for field in PRODUCT_FIELDS])
+            count += 1
+            if count == chunk_size:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+                count = 0
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+        return
+
+    chunk: List[bytes] = []
+    for product in products:
+        chunk.append(json_bytes(product))
+        if len(chunk) == chunk_size:
+            chunk.append(b"")
+            yield b"\n".join(chunk)
+            chunk = []
+    if chunk:
+        chunk.append(b"")
+        yield b"\n".join(chunk)
+
+
+def write_export(
+    path: str, products: Iterable[Product], fmt: str, chunk_size: int
+) -> int:
+    """
+    Stream an export to a file (runs in the executor).
+
+    Written to a uniquely named temporary file next to it and renamed,
+    so a failed export never leaves a truncated file behind, and two
+    exports to the same path don't share a temporary file.
+
+    Returns:
+        Number of bytes written
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    size = 0
+    with tempfile.NamedTemporaryFile(
+        dir=directory, suffix=".tmp", delete=False
+    ) as file:
+        tmp_path = file.name
+        try:
+            for chunk in iter_export(products, fmt, chunk_size):
+                file.write(chunk)
+                size += len(chunk)
+        except BaseException:
+            file.close()
+            os.unlink(tmp_path)
+            raise
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return size
@@ -0,0 +1,86 @@
+"""Incrementally maintained sorted views of the catalog."""
+import bisect
+from typing import Dict, Iterable, Iterator, List
+
+from .const import CATEGORY_ORDER, SORT_CATEGORY
+from .models import Product
+
+
+def sort_key(product: Product, sort: str) -> tuple:
+    """Stable, unique sort key for a product (key breaks ties)."""
+    if sort == SORT_CATEGORY:
+        return (
+            CATEGORY_ORDER.get(product.category, CATEGORY_ORDER["other"]),
+            product.name.casefold(),
+            product.key,
+        )
+    return (product.name.casefold(), product.key)
+
+
+def category_group(product: Product) -> str:
+    """Category section a product is shown in (unknown categories go to other)."""
+    return product.category if product.category in CATEGORY_ORDER else "other"
+
+
+class SortedIndex:
+    """
+    Catalog order for one sort, kept sorted as products change.
+
+    Sort keys live in a sorted list: a change is located with bisect
+    in O(log n) and inserted or removed in place, so the catalog is
+    sorted once at load and never again. A product key -> sort key map
+    finds a product's old position when it is renamed or deleted.
+
+    Only the writer (on commit) mutates the index, synchronously on
+    the event loop, so lock-free readers never see it half-updated.
+    """
+
+    __slots__ = ("sort", "_order", "_keys")
+
+    def __init__(self, sort: str):
+        """Initialize an empty index."""
+        self.sort = sort
+        self._order: List[tuple] = []
+        self._keys: Dict[str, tuple] = {}
+
+    def __len__(self) -> int:
+        """Number of indexed products."""
+        return len(self._order)
+
+    def __getitem__(self, index: int) -> tuple:
+        """Sort key at a position (the product key is its last element)."""
+        return self._order[index]
+
+    def build(self, products: Iterable[Product]) -> None:
+        """Index a whole catalog at once (one sort)."""
+        self._keys = {product.key: sort_key(product, self.sort) for product in products}
+        self._order = sorted(self._keys.values())
+
+    def upsert(self, product: Product) -> None:
+        """Add a product or move it to its new position."""
+        new = sort_key(product, self.sort)
+        old = self._keys.get(product.key)
+        if old == new:
+            return
+        if old is not None:
+            del self._order[bisect.bisect_left(self._order, old)]
+        bisect.insort(self._order, new)
+        self._keys[product.key] = new
+
+    def discard(self, key: str) -> None:
+        """Remove a product if indexed."""
+        old = self._keys.pop(key, None)
+        if old is not None:
+            del self._order[bisect.bisect_left(self._order, old)]
+
+    def bisect_right(self, position: tuple) -> int:
+        """Index of the first sort key after a position."""
+        return bisect.bisect_right(self._order, position)
+
+    def position(self, key: str) -> tuple:
+        """Sort key of an indexed product."""
+        return self._keys[key]
+
+    def keys(self) -> Iterator[str]:
+        """Product keys in order."""
+        return (position[-1] for position in self._order)
@@ -1,25 +1,260 @@
 """WebSocket API for Shopping List Manager."""
+import asyncio
+import functools
+import inspect
 import logging
+import time
+from typing import Callable, Dict, List
+
 import voluptuous as vol
 
 from homeassistant.components import websocket_api
+from homeassistant.components.websocket_api.messages import construct_result_message
 from homeassistant.core import HomeAssistant, callback
 
-from .const import DOMAIN
-from .models import InvariantError
+from .const import (
+    BATCH_MAX_OPS,
+    DEFAULT_LIST_ID,
+    DEFAULT_PAGE_SIZE,
+    DOMAIN,
+    FORMAT_JSONL,
+    LIST_ID_PATTERN,
+    MAX_PAGE_SIZE,
+    OP_ADD_PRODUCT,
+    OP_ADJUST_QTY,
+    OP_DELETE_PRODUCT,
+    OP_ID_MAX_LENGTH,
+    OP_SET_QTY,
+    PRODUCT_FIELDS,
+    RESOLVE_IMAGE_MAX_NAMES,
+    SORT_CATEGORY,
+    SORT_NAME,
+    TRANSFER_CHUNK_SIZE,
+    TRANSFER_FORMATS,
+    WS_MAX_IN_FLIGHT,
+    WS_RATE_BURST,
+    WS_RATE_LIMIT,
+)
+from .instrumentation import timed_command
+from .models import InvariantError, RevisionConflictError
+from .transfer import iter_export
 
 _LOGGER = logging.getLogger(__name__)
 
+# Every command defined below, in registration order
+_COMMANDS: List[Callable] = []
+
+# Client-generated id that makes a mutation safe to resend
+_OP_ID = vol.All(str, vol.Length(min=1, max=OP_ID_MAX_LENGTH))
+
+# Ops accepted by batch and replay
+_OPS = (
+    {
+        vol.Required("op"): OP_ADD_PRODUCT,
+        vol.Required("key"): str,
+        vol.Required("name"): str,
+        vol.Optional("category", default="other"): str,
+        vol.Optional("unit", default="pcs"): str,
+        vol.Optional("image", default=""): str,
+    },
+    {
+        vol.Required("op"): OP_SET_QTY,
+        vol.Required("key"): str,
+        vol.Required("qty"): vol.All(int, vol.Range(min=0)),
+        vol.Optional("list_id", default=DEFAULT_LIST_ID): vol.Match(LIST_ID_PATTERN),
+    },
+    {
+        vol.Required("op"): OP_ADJUST_QTY,
+        vol.Required("key"): str,
+        vol.Required("delta"): int,
+        vol.Optional("list_id", default=DEFAULT_LIST_ID): vol.Match(LIST_ID_PATTERN),
+    },
+    {
+        vol.Required("op"): OP_DELETE_PRODUCT,
+        vol.Required("key"): str,
+    },
+)
+
+
+class _TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens/s up to `burst`."""
+
+    __slots__ = ("rate", "burst", "_tokens", "_updated")
+
+    def __init__(self, rate: float, burst: float):
+        """Initialize a full bucket."""
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+
+    def take(self, cost: float) -> float:
+        """
+        Take tokens for one request.
+
+        Returns:
+            0 if the tokens were taken, otherwise the seconds until
+            enough have been refilled (nothing is taken)
+        """
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= cost:
+            self._tokens -= cost
+            return 0.0
+        return (cost - self._tokens) / self.rate
+
+
+class _Client:
+    """Admission state of one WebSocket connection."""
+
+    __slots__ = ("bucket", "in_flight")
+
+    def __init__(self):
+        """Initialize with a full bucket and nothing running."""
+        self.bucket = _TokenBucket(WS_RATE_LIMIT, WS_RATE_BURST)
+        self.in_flight = 0
+
+
+# Keyed by id() of the connection; removed when the connection closes
+_CLIENTS: Dict[int, _Client] = {}
+
+
+def _client(connection: websocket_api.ActiveConnection) -> _Client:
+    """Admission state of a connection, created on its first command."""
+    client = _CLIENTS.get(id(connection))
+    if client is None:
+        client = _CLIENTS[id(connection)] = _Client()
+
+        @callback
+        def forget() -> None:
+            _CLIENTS.pop(id(connection), None)
+
+        # Subscriptions are all called when the connection closes
+        connection.subscriptions[f"{DOMAIN}_client"] = forget
+    return client
+
+
+def _count(hass: HomeAssistant, metric: str) -> None:
+    """Increment an instrumentation counter if instrumentation is on."""
+    instrumentation = hass.data.get(DOMAIN, {}).get("instrumentation")
+    if instrumentation is not None and instrumentation.enabled:
+        instrumentation.count(metric)
+
 
-@websocket_api.websocket_command({
-    vol.Required("type"): "shopping_list_manager/add_product",
+def _send_error(
+    connection: websocket_api.ActiveConnection, msg: dict, name: str, err: Exception
+) -> None:
+    """Map a handler exception to a WebSocket error reply."""
+    if isinstance(err, InvariantError):
+        # Expected if a client acts on a product that no longer exists
+        _LOGGER.warning("Invariant violation in %s: %s", name, err)
+        connection.send_error(msg["id"], "invariant_violation", str(err))
+    elif isinstance(err, ValueError):
+        connection.send_error(msg["id"], "invalid_request", str(err))
+    else:
+        _LOGGER.error("Error in %s: %s", name, err)
+        connection.send_error(msg["id"], f"{name}_failed", str(err))
+
+
+def _command(name: str, schema: dict, cost: float = 1.0, timed: bool = True) -> Callable:
+    """
+    Define a shopping_list_manager/<name> command.
+
+    Wraps the handler with the middleware every command shares, in
+    this order:
+      1. Rate limit: each connection has a token bucket (WS_RATE_LIMIT
+         tokens/s, up to WS_RATE_BURST); the command costs `cost`
+         tokens. A request over the limit gets a `rate_limited` error.
+      2. Backpressure: a connection may have at most WS_MAX_IN_FLIGHT
+         async commands running; more get a `busy` error instead of
+         queueing on the manager lock.
+      3. Timing: latency and reply sizes under `ws.<name>` while
+         instrumentation is on (unless `timed` is False).
+      4. Error mapping: see _send_error.
+
+    Admission runs synchronously when the message arrives, before an
+    async handler is scheduled, so a burst can't slip past the limits.
+
+    Args:
+        name: Command name, without the domain prefix
+        schema: Message schema, without "type"
+        cost: Tokens taken per request (heavier commands cost more)
+        timed: Whether to record instrumentation timings
+    """
+    def decorator(handler: Callable) -> Callable:
+        run = timed_command(name)(handler) if timed else handler
+        is_async = inspect.iscoroutinefunction(handler)
+
+        if is_async:
+            @websocket_api.async_response
+            @functools.wraps(handler)
+            async def scheduled(hass, connection, msg):
+                try:
+                    await run(hass, connection, msg)
+                except Exception as err:  # pylint: disable=broad-except
+                    _send_error(connection, msg, name, err)
+                finally:
+                    client = _CLIENTS.get(id(connection))
+                    if client is not None:  # Gone if the connection closed
+                        client.in_flight -= 1
+
+        @callback
+        @functools.wraps(handler)
+        def dispatch(hass, connection, msg):
+            client = _client(connection)
+            wait = client.bucket.take(cost)
+            if wait:
+                _count(hass, "ws.rate_limited")
+                connection.send_error(
+                    msg["id"], "rate_limited", f"Too many requests, retry in {wait:.2f} s"
+                )
+                return
+            if not is_async:
+                try:
+                    run(hass, connection, msg)
+                except Exception as err:  # pylint: disable=broad-except
+                    _send_error(connection, msg, name, err)
+                return
+            if client.in_flight >= WS_MAX_IN_FLIGHT:
+                _count(hass, "ws.busy")
+                connection.send_error(
+                    msg["id"],
+                    "busy",
+                    f"{client.in_flight} requests already in progress, retry later",
+                )
+                return
+            client.in_flight += 1
+            scheduled(hass, connection, msg)
+
+        command = websocket_api.websocket_command({
+            vol.Required("type"): f"{DOMAIN}/{name}",
+            **schema,
+        })(dispatch)
+        _COMMANDS.append(command)
+        return command
+
+    return decorator
+
+
+@callback
+def async_register_commands(hass: HomeAssistant) -> None:
+    """Register all WebSocket commands."""
+    for command in _COMMANDS:
+        websocket_api.async_register_command(hass, command)
+    _LOGGER.info(
+        "Registered %d WebSocket commands for Shopping List Manager", len(_COMMANDS)
+    )
+
+
+@_command("add_product", {
     vol.Required("key"): str,
     vol.Required("name"): str,
     vol.Optional("category", default="other"): str,
     vol.Optional("unit", default="pcs"): str,
     vol.Optional("image", default=""): str,
+    vol.Optional("op_id"): _OP_ID,
 })
-@websocket_api.async_response
 async def websocket_add_product(
     hass: HomeAssistant,
     connection: websocket_api.ActiveConnection,
@@ -27,9 +262,9 @@ async def websocket_add_product(
 ) -> None:
     """
     Add or update a product in the catalog.
-    
+
     Does NOT modify quantity - use set_qty for that.
-    
+
     Request:
         {
             "type": "shopping_list_manager/add_product",
@@ -37,9 +272,10 @@ async def websocket_add_product(
             "name": "Milk",
             "category": "dairy",
             "unit": "pcs",
-            "image": ""
+            "image": "",
+            "op_id": "3f2a..."    (optional, see replay)
         }
-    
+
     Response:
         {
             "success": true,
@@ -53,53 +289,49 @@ async def websocket_add_product(
         }
     """
     manager = hass.data[DOMAIN]["manager"]
-    
-    try:
-        product = await manager.async_add_product(
-            key=msg["key"],
-            name=msg["name"],
-            category=msg.get("category", "other"),
-            unit=msg.get("unit", "pcs"),
-            image=msg.get("image", "")
-        )
-        
-        connection.send_result(msg["id"], product.to_dict())
-        
-    except Exception as err:
-        _LOGGER.error("Error adding product: %s", err)
-        connection.send_error(msg["id"], "add_product_failed", str(err))
+    product = await manager.async_add_product(
+        key=msg["key"],
+        name=msg["name"],
+        category=msg["category"],
+        unit=msg["unit"],
+        image=msg["image"],
+        op_id=msg.get("op_id"),
+    )
+    connection.send_result(msg["id"], product.to_dict())
 
 
-@websocket_api.websocket_command({
-    vol.Required("type"): "shopping_list_manager/set_qty",
+@_command("set_qty", {
     vol.Required("key"): str,
     vol.Required("qty"): vol.All(int, vol.Range(min=0)),
+    vol.Optional("list_id", default=DEFAULT_LIST_ID): vol.Match(LIST_ID_PATTERN),
+    vol.Optional("op_id"): _OP_ID,
 })
-@websocket_api.async_response
 async def websocket_set_qty(
     hass: HomeAssistant,
     connection: websocket_api.ActiveConnection,
     msg: dict,
 ) -> None:
     """
-    Set quantity for a product on the shopping list.
-    
+    Set quantity for a product on a shopping list.
+
     Product MUST exist in catalog first.
     qty = 0 removes from list.
     qty > 0 adds/updates on list.
-    
+
     Request:
         {
             "type": "shopping_list_manager/set_qty",
             "key": "milk",
-            "qty": 2
+            "qty": 2,
+            "list_id": "groceries",
+            "op_id": "3f2a..."    (optional, see replay)
         }
-    
+
     Response:
         {
             "success": true
         }
-    
+
     Error (if product doesn't exist):
         {
             "success": false,
@@ -110,42 +342,77 @@ async def websocket_set_qty(
         }
     """
     manager = hass.data[DOMAIN]["manager"]
-    
+    await manager.async_set_qty(
+        key=msg["key"], qty=msg["qty"], list_id=msg["list_id"], op_id=msg.get("op_id")
+    )
+    connection.send_result(msg["id"], {"success": True})
+
+
+@_command("adjust_qty", {
+    vol.Required("key"): str,
+    vol.Required("delta"): int,
+    vol.Optional("list_id", default=DEFAULT_LIST_ID): vol.Match(LIST_ID_PATTERN),
+    vol.Optional("expected_revision"): vol.All(int, vol.Range(min=0)),
+    vol.Optional("op_id"): _OP_ID,
+})
+async def websocket_adjust_qty(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict,
+) -> None:
+    """
+    Change a quantity by a delta and return the result.
+
+    Replies {"applied": true, "qty": ..., "revision": ...}. A
+    compare-and-set that lost (expected_revision given and the item
+    changed since) replies {"applied": false} with the current qty
+    and revision instead of an error, so the client can reconcile
+    or retry without refetching.
+    """
+    manager = hass.data[DOMAIN]["manager"]
     try:
-        await manager.async_set_qty(
+        result = await manager.async_adjust_qty(
             key=msg["key"],
-            qty=msg["qty"]
+            delta=msg["delta"],
+            list_id=msg["list_id"],
+            expected_revision=msg.get("expected_revision"),
+            op_id=msg.get("op_id"),
         )
-        
-        connection.send_result(msg["id"], {"success": True})
-        
-    except InvariantError as err:
-        # This is expected if frontend tries to set qty for non-existent product
-        _LOGGER.warning("Invariant violation in set_qty: %s", err)
-        connection.send_error(msg["id"], "invariant_violation", str(err))
-        
-    except Exception as err:
-        _LOGGER.error("Error setting quantity: %s", err)
-        connection.send_error(msg["id"], "set_qty_failed", str(err))
+    except RevisionConflictError as err:
+        _LOGGER.debug("Rejected adjust_qty: %s", err)
+        connection.send_result(msg["id"], {
+            "applied": False,
+            "key": msg["key"],
+            "list_id": msg["list_id"],
+            "qty": err.qty,
+            "revision": err.revision,
+        })
+        return
+    connection.send_result(msg["id"], {"applied": True, **result})
 
 
-@websocket_api.websocket_command({
-    vol.Required("type"): "shopping_list_manager/get_products",
+@_command("get_products", {
+    vol.Optional("since_revision"): vol.All(int, vol.Range(min=0)),
+    # Pagination / projection (any of these returns a page)
+    vol.Optional("limit"): vol.All(int, vol.Range(min=1, max=MAX_PAGE_SIZE)),
+    vol.Optional("cursor"): str,
+    vol.Optional("sort"): vol.In([SORT_NAME, SORT_CATEGORY]),
+    vol.Optional("category"): str,
+    vol.Optional("fields"): [vol.In(PRODUCT_FIELDS)],
 })
-@websocket_api.async_response
 async def websocket_get_products(
     hass: HomeAssistant,
     connection: websocket_api.ActiveConnection,
     msg: dict,
 ) -> None:
     """
-    Get all products in the catalog.
-    
+    Get the products in the catalog.
+
     Request:
         {
             "type": "shopping_list_manager/get_products"
         }
-    
+
     Response:
         {
             "milk": {
@@ -157,35 +424,52 @@ async def websocket_get_products(
             },
             ...
         }
+
+    With since_revision, only what changed since then (or a full
+    snapshot if the changelog no longer covers it). With any of
+    limit/cursor/sort/category/fields, one page of the catalog.
     """
     manager = hass.data[DOMAIN]["manager"]
-    
-    try:
-        products = await manager.async_get_products()
-        connection.send_result(msg["id"], products)
-        
-    except Exception as err:
-        _LOGGER.error("Error getting products: %s", err)
-        connection.send_error(msg["id"], "get_products_failed", str(err))
+    if "since_revision" not in msg and any(
+        param in msg for param in ("limit", "cursor", "sort", "category", "fields")
+    ):
+        page = manager.get_products_page(
+            limit=msg.get("limit", DEFAULT_PAGE_SIZE),
+            cursor=msg.get("cursor"),
+            sort=msg.get("sort", SORT_NAME),
+            category=msg.get("category"),
+            fields=msg.get("fields"),
+        )
+        connection.send_result(msg["id"], page)
+        return
+    if "since_revision" not in msg:
+        # Full catalog: send the cached, already-encoded JSON
+        connection.send_message(construct_result_message(
+            msg["id"], manager.get_products_json()
+        ))
+        return
+    products = await manager.async_get_products(since_revision=msg["since_revision"])
+    connection.send_result(msg["id"], products)
 
 
-@websocket_api.websocket_command({
-    vol.Required("type"): "shopping_list_manager/get_active",
+@_command("get_active", {
+    vol.Optional("since_revision"): vol.All(int, vol.Range(min=0)),
+    vol.Optional("list_id", default=DEFAULT_LIST_ID): vol.Match(LIST_ID_PATTERN),
 })
-@websocket_api.async_response
 async def websocket_get_active(
     hass: HomeAssistant,
     connection: websocket_api.ActiveConnection,
     msg: dict,
 ) -> None:
     """
-    Get active shopping list (quantities only).
-    
+    Get a shopping list (quantities only).
+
     Request:
         {
-            "type": "shopping_list_manager/get_active"
+            "type": "shopping_list_manager/get_active",
+            "list_id": "groceries"
         }
-    
+
     Response:
         {
             "milk": {"qty": 2},
@@ -194,46 +478,307 @@ async def websocket_get_active(
         }
     """
     manager = hass.data[DOMAIN]["manager"]
-    
-    try:
-        active = await manager.async_get_active()
-        connection.send_result(msg["id"], active)
-        
-    except Exception as err:
-        _LOGGER.error("Error getting active list: %s", err)
-        connection.send_error(msg["id"], "get_active_failed", str(err))
+    if "since_revision" not in msg:
+        # Full list: send the cached, already-encoded JSON
+        connection.send_message(construct_result_message(
+            msg["id"], manager.get_active_json(msg["list_id"])
+        ))
+        return
+    active = await manager.async_get_active(
+        since_revision=msg["since_revision"], list_id=msg["list_id"]
+    )
+    connection.send_result(msg["id"], active)
 
 
-@websocket_api.websocket_command({
-    vol.Required("type"): "shopping_list_manager/delete_product",
+@_command("get_view", {
+    vol.Optional("list_id", default=DEFAULT_LIST_ID): vol.Match(LIST_ID_PATTERN),
+    vol.Optional("sort", default=SORT_CATEGORY): vol.In([SORT_NAME, SORT_CATEGORY]),
+    vol.Optional("category"): str,
+    vol.Optional("fields"): [vol.In(PRODUCT_FIELDS)],
+    vol.Optional("split", default=True): bool,
+})
+def websocket_get_view(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict,
+) -> None:
+    """Get the catalog ordered and grouped into active/inactive sections."""
+    manager = hass.data[DOMAIN]["manager"]
+    connection.send_message(construct_result_message(
+        msg["id"],
+        manager.get_view_json(
+            list_id=msg["list_id"],
+            sort=msg["sort"],
+            category=msg.get("category"),
+            fields=msg.get("fields"),
+            split=msg["split"],
+        ),
+    ))
+
+
+@_command("get_lists", {})
+def websocket_get_lists(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict,
+) -> None:
+    """Get all lists with their number of active items."""
+    manager = hass.data[DOMAIN]["manager"]
+    connection.send_result(msg["id"], {"lists": manager.get_lists()})
+
+
+@_command("delete_product", {
     vol.Required("key"): str,
+    vol.Optional("op_id"): _OP_ID,
 })
-@websocket_api.async_response
 async def websocket_delete_product(
     hass: HomeAssistant,
     connection: websocket_api.ActiveConnection,
     msg: dict,
 ) -> None:
     """
-    Delete a product from catalog (and remove from active list).
-    
+    Delete a product from catalog (and remove it from every list).
+
     Request:
         {
             "type": "shopping_list_manager/delete_product",
-            "key": "milk"
+            "key": "milk",
+            "op_id": "3f2a..."    (optional, see replay)
         }
-    
+
     Response:
         {
             "success": true
         }
     """
     manager = hass.data[DOMAIN]["manager"]
-    
-    try:
-        await manager.async_delete_product(key=msg["key"])
-        connection.send_result(msg["id"], {"success": True})
-        
-    except Exception as err:
-        _LOGGER.error("Error deleting product: %s", err)
-        connection.send_error(msg["id"], "delete_product_failed", str(err))
+    await manager.async_delete_product(key=msg["key"], op_id=msg.get("op_id"))
+    connection.send_result(msg["id"], {"success": True})
+
+
+@_command("batch", {
+    vol.Required("ops"): vol.All(
+        [vol.Any(*_OPS)], vol.Length(min=1, max=BATCH_MAX_OPS)
+    ),
+    vol.Optional("op_id"): _OP_ID,
+}, cost=5)
+async def websocket_batch(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict,
+) -> None:
+    """Apply several mutations atomically with one save and one event."""
+    manager = hass.data[DOMAIN]["manager"]
+    connection.send_result(
+        msg["id"], await manager.async_apply_batch(msg["ops"], op_id=msg.get("op_id"))
+    )
+
+
+@_command("replay", {
+    vol.Required("ops"): vol.All(
+        [vol.Any(*({**op, vol.Required("op_id"): _OP_ID} for op in _OPS))],
+        vol.Length(min=1, max=BATCH_MAX_OPS),
+    ),
+}, cost=5)
+async def websocket_replay(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict,
+) -> None:
+    """
+    Apply the mutations a client queued while offline, in one round trip.
+
+    Every op carries the op_id the client generated for it. Ops that
+    were already applied (e.g. sent just before the connection
+    dropped) aren't applied again. Each op succeeds or fails on its
+    own, and everything applied is committed once.
+
+    Request:
+        {
+            "type": "shopping_list_manager/replay",
+            "ops": [
+                {"op": "adjust_qty", "key": "milk", "delta": 1, "op_id": "a1"},
+                {"op": "set_qty", "key": "eggs", "qty": 0, "op_id": "a2"}
+            ]
+        }
+
+    Response:
+        {
+            "revision": 43,
+            "results": [
+                {"op_id": "a1", "op": "adjust_qty", "key": "milk",
+                 "status": "applied", "result": {"qty": 3}},
+                {"op_id": "a2", "op": "set_qty", "key": "eggs",
+                 "status": "duplicate", "result": {"qty": 0}}
+            ]
+        }
+
+    status is "applied", "duplicate" (result is the op's first result)
+    or "failed" (with an "error" code and message).
+    """
+    manager = hass.data[DOMAIN]["manager"]
+    connection.send_result(msg["id"], await manager.async_replay(msg["ops"]))
+
+
+@_command("undo", {})
+async def websocket_undo(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict,
+) -> None:
+    """Revert the most recent mutation (applied: false if there is none)."""
+    manager = hass.data[DOMAIN]["manager"]
+    connection.send_result(msg["id"], await manager.async_undo())
+
+
+@_command("redo", {})
+async def websocket_redo(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict,
+) -> None:
+    """Re-apply the most recently undone mutation."""
+    manager = hass.data[DOMAIN]["manager"]
+    connection.send_result(msg["id"], await manager.async_redo())
+
+
+@_command("search", {
+    vol.Required("query"): str,
+    vol.Optional("limit", default=20): vol.All(int, vol.Range(min=1, max=500)),
+    vol.Optional("offset", default=0): vol.All(int, vol.Range(min=0)),
+    vol.Optional("category"): str,
+})
+def websocket_search(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict,
+) -> None:
+    """Search products by name."""
+    manager = hass.data[DOMAIN]["manager"]
+    result = manager.search_products(
+        query=msg["query"],
+        limit=msg["limit"],
+        offset=msg["offset"],
+        category=msg.get("category"),
+    )
+    connection.send_result(msg["id"], result)
+
+
+@_command("resolve_image", {
+    vol.Exclusive("name", "names"): str,
+    vol.Exclusive("names", "names"): vol.All(
+        [str], vol.Length(max=RESOLVE_IMAGE_MAX_NAMES)
+    ),
+})
+def websocket_resolve_image(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict,
+) -> None:
+    """Find the best local image for one or more product names."""
+    image_index = hass.data[DOMAIN]["image_index"]
+    if "name" in msg:
+        connection.send_result(msg["id"], {"image": image_index.resolve(msg["name"])})
+    elif "names" in msg:
+        connection.send_result(msg["id"], {
+            "images": {name: image_index.resolve(name) for name in msg["names"]}
+        })
+    else:
+        raise ValueError("Either name or names is required")
+
+
+@_command("instrumentation", {
+    vol.Optional("enabled"): bool,
+    vol.Optional("reset", default=False): bool,
+}, timed=False)
+def websocket_instrumentation(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict,
+) -> None:
+    """Turn performance instrumentation on/off and read what it collected."""
+    instrumentation = hass.data[DOMAIN]["instrumentation"]
+    if msg["reset"]:
+        instrumentation.reset()
+    if msg.get("enabled") is True:
+        instrumentation.enable()
+    elif msg.get("enabled") is False:
+        instrumentation.disable()
+    connection.send_result(msg["id"], instrumentation.snapshot())
+
+
+@_command("subscribe", {
+    vol.Optional("list_id", default=DEFAULT_LIST_ID): vol.Match(LIST_ID_PATTERN),
+})
+def websocket_subscribe(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict,
+) -> None:
+    """Subscribe to a snapshot followed by revisioned deltas."""
+    manager = hass.data[DOMAIN]["manager"]
+
+    @callback
+    def forward_delta(delta):
+        connection.send_message(websocket_api.event_message(
+            msg["id"], {"type": "delta", **delta}
+        ))
+
+    # Subscribe and snapshot in the same synchronous step so no
+    # delta can be missed or duplicated between them
+    connection.subscriptions[msg["id"]] = manager.async_subscribe(
+        forward_delta, list_id=msg["list_id"]
+    )
+    connection.send_result(msg["id"])
+
+    # Snapshot built from the cached, already-encoded state
+    connection.send_message(b"".join((
+        b'{"id":',
+        str(msg["id"]).encode(),
+        b',"type":"event","event":{"type":"snapshot","list_id":"',
+        msg["list_id"].encode(),
+        b'","revision":',
+        str(manager.revision).encode(),
+        b',',
+        manager.get_full_state_json(msg["list_id"])[1:],
+        b"}",
+    )))
+
+
+@_command("export", {
+    vol.Optional("format", default=FORMAT_JSONL): vol.In(TRANSFER_FORMATS),
+}, cost=20)
+async def websocket_export(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict,
+) -> None:
+    """Stream the catalog as CSV or JSON lines, one chunk per event."""
+    manager = hass.data[DOMAIN]["manager"]
+    state = manager.state
+    cancelled = False
+
+    @callback
+    def cancel():
+        nonlocal cancelled
+        cancelled = True
+
+    connection.subscriptions[msg["id"]] = cancel
+    connection.send_result(msg["id"], {
+        "format": msg["format"],
+        "products": len(state.products),
+        "revision": state.revision,
+    })
+
+    # The snapshot is immutable: chunks stay consistent even if the
+    # catalog changes while streaming. Yield between chunks so a
+    # large export doesn't hold the event loop.
+    for chunk in iter_export(state.products.values(), msg["format"], TRANSFER_CHUNK_SIZE):
+        if cancelled:
+            return
+        connection.send_message(websocket_api.event_message(
+            msg["id"], {"data": chunk.decode()}
+        ))
+        await asyncio.sleep(0)
+    connection.send_message(websocket_api.event_message(msg["id"], {"done": True}))
+    connection.subscriptions.pop(msg["id"], None)
@@ -23,6 +23,28 @@ const CATEGORIES = [
   { id: "other", emoji: "📦", name: "Other", order: 99 }
 ];
 
+// Catalogs larger than this are searched server-side (shopping_list_manager/search)
+const SERVER_SEARCH_THRESHOLD = 500;
+const SERVER_SEARCH_LIMIT = 200;
+
+// "Recently Used" is rendered in chunks of this many rows; only chunks
+// within VIRTUAL_MARGIN_PX of the viewport hold tiles
+const VIRTUAL_CHUNK_ROWS = 4;
+const VIRTUAL_MARGIN_PX = 800;
+
+// Errors the server sends when this connection is sending too much; the
+// change is reverted without an alert (the user can simply tap again)
+const THROTTLED_ERRORS = ['busy', 'rate_limited'];
+
+// Reads rejected as throttled are retried with exponential backoff (with
+// jitter): the cards on a dashboard share one connection, and its limits
+const THROTTLE_RETRIES = 6;
+const THROTTLE_BACKOFF_MS = 250;
+const THROTTLE_BACKOFF_MAX_MS = 8000;
+
+// Most ops sent in one shopping_list_manager/replay (the server's batch limit)
+const REPLAY_MAX_OPS = 500;
+
 // Create category lookup map
 const CATEGORY_MAP = CATEGORIES.reduce((map, cat) => {
   map[cat.id] = cat;
@@ -41,12 +63,37 @@ class ShoppingListCard extends HTMLElement {
     this._activeList = {};
     this._searchQuery = '';
     this._pollInterval = null;
+    this._unsubscribe = null;  // Push subscription (replaces polling when available)
+    this._subscribing = false;
+    this._subscribeTimer = null;
+    this._revision = null;     // Last revision applied from the server
+    this._listId = 'groceries'; // Server-side list this card shows (config: list_id)
     this._isLoading = true;
     this._sortBy = 'category'; // 'category' or 'alphabet'
     this._selectedCategory = null; // null = show all
     this._searchDebounceTimer = null;
+    this._serverSearch = null;  // { query, keys: [...], exactMatch } from the last server search
+    this._viewOrder = null;     // Product keys in server display order (get_view), null = sort locally
+    this._viewSort = null;      // Sort the view order was fetched for ('category' or 'name')
+    this._viewTimer = null;
+    this._viewSupported = true; // Cleared when the backend has no get_view
+    this._tiles = new Map();    // Product key -> { el, name, image, qty } of its rendered tile
+    this._sections = new Map(); // Section id -> { el, header, container, chunks } (keyed DOM)
+    this._blocks = {};          // Keyed fixed-markup blocks (section titles, empty state)
+    this._chunkData = new Map(); // Virtual chunk element -> { products, size, height }
+    this._visibleChunks = new Set(); // Chunks in or near the viewport (the ones holding tiles)
+    this._chunkObserver = null;
+    this._chunkColumns = 1;
+    this._contentWidth = 0;
+    this._renderPass = 0;
+    this._catalogVersion = 0;  // Bumped whenever _products changes
+    this._filteredCache = null;
+    this._adjustSupported = true; // Cleared when the backend has no adjust_qty
+    this._pendingAdjusts = {};  // Product key -> adjust_qty requests in flight
+    this._offlineQueue = [];    // Mutations whose reply was lost with the connection
+    this._replaying = false;
+    this._opIdSupported = true; // Cleared when the backend rejects op_id
     this._localImageCache = {}; // Cache for local image lookups
-    this._imageListCache = null;  // Cached directory listing from /local/images/shopping_list_manager/
     this._cardSize = 'small'; // 'small' or 'large' - detected from card width
     
     // Settings (load from localStorage or defaults)
@@ -114,10 +161,16 @@ class ShoppingListCard extends HTMLElement {
     const oldHass = this._hass;
     this._hass = hass;
     
-    // Load data when hass is first set
+    // Subscribe to pushed updates when hass is first set
     if (!oldHass && hass) {
-      this._loadData();
-      this._startPolling();
+      this._subscribe();
+    }
+  }
+
+  connectedCallback() {
+    // Re-subscribe if the card was detached and re-attached (view switch)
+    if (this._hass && !this._unsubscribe && !this._subscribing && !this._pollInterval) {
+      this._subscribe();
     }
   }
 
@@ -128,13 +181,11 @@ class ShoppingListCard extends HTMLElement {
     // Set `card_id` in YAML for an explicit stable label; otherwise title is used.
     const id = (config.card_id || config.title || 'shopping_list').toString().trim().toLowerCase().replace(/[^a-z0-9_]/g, '_');
     this._settingsKey = `shopping_list_settings_${id}`;
+    this._listId = config.list_id || 'groceries';
     // Re-load settings now that we have the correct key
     this._settings = this._loadSettings();
   }
 
-  /**
-   * Load data using Home Assistant's connection.sendMessagePromise
-   */
   /**
    * Compare two objects for actual data changes (ignoring order and timestamps)
    */
@@ -182,7 +233,8 @@ class ShoppingListCard extends HTMLElement {
           type: 'shopping_list_manager/get_products'
         }),
         this._hass.connection.sendMessagePromise({
-          type: 'shopping_list_manager/get_active'
+          type: 'shopping_list_manager/get_active',
+          list_id: this._listId
         })
       ]);
       
@@ -193,8 +245,12 @@ class ShoppingListCard extends HTMLElement {
       
       
       this._products = products || {};
+      this._catalogVersion++;
       this._activeList = activeList || {};
       this._isLoading = false;
+      if (isFirstLoad || productsChanged) {
+        this._scheduleViewRefresh();
+      }
       
       // Render on first load or if data changed
       if (isFirstLoad || productsChanged || activeChanged) {
@@ -219,187 +275,380 @@ class ShoppingListCard extends HTMLElement {
   }
 
   /**
-   * Poll for updates every 10 seconds (only when page is visible)
+   * True for the error of a command the backend doesn't have (older version)
    */
-  _startPolling() {
-    if (!this._hass || this._pollInterval) {
+  _isUnknownCommand(error) {
+    return error?.code === 'unknown_command';
+  }
+
+  /**
+   * Run a request, retrying with backoff while it is rejected as
+   * throttled (`busy` / `rate_limited`). Other errors are thrown.
+   */
+  async _withThrottleRetry(request) {
+    for (let attempt = 0; ; attempt++) {
+      try {
+        return await request();
+      } catch (error) {
+        if (!THROTTLED_ERRORS.includes(error?.code) || attempt >= THROTTLE_RETRIES) {
+          throw error;
+        }
+        const delay = Math.min(THROTTLE_BACKOFF_MS * 2 ** attempt, THROTTLE_BACKOFF_MAX_MS);
+        await new Promise(resolve => setTimeout(resolve, delay / 2 + Math.random() * delay / 2));
+      }
+    }
+  }
+
+  /**
+   * Subscribe to server-pushed snapshot + deltas.
+   * Falls back to polling if the backend doesn't have subscribe; any
+   * other failure is retried later.
+   * home-assistant-js-websocket re-sends the subscription on reconnect,
+   * which delivers a fresh snapshot.
+   */
+  async _subscribe() {
+    if (!this._hass || !this._hass.connection || this._unsubscribe || this._subscribing) {
       return;
     }
-    
-    this._pollInterval = setInterval(() => {
-      // Only poll if page is visible and user isn't actively typing
-      if (this._hass && this._hass.connection && !document.hidden) {
-        this._loadData();
+
+    this._subscribing = true;
+    try {
+      const unsub = await this._withThrottleRetry(() => this._hass.connection.subscribeMessage(
+        (event) => this._handleStreamEvent(event),
+        { type: 'shopping_list_manager/subscribe', list_id: this._listId }
+      ));
+      if (this.isConnected) {
+        this._unsubscribe = unsub;
+      } else {
+        // Removed from the page while subscribing
+        Promise.resolve(unsub()).catch(() => {});
       }
-    }, 3000); // 3 seconds
-    
-    // Also poll when page becomes visible again
-    this._visibilityHandler = () => {
-      if (!document.hidden && this._hass && this._hass.connection) {
+    } catch (error) {
+      if (this._isUnknownCommand(error)) {
+        console.warn('[ShoppingList] Subscribe unavailable — falling back to polling');
         this._loadData();
+        this._startPolling();
+      } else if (this.isConnected) {
+        console.warn('[ShoppingList] Subscribe failed — retrying:', error);
+        this._subscribeTimer = setTimeout(() => {
+          this._subscribeTimer = null;
+          this._subscribe();
+        }, THROTTLE_BACKOFF_MAX_MS);
       }
-    };
-    document.addEventListener('visibilitychange', this._visibilityHandler);
+    } finally {
+      this._subscribing = false;
+    }
   }
 
   /**
-   * Fetch and cache the directory listing from the shopping_list_manager image folder.
-   * HA's static file server returns an HTML page with <a> links for each file.
+   * Re-subscribe to get a fresh snapshot (used when a revision gap is seen)
    */
-  async _fetchImageList() {
-    if (this._imageListCache !== null) return this._imageListCache;
+  async _resubscribe() {
+    if (this._unsubscribe) {
+      const unsub = this._unsubscribe;
+      this._unsubscribe = null;
+      try { await unsub(); } catch (e) { /* connection may already be gone */ }
+    }
+    this._revision = null;
+    await this._subscribe();
+  }
 
-    const dir = '/local/images/shopping_list_manager/';
-    try {
-      const res = await fetch(dir);
-      if (!res.ok) {
-        console.warn('[ShoppingList] Image directory fetch returned', res.status, '— falling back to direct-guess mode');
-        this._imageListCache = [];
-        return [];
+  /**
+   * Handle a snapshot or delta pushed by shopping_list_manager/subscribe
+   */
+  _handleStreamEvent(event) {
+    if (event.type === 'snapshot') {
+      const isFirstLoad = this._isLoading;
+      this._products = event.products || {};
+      this._catalogVersion++;
+      this._activeList = event.active_list || {};
+      this._revision = event.revision;
+      this._isLoading = false;
+      this._scheduleViewRefresh();
+      // A snapshot after the first one means we reconnected
+      this._flushOfflineQueue();
+      if (isFirstLoad) {
+        this._render();
+      } else {
+        this._updateContent();
       }
-      const html = await res.text();
-      console.log('[ShoppingList] Raw directory HTML length:', html.length);
-
-      // Extract href values from <a> tags
-      const matches = [...html.matchAll(/href="([^"]+)"/g)];
-      const imageExts = /\.(png|jpg|jpeg|gif|svg|webp)$/i;
-
-      this._imageListCache = matches
-        .map(m => {
-          // Normalise: strip any leading path so we keep just the filename
-          // e.g. "/local/images/shopping_list_manager/milk.png" → "milk.png"
-          let h = m[1];
-          const lastSlash = h.lastIndexOf('/');
-          if (lastSlash !== -1) h = h.substring(lastSlash + 1);
-          return h;
-        })
-        .filter(h => imageExts.test(h));
+      return;
+    }
 
-      console.log('[ShoppingList] Parsed image list (' + this._imageListCache.length + ' files):', this._imageListCache);
-    } catch (e) {
-      console.warn('[ShoppingList] Could not fetch image list:', e, '— falling back to direct-guess mode');
-      this._imageListCache = [];
+    if (event.type !== 'delta') return;
+
+    // Deltas must be applied in order; a gap means we missed something.
+    // prev_revision skips over revisions that only touched other lists.
+    const expected = event.prev_revision !== undefined ? event.prev_revision : event.revision - 1;
+    if (this._revision !== null && expected !== this._revision) {
+      if (event.revision <= this._revision) return;  // Already applied
+      console.warn('[ShoppingList] Revision gap', this._revision, '→', event.revision, '— resyncing');
+      this._resubscribe();
+      return;
     }
-    return this._imageListCache;
+
+    const changes = event.changes || [];
+    const reordered = this._changesReorder(changes);
+    this._applyChanges(changes);
+    this._revision = event.revision;
+    if (reordered) {
+      this._scheduleViewRefresh();
+    }
+    this._updateContent();
   }
 
   /**
-   * Score a single filename against the product name.
-   * Returns 0-100.  Higher = better match.
-   *
-   * Strategy (order of priority):
-   *   100  – exact stem match            "Milk" vs "milk.png"
-   *    80  – stem starts-with product    "Milk" vs "milk_whole.png"
-   *    70  – product starts-with stem    "Whole milk" vs "milk.png"  (rare but possible)
-   *    50  – product contains stem       "Semi skimmed milk" vs "milk.png"
-   *    40  – stem contains product       "milk_chocolate" vs "milk" — product is a substring
-   *    20  – any shared token (word)     "organic_milk" vs "milk_2litre"
-   *     0  – no overlap
+   * True if changes (not applied yet) can move products in the catalog
+   * order: a new product, or a new name or category. Deleted products
+   * are simply skipped in the current order, and quantity, image or
+   * unit changes don't move anything.
    */
-  _scoreImage(productName, filename) {
-    // Strip extension and path, normalise
-    const stem = filename.replace(/\.[^.]+$/, '').toLowerCase().replace(/[-]/g, '_');
-    const prod = productName.toLowerCase().trim().replace(/[\s-]+/g, '_');
+  _changesReorder(changes) {
+    return changes.some(change => {
+      if (change.type !== 'product_upserted') return false;
+      const old = this._products[change.key];
+      return !old || old.name !== change.product.name || old.category !== change.product.category;
+    });
+  }
 
-    if (stem === prod)                          return 100;
-    if (stem.startsWith(prod))                  return 80;
-    if (prod.startsWith(stem))                  return 70;
-    if (prod.includes(stem))                    return 50;
-    if (stem.includes(prod))                    return 40;
+  /**
+   * Sort mode as named by get_view
+   */
+  _viewSortKey() {
+    return this._sortBy === 'category' ? 'category' : 'name';
+  }
 
-    // Token-level overlap
-    const stemTokens = new Set(stem.split('_').filter(Boolean));
-    const prodTokens = new Set(prod.split('_').filter(Boolean));
-    for (const t of prodTokens) {
-      if (stemTokens.has(t)) return 20;
+  /**
+   * Debounced refresh of the server-ordered catalog (after catalog changes)
+   */
+  _scheduleViewRefresh() {
+    if (!this._viewSupported || !this._hass) return;
+    if (this._viewTimer) {
+      clearTimeout(this._viewTimer);
     }
-    return 0;
+    this._viewTimer = setTimeout(() => {
+      this._viewTimer = null;
+      this._refreshView();
+    }, 100);
   }
 
   /**
-   * Find the best-matching local image for a product name.
-   * Fetches the directory listing once, then scores every file.
-   * Results are cached per product name for the session.
+   * Fetch the catalog order from shopping_list_manager/get_view.
+   * The server keeps it sorted incrementally, so the card never sorts;
+   * only keys are fetched, product data comes from the subscription.
    */
+  async _refreshView() {
+    const sort = this._viewSortKey();
+    try {
+      const view = await this._withThrottleRetry(() => this._hass.connection.sendMessagePromise({
+        type: 'shopping_list_manager/get_view',
+        list_id: this._listId,
+        sort,
+        fields: ['key'],
+        split: false,
+      }));
+      this._viewOrder = view.products.flatMap(group => group.products.map(product => product.key));
+      this._viewSort = sort;
+    } catch (error) {
+      if (this._isUnknownCommand(error)) {
+        // Older backend: sort locally
+        console.warn('[ShoppingList] get_view unavailable — sorting locally');
+        this._viewSupported = false;
+        this._viewOrder = null;
+      } else {
+        // Keep the current order; the next catalog change refreshes it
+        console.warn('[ShoppingList] get_view failed:', error);
+        return;
+      }
+    }
+    if (this.shadowRoot.querySelector('.card-content')) {
+      this._updateContent();
+    }
+  }
+
   /**
-   * Try to load a single URL; resolves true/false within 2 s.
+   * Apply typed changes to local state
    */
-  _testImageUrl(url) {
-    return new Promise((resolve) => {
-      const img = new Image();
-      img.onload  = () => resolve(true);
-      img.onerror = () => resolve(false);
-      img.src = url;
-      setTimeout(() => resolve(false), 2000);
-    });
+  _applyChanges(changes) {
+    for (const change of changes) {
+      switch (change.type) {
+        case 'product_upserted':
+          this._products[change.key] = change.product;
+          this._catalogVersion++;
+          break;
+        case 'product_deleted':
+          delete this._products[change.key];
+          this._catalogVersion++;
+          delete this._activeList[change.key];
+          break;
+        case 'qty_changed':
+          if (change.qty > 0) {
+            this._activeList[change.key] = { qty: change.qty };
+          } else {
+            delete this._activeList[change.key];
+          }
+          break;
+      }
+    }
   }
 
   /**
-   * Direct-guess fallback: try the product name (and common
-   * singular/plural tweaks) with every extension directly.
-   * Returns the first URL that loads, or null.
+   * Send a single mutation tagged with a fresh op_id. If the connection
+   * drops before the reply, we can't know whether it was applied: the op
+   * is queued and sent again with the same op_id through replay once we
+   * reconnect, and the server skips it if it had been applied.
+   * Resolves to null when the op was queued.
    */
-  async _guessImageDirect(productName) {
-    const dir  = '/local/images/shopping_list_manager/';
-    const base = productName.toLowerCase().trim().replace(/[\s-]+/g, '_');
-    const exts = ['png', 'jpg', 'jpeg', 'gif', 'svg', 'webp'];
-
-    // Build candidate stems: exact, +s, -s, -es, -ies→y
-    const stems = [base];
-    if (!base.endsWith('s'))              stems.push(base + 's');        // carrot  → carrots
-    if (base.endsWith('s'))               stems.push(base.slice(0,-1));  // carrots → carrot
-    if (base.endsWith('es'))              stems.push(base.slice(0,-2));  // tomatoes → tomat  (covered by -s too)
-    if (base.endsWith('ies'))             stems.push(base.slice(0,-3) + 'y'); // berries → berry
-
-    for (const stem of stems) {
-      for (const ext of exts) {
-        const url = `${dir}${stem}.${ext}`;
-        if (await this._testImageUrl(url)) {
-          console.log('[ShoppingList] Direct-guess hit:', url);
-          return url;
-        }
+  async _sendMutation(msg) {
+    const op = this._opIdSupported ? { ...msg, op_id: this._newOpId() } : msg;
+    try {
+      return await this._hass.connection.sendMessagePromise(op);
+    } catch (error) {
+      if (this._opIdSupported && error && error.code === 'invalid_format') {
+        // Older backend: no op_id (and no replay)
+        this._opIdSupported = false;
+        return this._sendMutation(msg);
       }
+      if (!this._opIdSupported || !this._isConnectionLost(error)) {
+        throw error;
+      }
+      const { type, ...fields } = op;
+      this._offlineQueue.push({ op: type.replace('shopping_list_manager/', ''), ...fields });
+      return null;
     }
-    return null;
   }
 
-  async _findLocalImage(productName) {
-    const cacheKey = productName.toLowerCase().trim();
-    if (this._localImageCache[cacheKey] !== undefined) {
-      return this._localImageCache[cacheKey];
+  _newOpId() {
+    if (window.crypto && crypto.randomUUID) {
+      return crypto.randomUUID();
     }
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`;
+  }
 
-    const dir  = '/local/images/shopping_list_manager/';
-    const files = await this._fetchImageList();
-
-    let bestScore = 0;
-    let bestFile  = null;
+  /**
+   * home-assistant-js-websocket rejects requests pending when the socket
+   * closes with ERR_CONNECTION_LOST (3), wrapped in a result message
+   */
+  _isConnectionLost(error) {
+    return error === 3 || (error && error.error && error.error.code === 3);
+  }
 
-    // --- Pass 1: score against the directory listing (if we got one) ---
-    if (files.length > 0) {
-      for (const file of files) {
-        const score = this._scoreImage(productName, file);
-        if (score > bestScore) {
-          bestScore = score;
-          bestFile  = file;
-          if (score === 100) break;
+  /**
+   * Send queued mutations in order: runs of single ops in one round trip
+   * (shopping_list_manager/replay), and queued batches as they were sent,
+   * with their op_id, so each stays atomic.
+   * Their effects arrive as deltas like any other change.
+   */
+  async _flushOfflineQueue() {
+    if (this._replaying || !this._offlineQueue.length || !this._hass) return;
+    this._replaying = true;
+    const queue = this._offlineQueue;
+    let count = 1;
+    if (queue[0].op !== 'batch') {
+      while (count < Math.min(queue.length, REPLAY_MAX_OPS) && queue[count].op !== 'batch') count++;
+    }
+    const ops = queue.splice(0, count);
+    let retry = null;  // 'reconnect' or 'later'
+    try {
+      if (ops[0].op === 'batch') {
+        await this._hass.connection.sendMessagePromise({
+          type: 'shopping_list_manager/batch',
+          ops: ops[0].ops,
+          op_id: ops[0].op_id
+        });
+      } else {
+        const result = await this._hass.connection.sendMessagePromise({
+          type: 'shopping_list_manager/replay',
+          ops
+        });
+        const failed = result.results.filter(entry => entry.status === 'failed');
+        if (failed.length) {
+          console.warn('[ShoppingList] Queued changes rejected on replay:', failed);
         }
       }
-      console.log('[ShoppingList] Best listing match for "' + productName + '":', bestFile, 'score=' + bestScore);
+    } catch (error) {
+      if (this._isConnectionLost(error)) {
+        retry = 'reconnect';
+      } else if (THROTTLED_ERRORS.includes(error?.code)) {
+        retry = 'later';
+      } else {
+        console.error('[ShoppingList] Failed to replay queued changes:', error);
+      }
+      if (retry) {
+        this._offlineQueue.unshift(...ops);
+      }
+    } finally {
+      this._replaying = false;
+    }
+    // Lost again: the next snapshot retries
+    if (retry === 'later') {
+      setTimeout(() => this._flushOfflineQueue(), 2000);
+    } else if (!retry) {
+      this._flushOfflineQueue();
+    }
+  }
+
+  /**
+   * After a mutation: pushed deltas keep us in sync, only refetch when polling
+   */
+  async _syncAfterMutation() {
+    if (!this._unsubscribe) {
+      await this._loadData();
     }
+  }
+
+  /**
+   * Poll for updates every 3 seconds (only when page is visible).
+   * Fallback for backends without shopping_list_manager/subscribe.
+   */
+  _startPolling() {
+    if (!this._hass || this._pollInterval) {
+      return;
+    }
+    
+    this._pollInterval = setInterval(() => {
+      // Only poll if page is visible and user isn't actively typing
+      if (this._hass && this._hass.connection && !document.hidden) {
+        this._loadData();
+      }
+    }, 3000); // 3 seconds
+    
+    // Also poll when page becomes visible again
+    this._visibilityHandler = () => {
+      if (!document.hidden && this._hass && this._hass.connection) {
+        this._loadData();
+      }
+    };
+    document.addEventListener('visibilitychange', this._visibilityHandler);
+  }
 
-    // Accept listing match if score >= 20
-    if (bestScore >= 20 && bestFile) {
-      const result = `${dir}${bestFile}`;
-      this._localImageCache[cacheKey] = result;
-      return result;
+  /**
+   * Find the best-matching local image for a product name.
+   * The integration indexes /local/images/shopping_list_manager/ and
+   * resolves the name in one round trip; results are cached per name.
+   */
+  async _findLocalImage(productName) {
+    const cacheKey = productName.toLowerCase().trim();
+    if (this._localImageCache[cacheKey] !== undefined) {
+      return this._localImageCache[cacheKey];
     }
 
-    // --- Pass 2: direct HTTP guess (works even when listing is empty/404) ---
-    console.log('[ShoppingList] Listing empty or no match — trying direct guess for "' + productName + '"');
-    const guessed = await this._guessImageDirect(productName);
-    this._localImageCache[cacheKey] = guessed;
-    return guessed;
+    let image = null;
+    try {
+      const result = await this._withThrottleRetry(() => this._hass.connection.sendMessagePromise({
+        type: 'shopping_list_manager/resolve_image',
+        name: productName
+      }));
+      image = result.image || null;
+    } catch (e) {
+      if (!this._isUnknownCommand(e)) {
+        // Not cached: asked again next time
+        console.warn('[ShoppingList] Could not resolve local image:', e);
+        return null;
+      }
+    }
+    this._localImageCache[cacheKey] = image;
+    return image;
   }
 
   /**
@@ -511,22 +760,24 @@ class ShoppingListCard extends HTMLElement {
     if (!result || result.action !== 'save') return;
     
     try {
-      await this._hass.connection.sendMessagePromise({
-        type: 'shopping_list_manager/add_product',
-        key: key,
-        name: result.name,
-        category: result.category,
-        unit: 'pcs',
-        image: result.image || ''
-      });
-      
-      await this._hass.connection.sendMessagePromise({
-        type: 'shopping_list_manager/set_qty',
-        key: key,
-        qty: 1
+      // Create and add to list in one atomic round trip (queued with
+      // its op_id if the connection drops before the reply)
+      await this._sendMutation({
+        type: 'shopping_list_manager/batch',
+        ops: [
+          {
+            op: 'add_product',
+            key: key,
+            name: result.name,
+            category: result.category,
+            unit: 'pcs',
+            image: result.image || ''
+          },
+          { op: 'set_qty', key: key, qty: 1, list_id: this._listId }
+        ]
       });
       
-      await this._loadData();
+      await this._syncAfterMutation();
       this._hapticFeedback();
     } catch (error) {
       console.error('Failed to add product:', error);
@@ -717,17 +968,17 @@ class ShoppingListCard extends HTMLElement {
     try {
       if (result.action === 'delete') {
         // Delete product
-        await this._hass.connection.sendMessagePromise({
+        await this._sendMutation({
           type: 'shopping_list_manager/delete_product',
           key: productKey
         });
         
         // Reload data
-        await this._loadData();
+        await this._syncAfterMutation();
         this._hapticFeedback();
       } else if (result.action === 'save') {
         // Update product
-        await this._hass.connection.sendMessagePromise({
+        await this._sendMutation({
           type: 'shopping_list_manager/add_product',
           key: productKey,
           name: result.name,
@@ -737,7 +988,7 @@ class ShoppingListCard extends HTMLElement {
         });
         
         // Reload data
-        await this._loadData();
+        await this._syncAfterMutation();
         this._hapticFeedback();
       }
     } catch (error) {
@@ -762,10 +1013,11 @@ class ShoppingListCard extends HTMLElement {
     this._hapticFeedback();
     
     try {
-      await this._hass.connection.sendMessagePromise({
+      await this._sendMutation({
         type: 'shopping_list_manager/set_qty',
         key: productKey,
-        qty: qty
+        qty: qty,
+        list_id: this._listId
       });
     } catch (error) {
       console.error('Failed to set quantity:', error);
@@ -776,7 +1028,73 @@ class ShoppingListCard extends HTMLElement {
         this._activeList[productKey] = { qty: currentQty };
       }
       this._render();
-      alert('Failed to update quantity');
+      if (!THROTTLED_ERRORS.includes(error?.code)) {
+        alert('Failed to update quantity');
+      }
+    }
+  }
+
+  /**
+   * Change a quantity by a delta with shopping_list_manager/adjust_qty.
+   * The server applies the delta to its current value, so rapid taps
+   * (here or on another device) all count, and replies with the
+   * resulting qty — no read-modify-write, no refetch.
+   */
+  async _adjustQuantity(productKey, delta) {
+    if (!this._adjustSupported) {
+      const currentQty = this._activeList[productKey]?.qty || 0;
+      await this._setQuantity(productKey, Math.max(0, currentQty + delta));
+      return;
+    }
+
+    // Optimistic update
+    const applyLocal = (qty) => {
+      if (qty <= 0) {
+        delete this._activeList[productKey];
+      } else {
+        this._activeList[productKey] = { qty };
+      }
+    };
+    const beforeQty = this._activeList[productKey]?.qty || 0;
+    const applied = Math.max(0, beforeQty + delta) - beforeQty;
+    applyLocal(beforeQty + applied);
+    this._pendingAdjusts[productKey] = (this._pendingAdjusts[productKey] || 0) + 1;
+    this._render();
+    this._hapticFeedback();
+
+    try {
+      const result = await this._sendMutation({
+        type: 'shopping_list_manager/adjust_qty',
+        key: productKey,
+        delta,
+        list_id: this._listId
+      });
+      // Take the server's value unless its delta event was already applied
+      // or another tap on this product is still in flight (no reply at
+      // all when the op was queued for replay)
+      if (result && this._pendingAdjusts[productKey] === 1 &&
+          (this._revision === null || result.revision > this._revision)) {
+        applyLocal(result.qty);
+        this._updateContent();
+      }
+    } catch (error) {
+      const currentQty = this._activeList[productKey]?.qty || 0;
+      applyLocal(Math.max(0, currentQty - applied));
+      if (error && error.code === 'unknown_command') {
+        // Older backend: fall back to absolute quantities
+        this._adjustSupported = false;
+        await this._setQuantity(productKey, Math.max(0, currentQty - applied + delta));
+        return;
+      }
+      console.error('Failed to adjust quantity:', error);
+      this._render();
+      if (!THROTTLED_ERRORS.includes(error?.code)) {
+        alert('Failed to update quantity');
+      }
+    } finally {
+      if (--this._pendingAdjusts[productKey] === 0) {
+        delete this._pendingAdjusts[productKey];
+      }
     }
   }
 
@@ -793,8 +1111,7 @@ class ShoppingListCard extends HTMLElement {
    * Increment quantity
    */
   async _incrementProduct(productKey) {
-    const currentQty = this._activeList[productKey]?.qty || 0;
-    await this._setQuantity(productKey, currentQty + 1);
+    await this._adjustQuantity(productKey, 1);
   }
 
   /**
@@ -803,7 +1120,7 @@ class ShoppingListCard extends HTMLElement {
   async _decrementProduct(productKey) {
     const currentQty = this._activeList[productKey]?.qty || 0;
     if (currentQty > 0) {
-      await this._setQuantity(productKey, currentQty - 1);
+      await this._adjustQuantity(productKey, -1);
     }
   }
 
@@ -1052,6 +1369,67 @@ class ShoppingListCard extends HTMLElement {
     });
   }
 
+  /**
+   * Settings/Add button: swap ⚙️ ↔ ➕ based on whether "add new" applies
+   */
+  _updateAddButton() {
+    const settingsBtn = this.shadowRoot.querySelector('.settings-btn');
+    if (!settingsBtn) return;
+    if (this._searchQuery.length > 0 && this._shouldShowAddNew()) {
+      settingsBtn.textContent = '➕';
+      settingsBtn.title = 'Add new product';
+    } else {
+      settingsBtn.textContent = '⚙️';
+      settingsBtn.title = 'Settings';
+    }
+  }
+
+  /**
+   * Whether search should go to the server-side index
+   */
+  _useServerSearch() {
+    return !!this._hass && Object.keys(this._products).length > SERVER_SEARCH_THRESHOLD;
+  }
+
+  /**
+   * Debounced call to shopping_list_manager/search for the current query
+   */
+  _scheduleServerSearch() {
+    if (this._searchDebounceTimer) {
+      clearTimeout(this._searchDebounceTimer);
+    }
+    const query = this._searchQuery;
+    if (!query) {
+      this._serverSearch = null;
+      return;
+    }
+
+    this._searchDebounceTimer = setTimeout(async () => {
+      this._searchDebounceTimer = null;
+      try {
+        const msg = {
+          type: 'shopping_list_manager/search',
+          query: query,
+          limit: SERVER_SEARCH_LIMIT
+        };
+        if (this._selectedCategory) msg.category = this._selectedCategory;
+        const result = await this._hass.connection.sendMessagePromise(msg);
+        // Ignore responses for a query the user has already moved past
+        if (query !== this._searchQuery) return;
+        this._serverSearch = {
+          query: query,
+          keys: result.results.map(product => product.key),
+          exactMatch: result.exact_match
+        };
+        this._updateAddButton();
+        this._updateContent();
+      } catch (error) {
+        console.warn('[ShoppingList] Server search failed — using local search:', error);
+        this._serverSearch = null;
+      }
+    }, 150);
+  }
+
   /**
    * Fuzzy search - matches even with typos or partial matches
    */
@@ -1075,13 +1453,39 @@ class ShoppingListCard extends HTMLElement {
   }
 
   /**
-   * Filter products by search and split into active/inactive
+   * Products matching the search and category, in display order.
+   * Memoized: quantity changes don't affect it, so a qty tap on a large
+   * catalog doesn't filter and order it again.
    */
   _getFilteredProducts() {
-    let products = Object.values(this._products);
+    const inputs = [this._catalogVersion, this._viewOrder, this._viewSort, this._sortBy,
+      this._searchQuery, this._serverSearch, this._selectedCategory];
+    const cached = this._filteredCache;
+    if (cached && inputs.every((value, index) => value === cached.inputs[index])) {
+      return cached.products;
+    }
+    const products = this._filterProducts();
+    this._filteredCache = { inputs, products };
+    return products;
+  }
+
+  /**
+   * Filter products by search and category
+   */
+  _filterProducts() {
+    let products;
+
+    if (this._searchQuery && this._serverSearch && this._useServerSearch()) {
+      // Server-ranked matches (the previous query's until the new one arrives)
+      products = this._serverSearch.keys
+        .map(key => this._products[key])
+        .filter(Boolean);
+    } else {
+      products = Object.values(this._products);
+    }
     
     // Filter by search query with fuzzy matching
-    if (this._searchQuery) {
+    if (this._searchQuery && !(this._serverSearch && this._useServerSearch())) {
       const query = this._searchQuery.toLowerCase();
       products = products.filter(product =>
         this._fuzzyMatch(product.name, query)
@@ -1095,6 +1499,28 @@ class ShoppingListCard extends HTMLElement {
       );
     }
     
+    return this._orderProducts(products);
+  }
+
+  /**
+   * Put products in display order: the server's view order when it is
+   * current for this sort, else a local sort (older backends)
+   */
+  _orderProducts(products) {
+    if (this._viewOrder && this._viewSort === this._viewSortKey()) {
+      const included = new Map(products.map(product => [product.key, product]));
+      const ordered = [];
+      for (const key of this._viewOrder) {
+        const product = included.get(key);
+        if (product) {
+          ordered.push(product);
+          included.delete(key);
+        }
+      }
+      // Products newer than the view (refresh pending) go last
+      return ordered.concat([...included.values()]);
+    }
+
     // Sort products
     if (this._sortBy === 'category') {
       // Sort by category order, then by name
@@ -1116,25 +1542,16 @@ class ShoppingListCard extends HTMLElement {
   }
   
   /**
-   * Get active products (in shopping list)
+   * Split products into active (in shopping list) and inactive, in one pass
    */
-  _getActiveProducts() {
-    const filtered = this._getFilteredProducts();
-    return filtered.filter(product => {
+  _splitProducts(filtered = this._getFilteredProducts()) {
+    const active = [];
+    const inactive = [];
+    for (const product of filtered) {
       const qty = this._activeList[product.key]?.qty || 0;
-      return qty > 0;
-    });
-  }
-  
-  /**
-   * Get inactive products (not in shopping list)
-   */
-  _getInactiveProducts() {
-    const filtered = this._getFilteredProducts();
-    return filtered.filter(product => {
-      const qty = this._activeList[product.key]?.qty || 0;
-      return qty === 0;
-    });
+      (qty > 0 ? active : inactive).push(product);
+    }
+    return [active, inactive];
   }
   
   /**
@@ -1145,6 +1562,10 @@ class ShoppingListCard extends HTMLElement {
       return false;
     }
     
+    if (this._serverSearch && this._serverSearch.query === this._searchQuery && this._useServerSearch()) {
+      return !this._serverSearch.exactMatch;
+    }
+    
     const query = this._searchQuery.toLowerCase();
     const exactMatch = Object.values(this._products).some(
       product => product.name.toLowerCase() === query
@@ -1171,6 +1592,7 @@ class ShoppingListCard extends HTMLElement {
    * Initial render - creates the persistent structure
    */
   _initialRender() {
+    this._resetContent();
     this.shadowRoot.innerHTML = `
       <style>
         ha-card {
@@ -1533,6 +1955,12 @@ class ShoppingListCard extends HTMLElement {
         }
         
         
+        .virtual-list {
+          display: flex;
+          flex-direction: column;
+          gap: 6px;
+        }
+        
         .empty-state {
           text-align: center;
           padding: 32px;
@@ -1570,86 +1998,104 @@ class ShoppingListCard extends HTMLElement {
     `;
     
     this._attachPersistentListeners();
+    this._attachContentListeners();
     this._updateContent();
   }
   
   /**
-   * Update only the content area (not search bar)
+   * Update only the content area (not search bar).
+   *
+   * The DOM is patched, not rebuilt: sections and tiles are kept keyed
+   * (by section id and product key) between updates, reused and moved
+   * into place, and a tile is only touched when its name, image or
+   * quantity changed. A qty tap updates one tile.
    */
   _updateContent() {
     const contentArea = this.shadowRoot.querySelector('.content-area');
     if (!contentArea) return;
     
     if (this._isLoading) {
+      this._resetContent();
       contentArea.innerHTML = '<div style="padding: 16px; text-align: center;">Loading...</div>';
       return;
     }
     
-    const activeProducts = this._getActiveProducts();
-    const inactiveProducts = this._getInactiveProducts();
-    let html = '';
-    
-
+    const [activeProducts, inactiveProducts] = this._splitProducts();
+    const blocks = [];
+    this._renderPass++;
+    this._contentWidth = contentArea.clientWidth;
+    this._chunkColumns = this._gridColumns(contentArea);
     
     // Show active products first
-    if (activeProducts.length > 0) {
-      if (this._sortBy === 'category') {
-        html += this._renderProductsByCategory(activeProducts, false);
-      } else {
-        const containerClass = this._settings.layout === 'list' ? 'product-list' : 'product-grid';
-        html += `<div class="${containerClass}">`;
-        html += activeProducts.map(product => this._renderProductTile(product)).join('');
-        html += '</div>';
-      }
+    for (const group of this._groupProducts(activeProducts)) {
+      const section = this._section(`active:${group.id}`, group.category, false);
+      this._placeChildren(section.container, group.products.map(product => this._tile(product)));
+      blocks.push(section.el);
     }
     
     // Show inactive products in "Recently Used" section (unless hidden)
     if (inactiveProducts.length > 0 && !this._searchQuery && !this._config.hide_completed) {
-      html += `
+      blocks.push(this._staticBlock('recent', `
         <div style="margin-top: 24px; padding-top: 16px; border-top: 1px solid var(--divider-color);">
           <div style="font-size: 12px; color: var(--secondary-text-color); margin-bottom: 12px; text-transform: uppercase; letter-spacing: 0.5px; font-weight: 500;">
             Recently Used
           </div>
-          ${this._sortBy === 'category' ? 
-            this._renderProductsByCategory(inactiveProducts, true) : 
-            `<div class="${this._settings.layout === 'list' ? 'product-list' : 'product-grid'}">
-              ${inactiveProducts.map(product => this._renderProductTile(product)).join('')}
-            </div>`
-          }
         </div>
-      `;
+      `));
+      for (const group of this._groupProducts(inactiveProducts)) {
+        const section = this._section(`recent:${group.id}`, group.category, true);
+        this._virtualize(section, group.products);
+        blocks.push(section.el);
+      }
     }
     
     // Empty state
     if (activeProducts.length === 0 && inactiveProducts.length === 0) {
-      html += `
+      blocks.push(this._staticBlock('empty', `
         <div class="empty-state">
           ${this._searchQuery ? 'No products found' : 'No products yet. Search to add your first product!'}
         </div>
-      `;
+      `));
     }
     
-    contentArea.innerHTML = html;
-
-    // Stamp live grid columns onto every .product-grid so the setting
-    // takes effect immediately without needing a full re-render.
-    const gridCols = this._settings.productsPerRow === 'auto'
-      ? 'repeat(auto-fill, minmax(120px, 1fr))'
-      : `repeat(${this._settings.productsPerRow}, 1fr)`;
-    contentArea.querySelectorAll('.product-grid').forEach(g => {
-      g.style.gridTemplateColumns = gridCols;
-    });
-
-    this._attachContentListeners();
+    this._placeChildren(contentArea, blocks);
+    
+    // Forget sections that weren't rendered this pass
+    for (const [id, section] of this._sections) {
+      if (section.pass !== this._renderPass) {
+        section.chunks.forEach(chunk => this._dropChunk(chunk));
+        this._sections.delete(id);
+      }
+    }
+    for (const [key, tile] of this._tiles) {
+      if (!tile.el.isConnected) this._tiles.delete(key);
+    }
+  }
+  
+  /**
+   * Forget all keyed content (the content area is being replaced)
+   */
+  _resetContent() {
+    if (this._chunkObserver) {
+      this._chunkObserver.disconnect();
+      this._chunkObserver = null;
+    }
+    this._sections.clear();
+    this._tiles.clear();
+    this._blocks = {};
+    this._visibleChunks.clear();
   }
   
   /**
-   * Render products by category (helper for active/inactive)
+   * Split products into display groups: one per category when sorted by
+   * category (in category order), else a single group
    */
-  _renderProductsByCategory(products, isRecentlyUsed) {
-    const containerClass = this._settings.layout === 'list' ? 'product-list' : 'product-grid';
+  _groupProducts(products) {
+    if (products.length === 0) return [];
+    if (this._sortBy !== 'category') {
+      return [{ id: 'all', category: null, products }];
+    }
     const productsByCategory = {};
-    
     products.forEach(product => {
       const categoryId = product.category || 'other';
       if (!productsByCategory[categoryId]) {
@@ -1657,25 +2103,237 @@ class ShoppingListCard extends HTMLElement {
       }
       productsByCategory[categoryId].push(product);
     });
-    
     return CATEGORIES
-      .filter(cat => productsByCategory[cat.id] && productsByCategory[cat.id].length > 0)
-      .map(cat => {
-        const categoryProducts = productsByCategory[cat.id];
-        const headerHtml = this._config.hide_section_headers ? '' : `
-            <div class="category-header">
-              <span class="category-emoji">${cat.emoji}</span>
-              <span class="category-name">${cat.name}</span>
-            </div>`;
-        return `
-          <div class="category-section">
-            ${headerHtml}
-            <div class="${containerClass}">
-              ${categoryProducts.map(product => this._renderProductTile(product)).join('')}
-            </div>
-          </div>
-        `;
-      }).join('');
+      .filter(cat => productsByCategory[cat.id])
+      .map(cat => ({ id: cat.id, category: cat, products: productsByCategory[cat.id] }));
+  }
+  
+  /**
+   * Container class for the current layout
+   */
+  _containerClass() {
+    return this._settings.layout === 'list' ? 'product-list' : 'product-grid';
+  }
+  
+  /**
+   * Columns a product grid has at the content area's current width
+   */
+  _gridColumns(contentArea) {
+    if (this._settings.layout === 'list') return 1;
+    if (this._settings.productsPerRow !== 'auto') {
+      return Math.max(1, parseInt(this._settings.productsPerRow, 10) || 1);
+    }
+    // repeat(auto-fill, minmax(120px, 1fr)) with a 6px gap
+    return Math.max(1, Math.floor((contentArea.clientWidth + 6) / 126));
+  }
+  
+  /**
+   * Apply the layout to a product container
+   */
+  _styleContainer(container, extraClass = '') {
+    const className = `${this._containerClass()}${extraClass}`;
+    if (container.className !== className) {
+      container.className = className;
+    }
+    // Stamp live grid columns so the setting takes effect immediately
+    const gridCols = this._settings.layout === 'list' ? ''
+      : this._settings.productsPerRow === 'auto'
+        ? 'repeat(auto-fill, minmax(120px, 1fr))'
+        : `repeat(${this._settings.productsPerRow}, 1fr)`;
+    if (container.style.gridTemplateColumns !== gridCols) {
+      container.style.gridTemplateColumns = gridCols;
+    }
+  }
+  
+  /**
+   * A keyed element with fixed markup (section titles, empty state)
+   */
+  _staticBlock(id, html) {
+    let block = this._blocks[id];
+    if (!block || block.html !== html) {
+      const el = document.createElement('div');
+      el.dataset.block = id;
+      el.innerHTML = html;
+      block = this._blocks[id] = { el, html };
+    }
+    return block.el;
+  }
+  
+  /**
+   * Get (or create) the keyed section for a group of products.
+   * A section is an optional category header plus a product container;
+   * virtual sections hold a column of chunks instead of tiles.
+   */
+  _section(id, category, virtual) {
+    let section = this._sections.get(id);
+    if (!section) {
+      const el = document.createElement('div');
+      el.dataset.block = id;
+      const header = document.createElement('div');
+      header.className = 'category-header';
+      const container = document.createElement('div');
+      el.append(header, container);
+      section = { el, header, container, headerHtml: null, chunks: [], pass: 0 };
+      this._sections.set(id, section);
+    }
+    section.pass = this._renderPass;
+    
+    const headerHtml = category && !this._config.hide_section_headers ? `
+              <span class="category-emoji">${category.emoji}</span>
+              <span class="category-name">${category.name}</span>` : '';
+    if (section.headerHtml !== headerHtml) {
+      section.headerHtml = headerHtml;
+      section.header.innerHTML = headerHtml;
+      section.header.style.display = headerHtml ? '' : 'none';
+      section.el.className = category ? 'category-section' : '';
+    }
+    if (virtual) {
+      section.container.className = 'virtual-list';
+    } else {
+      this._styleContainer(section.container);
+    }
+    return section;
+  }
+  
+  /**
+   * Make an element's children exactly `nodes`, in order, moving only
+   * what is out of place
+   */
+  _placeChildren(parent, nodes) {
+    let next = parent.firstChild;
+    for (const node of nodes) {
+      if (node === next) {
+        next = next.nextSibling;
+      } else {
+        parent.insertBefore(node, next);
+      }
+    }
+    while (next) {
+      const stale = next;
+      next = next.nextSibling;
+      stale.remove();
+    }
+  }
+  
+  /**
+   * Render a section's products in chunks of whole rows. Only chunks in
+   * or near the viewport hold tiles; the rest are empty placeholders of
+   * the same height, so a 10k catalog keeps a few dozen tiles in the DOM.
+   */
+  _virtualize(section, products) {
+    const size = this._chunkColumns * VIRTUAL_CHUNK_ROWS;
+    const count = Math.ceil(products.length / size);
+    while (section.chunks.length > count) {
+      this._dropChunk(section.chunks.pop());
+    }
+    while (section.chunks.length < count) {
+      const chunk = document.createElement('div');
+      section.chunks.push(chunk);
+      this._chunkData.set(chunk, { products: [], size: size, height: null });
+    }
+    
+    const observing = this._observeChunks();
+    section.chunks.forEach((chunk, index) => {
+      if (observing) {
+        this._chunkObserver.observe(chunk);  // No-op when already observed
+      } else {
+        this._visibleChunks.add(chunk);  // No IntersectionObserver: render everything
+      }
+      const data = this._chunkData.get(chunk);
+      const slice = products.slice(index * size, (index + 1) * size);
+      if (data.products.length !== slice.length || data.size !== size) {
+        data.height = null;  // Measured height no longer applies
+      }
+      data.products = slice;
+      data.size = size;
+      this._styleContainer(chunk, ' virtual-chunk');
+      if (this._visibleChunks.has(chunk)) {
+        this._fillChunk(chunk);
+      } else {
+        this._parkChunk(chunk);
+      }
+    });
+    this._placeChildren(section.container, section.chunks);
+  }
+  
+  /**
+   * Create the observer that fills chunks entering the viewport margin
+   * and empties chunks leaving it. Returns false if unsupported.
+   */
+  _observeChunks() {
+    if (typeof IntersectionObserver === 'undefined') return false;
+    if (!this._chunkObserver) {
+      this._chunkObserver = new IntersectionObserver(entries => {
+        for (const entry of entries) {
+          const chunk = entry.target;
+          if (!this._chunkData.has(chunk)) continue;
+          if (entry.isIntersecting) {
+            this._visibleChunks.add(chunk);
+            this._fillChunk(chunk);
+          } else if (this._visibleChunks.delete(chunk)) {
+            this._parkChunk(chunk);
+          }
+        }
+      }, { rootMargin: `${VIRTUAL_MARGIN_PX}px 0px` });
+    }
+    return true;
+  }
+  
+  /**
+   * Put a chunk's tiles in it
+   */
+  _fillChunk(chunk) {
+    const data = this._chunkData.get(chunk);
+    chunk.style.height = '';
+    this._placeChildren(chunk, data.products.map(product => this._tile(product)));
+  }
+  
+  /**
+   * Replace a chunk's tiles with empty space of the same height
+   */
+  _parkChunk(chunk) {
+    const data = this._chunkData.get(chunk);
+    if (chunk.firstChild) {
+      if (data.height === null && chunk.offsetHeight > 0) {
+        data.height = chunk.offsetHeight;
+      }
+      for (const tile of chunk.children) {
+        this._tiles.delete(tile.dataset.key);
+      }
+      chunk.textContent = '';
+    }
+    const height = data.height !== null ? data.height : this._estimateChunkHeight(data.products.length);
+    chunk.style.height = `${height}px`;
+  }
+  
+  /**
+   * Height of a chunk that was never rendered, from a rendered tile
+   */
+  _estimateChunkHeight(count) {
+    const columns = this._chunkColumns;
+    const rows = Math.ceil(count / columns);
+    const isList = this._settings.layout === 'list';
+    const gap = isList ? 8 : 6;
+    let rowHeight = isList ? 56 : 120;
+    const sample = this._tiles.size > 0 ? this._tiles.values().next().value.el : null;
+    if (sample && sample.isConnected && sample.offsetHeight > 0) {
+      rowHeight = sample.offsetHeight;
+    } else if (!isList && this._contentWidth > 0) {
+      rowHeight = (this._contentWidth - gap * (columns - 1)) / columns;  // Square tiles
+    }
+    return rows * rowHeight + Math.max(0, rows - 1) * gap;
+  }
+  
+  /**
+   * Stop tracking a chunk that is no longer rendered
+   */
+  _dropChunk(chunk) {
+    if (this._chunkObserver) {
+      this._chunkObserver.unobserve(chunk);
+    }
+    this._visibleChunks.delete(chunk);
+    this._chunkData.delete(chunk);
+    chunk.remove();
   }
   
   /**
@@ -1693,16 +2351,11 @@ class ShoppingListCard extends HTMLElement {
         if (searchClear) {
           searchClear.style.display = this._searchQuery.length > 0 ? 'block' : 'none';
         }
-        // Settings/Add button: swap ⚙️ ↔ ➕ based on whether "add new" applies
-        if (settingsBtn) {
-          if (this._searchQuery.length > 0 && this._shouldShowAddNew()) {
-            settingsBtn.textContent = '➕';
-            settingsBtn.title = 'Add new product';
-          } else {
-            settingsBtn.textContent = '⚙️';
-            settingsBtn.title = 'Settings';
-          }
+        // Large catalogs: rank on the server instead of scanning locally
+        if (this._useServerSearch()) {
+          this._scheduleServerSearch();
         }
+        this._updateAddButton();
         this._updateContent();
       });
     }
@@ -1739,6 +2392,7 @@ class ShoppingListCard extends HTMLElement {
         // Update button states
         sortButtons.forEach(b => b.classList.remove('active'));
         btn.classList.add('active');
+        this._scheduleViewRefresh();
         this._updateContent();
         this._hapticFeedback();
       });
@@ -1746,107 +2400,130 @@ class ShoppingListCard extends HTMLElement {
   }
   
   /**
-   * Attach listeners for content area (products, buttons)
+   * Attach listeners for content area (products, buttons).
+   * Delegated from the content area, so they are attached once and
+   * cover tiles added later.
    */
   _attachContentListeners() {
-    // Product tiles - add long-press for edit
-    const tiles = this.shadowRoot.querySelectorAll('.product-tile');
-    tiles.forEach(tile => {
-      const key = tile.dataset.key;
-      let longPressTimer = null;
-      let longPressTriggered = false;
-      
-      // Touch events for mobile long-press
-      tile.addEventListener('touchstart', (e) => {
-        longPressTriggered = false;
-        longPressTimer = setTimeout(() => {
-          longPressTriggered = true;
-          this._hapticFeedback();
-          this._editProduct(key);
-        }, 500); // 500ms long press
-      }, { passive: true });
-      
-      tile.addEventListener('touchend', () => {
-        if (longPressTimer) {
-          clearTimeout(longPressTimer);
-        }
-      });
-      
-      tile.addEventListener('touchmove', () => {
-        if (longPressTimer) {
-          clearTimeout(longPressTimer);
-        }
-      }, { passive: true });
-      
-      // Mouse events for desktop
-      tile.addEventListener('mousedown', (e) => {
-        longPressTriggered = false;
-        longPressTimer = setTimeout(() => {
-          longPressTriggered = true;
-          this._editProduct(key);
-        }, 500);
-      });
-      
-      tile.addEventListener('mouseup', () => {
-        if (longPressTimer) {
-          clearTimeout(longPressTimer);
-        }
-      });
-      
-      tile.addEventListener('mouseleave', () => {
-        if (longPressTimer) {
-          clearTimeout(longPressTimer);
-        }
-      });
-      
-      // Right-click for edit
-      tile.addEventListener('contextmenu', (e) => {
-        e.preventDefault();
-        this._editProduct(key);
-      });
-      
-      // Regular click
-      tile.addEventListener('click', (e) => {
-        // Don't toggle if it was a long press or clicking buttons
-        if (!longPressTriggered && !e.target.closest('.qty-button')) {
-          // Check if click is in bottom 30px area (where buttons would be)
-          const rect = tile.getBoundingClientRect();
-          const clickY = e.clientY - rect.top;
-          const isBottomArea = clickY > (rect.height - 35);
-          
-          // Only toggle if not clicking in button area
-          if (!isBottomArea || !isActive) {
-            this._toggleProduct(key);
-          }
-        }
-      });
+    const contentArea = this.shadowRoot.querySelector('.content-area');
+    let longPressTimer = null;
+    let longPressTriggered = false;
+    
+    const cancelLongPress = () => {
+      if (longPressTimer) {
+        clearTimeout(longPressTimer);
+        longPressTimer = null;
+      }
+    };
+    const startLongPress = (e, haptic) => {
+      const tile = e.target.closest('.product-tile');
+      longPressTriggered = false;
+      cancelLongPress();
+      if (!tile) return;
+      longPressTimer = setTimeout(() => {
+        longPressTimer = null;
+        longPressTriggered = true;
+        if (haptic) this._hapticFeedback();
+        this._editProduct(tile.dataset.key);
+      }, 500); // 500ms long press
+    };
+    
+    // Touch events for mobile long-press
+    contentArea.addEventListener('touchstart', (e) => startLongPress(e, true), { passive: true });
+    contentArea.addEventListener('touchend', cancelLongPress);
+    contentArea.addEventListener('touchmove', cancelLongPress, { passive: true });
+    
+    // Mouse events for desktop
+    contentArea.addEventListener('mousedown', (e) => startLongPress(e, false));
+    contentArea.addEventListener('mouseup', cancelLongPress);
+    contentArea.addEventListener('mouseout', (e) => {
+      const tile = e.target.closest('.product-tile');
+      if (tile && !tile.contains(e.relatedTarget)) {
+        cancelLongPress();
+      }
     });
     
-    // Plus buttons
-    const plusButtons = this.shadowRoot.querySelectorAll('.plus-btn');
-    plusButtons.forEach(btn => {
-      btn.addEventListener('click', (e) => {
-        e.stopPropagation();
-        this._incrementProduct(btn.dataset.key);
-      });
+    // Right-click for edit
+    contentArea.addEventListener('contextmenu', (e) => {
+      const tile = e.target.closest('.product-tile');
+      if (tile) {
+        e.preventDefault();
+        this._editProduct(tile.dataset.key);
+      }
     });
     
-    // Minus buttons
-    const minusButtons = this.shadowRoot.querySelectorAll('.minus-btn');
-    minusButtons.forEach(btn => {
-      btn.addEventListener('click', (e) => {
+    contentArea.addEventListener('click', (e) => {
+      // Plus / minus buttons
+      const button = e.target.closest('.qty-button');
+      if (button) {
         e.stopPropagation();
-        this._decrementProduct(btn.dataset.key);
-      });
+        if (button.classList.contains('plus-btn')) {
+          this._incrementProduct(button.dataset.key);
+        } else {
+          this._decrementProduct(button.dataset.key);
+        }
+        return;
+      }
+      
+      // Regular click - don't toggle if it was a long press
+      const tile = e.target.closest('.product-tile');
+      if (!tile || longPressTriggered) return;
+      // Check if click is in bottom 30px area (where buttons would be)
+      const rect = tile.getBoundingClientRect();
+      const clickY = e.clientY - rect.top;
+      const isBottomArea = clickY > (rect.height - 35);
+      
+      // Only toggle if not clicking in button area
+      if (!isBottomArea || !tile.classList.contains('active')) {
+        this._toggleProduct(tile.dataset.key);
+      }
     });
+    
+    // Auto columns: re-chunk when a width change changes the column count
+    if (typeof ResizeObserver !== 'undefined') {
+      new ResizeObserver(() => {
+        if (!this._isLoading && this._gridColumns(contentArea) !== this._chunkColumns) {
+          this._updateContent();
+        }
+      }).observe(contentArea);
+    }
   }
   
   /**
-   * Render a single product tile
+   * Get the keyed tile for a product, patching it only where its data
+   * changed: the image is kept across quantity changes
    */
-  _renderProductTile(product) {
+  _tile(product) {
     const qty = this._activeList[product.key]?.qty || 0;
-    const isActive = qty > 0;
+    let tile = this._tiles.get(product.key);
+    if (!tile) {
+      const el = document.createElement('div');
+      el.dataset.key = product.key;
+      tile = { el, name: null, image: null, qty: null };
+      this._tiles.set(product.key, tile);
+    }
+    if (tile.name !== product.name || tile.image !== product.image) {
+      tile.el.innerHTML = this._renderProductTile(product, qty);
+      tile.name = product.name;
+      tile.image = product.image;
+    } else if (tile.qty !== qty) {
+      if (qty > 0 && tile.qty > 0) {
+        tile.el.querySelector('.plus-btn').textContent = qty;
+      } else {
+        tile.el.lastElementChild.outerHTML = this._renderTileControls(product, qty);
+      }
+    }
+    if (tile.qty !== qty) {
+      tile.el.className = `product-tile ${qty > 0 ? 'active' : ''}`;
+      tile.qty = qty;
+    }
+    return tile.el;
+  }
+  
+  /**
+   * Render the inside of a product tile
+   */
+  _renderProductTile(product, qty) {
     const hasImage = product.image && product.image.trim().length > 0;
     
     // Determine if image is URL or emoji
@@ -1854,36 +2531,59 @@ class ShoppingListCard extends HTMLElement {
     const displayImage = hasImage ? product.image : '🛒';
     
     return `
-      <div class="product-tile ${isActive ? 'active' : ''}" data-key="${product.key}">
         <div class="product-name">${product.name}</div>
         
         <div class="product-icon-container">
           ${isUrl ? 
-            `<img src="${displayImage}" class="product-image" alt="${product.name}" onerror="this.style.display='none'; this.nextElementSibling.style.display='block';">
+            `<img src="${displayImage}" class="product-image" alt="${product.name}" loading="lazy" onerror="this.style.display='none'; this.nextElementSibling.style.display='block';">
              <div class="product-emoji" style="display: none;">🛒</div>` :
             `<div class="product-emoji">${displayImage}</div>`
           }
         </div>
         
-        ${isActive ? `
+        ${this._renderTileControls(product, qty)}`;
+  }
+  
+  /**
+   * Render the quantity controls (active) or the add hint (inactive)
+   */
+  _renderTileControls(product, qty) {
+    return qty > 0 ? `
           <div class="quantity-controls">
             <button class="qty-button minus-btn" data-key="${product.key}">−</button>
             <button class="qty-button plus-btn" data-key="${product.key}">${qty}</button>
-          </div>
-        ` : `
-          <div class="tap-to-add">Tap to add</div>
-        `}
-      </div>
-    `;
+          </div>` : `
+          <div class="tap-to-add">Tap to add</div>`;
   }
 
+
   disconnectedCallback() {
+    if (this._unsubscribe) {
+      const unsub = this._unsubscribe;
+      this._unsubscribe = null;
+      Promise.resolve(unsub()).catch(() => {});
+    }
     if (this._pollInterval) {
       clearInterval(this._pollInterval);
+      this._pollInterval = null;
+    }
+    if (this._viewTimer) {
+      clearTimeout(this._viewTimer);
+      this._viewTimer = null;
+    }
+    if (this._subscribeTimer) {
+      clearTimeout(this._subscribeTimer);
+      this._subscribeTimer = null;
     }
     if (this._visibilityHandler) {
       document.removeEventListener('visibilitychange', this._visibilityHandler);
     }
+    if (this._chunkObserver) {
+      // Chunks are observed again (and refilled) on the next update
+      this._chunkObserver.disconnect();
+      this._chunkObserver = null;
+      this._visibleChunks.clear();
+    }
   }
 
   static getConfigElement() {
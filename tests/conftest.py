@@ -0,0 +1,94 @@
+"""Run the integration against the Home Assistant stand-in of the benchmarks."""
+import asyncio
+import os
+import sys
+from typing import Dict
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+sys.path.insert(0, os.path.join(ROOT, "custom_components"))
+
+import fake_hass  # noqa: E402  pylint: disable=wrong-import-position
+
+fake_hass.install()
+
+# pylint: disable=wrong-import-position
+from shopping_list_manager.manager import ShoppingListManager  # noqa: E402
+
+
+def pytest_configure(config):
+    """Register the manager marker."""
+    config.addinivalue_line(
+        "markers", "manager(**kwargs): ShoppingListManager options for the manager fixture"
+    )
+
+
+class Managers:
+    """
+    Opens managers on one config directory, each with its own stand-in.
+
+    Whatever a test leaves open is closed at teardown. close() is a
+    clean unload; crash() stops the stand-in without flushing, as if
+    the process died.
+    """
+
+    def __init__(self, config_dir: str):
+        """Initialize with no managers open."""
+        self.config_dir = config_dir
+        self._open: Dict[ShoppingListManager, fake_hass.HomeAssistant] = {}
+
+    async def open(self, **kwargs) -> ShoppingListManager:
+        """Create and load a manager (save_delay 0 unless given)."""
+        hass = fake_hass.HomeAssistant(self.config_dir)
+        kwargs.setdefault("save_delay", 0)
+        manager = ShoppingListManager(hass, **kwargs)
+        await manager.async_load()
+        self._open[manager] = hass
+        return manager
+
+    async def reopen(self, manager: ShoppingListManager, **kwargs) -> ShoppingListManager:
+        """Close a manager and load a new one from what it stored."""
+        await self.close(manager)
+        return await self.open(**kwargs)
+
+    async def close(self, manager: ShoppingListManager) -> None:
+        """Unload a manager and stop its stand-in."""
+        hass = self._open.pop(manager)
+        await manager.async_close()
+        await hass.async_stop()
+
+    async def crash(self, manager: ShoppingListManager) -> None:
+        """Stop a manager's stand-in without flushing or closing storage."""
+        await self._open.pop(manager).async_stop()
+
+    async def close_all(self) -> None:
+        """Close every manager still open."""
+        for manager in list(self._open):
+            await self.close(manager)
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine to completion on the test's event loop."""
+    loop = asyncio.new_event_loop()
+    try:
+        yield loop.run_until_complete
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def managers(tmp_path, run):
+    """Managers opened on tmp_path as the config directory."""
+    opened = Managers(str(tmp_path))
+    yield opened
+    run(opened.close_all())
+
+
+@pytest.fixture
+def manager(request, managers, run):
+    """A loaded manager; options come from @pytest.mark.manager(...)."""
+    marker = request.node.get_closest_marker("manager")
+    return run(managers.open(**(marker.kwargs if marker else {})))
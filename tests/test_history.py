@@ -0,0 +1,32 @@
+"""Tests for undo/redo."""
+from shopping_list_manager.const import CHANGE_QTY_CHANGED, DEFAULT_LIST_ID, OP_SET_QTY
+from shopping_list_manager.history import HistoryEntry
+
+
+def test_undo_without_change_is_dropped(manager, run):
+    """An entry that no longer changes anything isn't applied or moved to redo."""
+    # pylint: disable=protected-access
+
+    async def test():
+        await manager.async_add_product("milk", "Milk", "dairy")
+        await manager.async_set_qty("milk", 2)
+        revision = manager.get_view()["revision"]
+        # Restores qty 2, which the item already has
+        manager._history.record(HistoryEntry.capture(
+            manager._state,
+            manager._membership,
+            [{"type": CHANGE_QTY_CHANGED, "list_id": DEFAULT_LIST_ID, "key": "milk", "qty": 5}],
+            [OP_SET_QTY],
+        ))
+
+        result = await manager.async_undo()
+        assert result["applied"] is False
+        assert result["revision"] == revision
+        assert not result["can_redo"]
+
+        # The entry below it still undoes the set_qty
+        result = await manager.async_undo()
+        assert result["applied"] is True
+        assert manager.get_active_qty("milk") == 0
+
+    run(test())
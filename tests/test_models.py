@@ -0,0 +1,28 @@
+"""Tests for the data models."""
+import dataclasses
+
+import pytest
+from shopping_list_manager.models import Product, products_from_dict
+
+
+def test_products_from_dict_matches_constructor():
+    """Bulk loading builds the same frozen, interned products as Product()."""
+    products = products_from_dict({
+        "milk": {"key": "milk", "name": "Milk", "category": "fridge"},
+        "eggs": {"key": "eggs", "name": "Eggs", "category": "".join(["fri", "dge"])},
+    })
+    assert products["milk"] == Product("milk", "Milk", "fridge")
+    assert products["milk"].to_dict() == Product("milk", "Milk", "fridge").to_dict()
+    assert products["milk"].category is products["eggs"].category
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        products["milk"].name = "Oat milk"
+
+
+@pytest.mark.parametrize("item", [
+    {"key": "", "name": "Milk"},
+    {"key": "milk", "name": ""},
+])
+def test_products_from_dict_validates(item):
+    """Empty keys and names are rejected like in Product()."""
+    with pytest.raises(ValueError):
+        products_from_dict({"milk": item})
@@ -0,0 +1,55 @@
+"""Tests for op id dedupe across commands."""
+from shopping_list_manager.const import (
+    OP_ADD_PRODUCT,
+    OP_ADJUST_QTY,
+    OP_DELETE_PRODUCT,
+    OP_SET_QTY,
+    REPLAY_DUPLICATE,
+)
+
+
+def test_replay_reports_direct_results(manager, run):
+    """Ops applied by their own command replay with the same result as replay gives."""
+
+    async def test():
+        await manager.async_add_product("milk", "Milk", "fridge", op_id="a")
+        await manager.async_set_qty("milk", 2, op_id="s")
+        await manager.async_adjust_qty("milk", 1, op_id="j")
+        await manager.async_delete_product("gone", op_id="d")
+
+        reply = await manager.async_replay([
+            {"op": OP_ADD_PRODUCT, "key": "milk", "name": "Milk", "op_id": "a"},
+            {"op": OP_SET_QTY, "key": "milk", "qty": 2, "op_id": "s"},
+            {"op": OP_ADJUST_QTY, "key": "milk", "delta": 1, "op_id": "j"},
+            {"op": OP_DELETE_PRODUCT, "key": "gone", "op_id": "d"},
+        ])
+        assert [entry["status"] for entry in reply["results"]] == [REPLAY_DUPLICATE] * 4
+        assert [entry["result"] for entry in reply["results"]] == [
+            manager.get_product("milk").to_dict(),
+            {"qty": 2},
+            {"qty": 3},
+            {"deleted": False},
+        ]
+        assert manager.get_active_qty("milk") == 3
+
+    run(test())
+
+
+def test_direct_duplicates_of_replayed_ops(manager, run):
+    """Ops applied by replay are duplicates for their own command."""
+
+    async def test():
+        await manager.async_replay([
+            {"op": OP_ADD_PRODUCT, "key": "milk", "name": "Milk", "op_id": "a"},
+            {"op": OP_ADJUST_QTY, "key": "milk", "delta": 2, "op_id": "j"},
+        ])
+        revision = manager.get_view()["revision"]
+
+        product = await manager.async_add_product("milk", "Oat milk", op_id="a")
+        assert product.name == "Milk"
+        result = await manager.async_adjust_qty("milk", 2, op_id="j")
+        assert result == {"key": "milk", "list_id": "groceries", "qty": 2, "revision": revision}
+        assert manager.get_product("milk").name == "Milk"
+        assert manager.get_active_qty("milk") == 2
+
+    run(test())
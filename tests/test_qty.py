@@ -0,0 +1,29 @@
+"""Tests for quantity changes."""
+import pytest
+from shopping_list_manager.const import EVENT_SHOPPING_LIST_UPDATED, OP_SET_QTY
+
+
+@pytest.mark.manager(event_delay=0)
+def test_set_qty_without_change(manager, run):
+    """Setting the quantity an item already has commits nothing."""
+    fired = manager.hass.bus.fired
+
+    async def test():
+        await manager.async_add_product("milk", "Milk", "dairy")
+        await manager.async_add_product("bread", "Bread", "bakery")
+        await manager.async_set_qty("bread", 2)
+        revision = manager.get_view()["revision"]
+        events = fired.get(EVENT_SHOPPING_LIST_UPDATED, 0)
+        undo = manager.get_history_stats()["undo"]
+
+        await manager.async_set_qty("milk", 0)
+        await manager.async_set_qty("bread", 2)
+        await manager.async_apply_batch([{"op": OP_SET_QTY, "key": "milk", "qty": 0}])
+
+        assert manager.get_view()["revision"] == revision
+        assert fired.get(EVENT_SHOPPING_LIST_UPDATED, 0) == events
+        assert manager.get_history_stats()["undo"] == undo
+        assert manager.get_active_qty("milk") == 0
+        assert manager.get_active_qty("bread") == 2
+
+    run(test())
@@ -0,0 +1,43 @@
+"""Tests for the product search index."""
+from shopping_list_manager import search
+from shopping_list_manager.models import Product
+from shopping_list_manager.search import ProductSearchIndex
+
+
+def _index(names) -> ProductSearchIndex:
+    index = ProductSearchIndex()
+    for number, (name, category) in enumerate(names):
+        index.add(Product(key=f"p{number}", name=name, category=category))
+    return index
+
+
+def test_candidates_capped(monkeypatch):
+    """Past MAX_CANDIDATES, exact matches and the shortest names are scored."""
+    monkeypatch.setattr(search, "MAX_CANDIDATES", 5)
+    index = _index(
+        [(f"Salted butter {number}", "dairy") for number in range(1000, 1050)]
+        + [("Salted butter", "dairy"), ("Salt", "pantry"), ("Salted crisps", "snacks")]
+    )
+
+    found = index.search("salted butter", limit=3)
+    assert found["exact_match"]
+    assert found["total"] <= 6
+    assert found["results"][0]["key"] == "p50"
+
+    found = index.search("salt", limit=2)
+    assert [hit["key"] for hit in found["results"]] == ["p51", "p50"]
+
+    found = index.search("salted", category="snacks")
+    assert [hit["key"] for hit in found["results"]] == ["p52"]
+
+
+def test_remove_updates_every_index():
+    """A removed product is no longer found, by name or by category."""
+    index = _index([("Milk", "dairy"), ("Oat milk", "dairy")])
+    index.remove("p0")
+    found = index.search("milk", category="dairy")
+    assert not found["exact_match"]
+    assert [hit["key"] for hit in found["results"]] == ["p1"]
+    # pylint: disable=protected-access
+    assert all("p0" not in keys for keys in index._sizes.values())
+    assert index._categories == {"dairy": {"p1"}}
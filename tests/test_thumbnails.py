@@ -0,0 +1,146 @@
+"""Tests for the thumbnail cache, using local source images."""
+import asyncio
+import os
+import sys
+
+import fake_hass
+import pytest
+from PIL import Image
+from shopping_list_manager.const import THUMBNAIL_DIR, THUMBNAIL_URL_PATH
+from shopping_list_manager.thumbnails import ThumbnailCache
+
+
+def _write_image(path: str, size=(400, 300), color=(200, 30, 30)) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.new("RGB", size, color).save(path, "PNG")
+
+
+@pytest.fixture
+def cache(tmp_path, run):
+    """A loaded thumbnail cache on tmp_path as the config directory."""
+
+    async def load():
+        hass = fake_hass.HomeAssistant(str(tmp_path))
+        thumbnails = ThumbnailCache(hass)
+        await thumbnails.async_load()
+        return hass, thumbnails
+
+    hass, thumbnails = run(load())
+    yield thumbnails
+    run(thumbnails.async_shutdown())
+    run(hass.async_stop())
+
+
+def test_webp_thumbnail(tmp_path, cache, run):
+    """Local images are downscaled to a 96px WebP."""
+    _write_image(str(tmp_path / "www" / "milk.png"))
+
+    async def test():
+        url = await cache.async_get_thumbnail("/local/milk.png")
+        assert url.startswith(THUMBNAIL_URL_PATH + "/") and url.endswith(".webp")
+        path = os.path.join(str(tmp_path), THUMBNAIL_DIR, url.rsplit("/", 1)[1])
+        with Image.open(path) as image:
+            assert image.format == "WEBP"
+            assert max(image.size) == 96
+        assert cache.lookup("/local/milk.png") == url
+        assert not [name for name in os.listdir(os.path.dirname(path)) if name.endswith(".tmp")]
+
+    run(test())
+
+
+def test_dedupe_by_content_hash(tmp_path, cache, run):
+    """Identical images share one thumbnail file; different ones don't."""
+    _write_image(str(tmp_path / "www" / "a.png"))
+    _write_image(str(tmp_path / "www" / "copy" / "b.png"))
+    _write_image(str(tmp_path / "www" / "c.png"), color=(0, 0, 255))
+
+    async def test():
+        first, second, third = await asyncio.gather(
+            cache.async_get_thumbnail("/local/a.png"),
+            cache.async_get_thumbnail("/local/copy/b.png"),
+            cache.async_get_thumbnail("/local/c.png"),
+        )
+        assert first == second
+        assert third != first
+        assert len(os.listdir(os.path.join(str(tmp_path), THUMBNAIL_DIR))) == 2
+
+    run(test())
+
+
+def test_percent_encoded_local_path(tmp_path, cache, run):
+    """/local paths are percent-decoded, and the decoded path must stay in www."""
+    _write_image(str(tmp_path / "www" / "oat milk.png"))
+    _write_image(str(tmp_path / "secret.png"))
+
+    async def test():
+        assert await cache.async_get_thumbnail("/local/oat%20milk.png?v=2") is not None
+        assert await cache.async_get_thumbnail("/local/..%2Fsecret.png") is None
+
+    run(test())
+
+
+def test_shutdown_cancels_generation(cache, run, monkeypatch):
+    """Thumbnails still being generated are cancelled on shutdown."""
+    started = asyncio.Event()
+    cancelled = []
+
+    async def fetch_forever(source):
+        started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(source)
+            raise
+
+    monkeypatch.setattr(cache, "_async_fetch", fetch_forever)
+
+    async def test():
+        waiter = asyncio.ensure_future(cache.async_get_thumbnail("https://example.com/a.png"))
+        await started.wait()
+        await asyncio.wait_for(cache.async_shutdown(), 1)
+        assert cancelled == ["https://example.com/a.png"]
+        waiter.cancel()
+
+    run(test())
+
+
+def test_refuses_paths_outside_www(tmp_path, cache, run):
+    """/local paths can't escape www, not even through a symlink."""
+    _write_image(str(tmp_path / "secret.png"))
+    os.makedirs(str(tmp_path / "www"))
+    os.symlink(str(tmp_path / "secret.png"), str(tmp_path / "www" / "link.png"))
+
+    async def test():
+        assert await cache.async_get_thumbnail("/local/../secret.png") is None
+        assert await cache.async_get_thumbnail("/local/link.png") is None
+        assert not os.path.exists(os.path.join(str(tmp_path), THUMBNAIL_DIR))
+
+    run(test())
+
+
+def test_refuses_private_addresses(cache, run):
+    """Remote sources on loopback or private addresses are never fetched."""
+
+    async def test():
+        for source in (
+            "http://127.0.0.1/a.png",
+            "http://localhost:8123/local/a.png",
+            "http://192.168.1.10/a.png",
+            "http://[::1]/a.png",
+        ):
+            assert await cache.async_get_thumbnail(source) is None
+            assert cache.lookup(source) is None
+
+    run(test())
+
+
+def test_without_pillow(tmp_path, monkeypatch, cache, run):
+    """Without Pillow the source is left as it is."""
+    _write_image(str(tmp_path / "www" / "milk.png"))
+    monkeypatch.setitem(sys.modules, "PIL", None)
+
+    async def test():
+        assert await cache.async_get_thumbnail("/local/milk.png") is None
+        assert cache.lookup("/local/milk.png") is None
+
+    run(test())
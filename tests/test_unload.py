@@ -0,0 +1,62 @@
+"""Tests for shutting the manager down."""
+import asyncio
+
+import pytest
+from shopping_list_manager.const import ENGINE_SQLITE
+
+
+class _SlowThumbnails:
+    """Thumbnail cache whose thumbnails never finish."""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+        self.cancelled = False
+
+    @staticmethod
+    def wants_thumbnail(image: str) -> bool:
+        return bool(image)
+
+    @staticmethod
+    def lookup(source: str):
+        return None
+
+    async def async_get_thumbnail(self, source: str):
+        self.started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+def test_close_cancels_thumbnail_tasks(managers, run):
+    """Pending thumbnail swaps are cancelled before storage is closed."""
+    thumbnails = _SlowThumbnails()
+
+    async def test():
+        manager = await managers.open(thumbnails=thumbnails)
+        await manager.async_add_product("milk", "Milk", image="https://example.com/milk.png")
+        await thumbnails.started.wait()
+
+        await asyncio.wait_for(managers.close(manager), 1)
+        assert thumbnails.cancelled
+
+    run(test())
+
+
+@pytest.mark.manager(storage_engine=ENGINE_SQLITE)
+def test_sqlite_commit_after_close(manager, managers, run):
+    """A commit reaching a closed database is dropped, not an error."""
+
+    async def test():
+        await manager.async_add_product("milk", "Milk")
+        await managers.close(manager)
+
+        backend = manager._backend  # pylint: disable=protected-access
+        backend.async_commit(99, [], set(), set())
+        await backend.async_flush()
+
+        reloaded = await managers.open(storage_engine=ENGINE_SQLITE)
+        assert reloaded.get_product("milk").name == "Milk"
+
+    run(test())
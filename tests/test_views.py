@@ -0,0 +1,13 @@
+"""Tests for the encoded catalog views."""
+import orjson
+
+
+def test_view_json_fields(manager, run):
+    """An empty field list and no field list are cached separately."""
+    run(manager.async_add_product("milk", "Milk", "fridge"))
+
+    full = orjson.loads(manager.get_view_json(split=False))
+    keys_only = orjson.loads(manager.get_view_json(split=False, fields=[]))
+    assert full["products"][0]["products"][0]["name"] == "Milk"
+    assert keys_only["products"][0]["products"][0] == {"key": "milk", "qty": 0}
+    assert orjson.loads(manager.get_view_json(split=False)) == full
@@ -0,0 +1,38 @@
+"""Tests for the WebSocket command middleware."""
+from types import SimpleNamespace
+
+from shopping_list_manager import websocket_api
+from shopping_list_manager.const import DOMAIN, WS_RATE_BURST
+
+
+class _Connection:
+    """Records the replies sent to one client."""
+
+    def __init__(self):
+        self.subscriptions = {}
+        self.results = []
+        self.errors = []
+
+    def send_result(self, msg_id, result=None):
+        self.results.append(msg_id)
+
+    def send_error(self, msg_id, code, message):
+        self.errors.append((msg_id, code))
+
+
+def test_rate_limit_rejects_past_burst(manager, monkeypatch):
+    """A full bucket admits WS_RATE_BURST requests and rejects the next one."""
+    # No time passes, so nothing is refilled
+    monkeypatch.setattr(websocket_api, "time", SimpleNamespace(monotonic=lambda: 1000.0))
+    manager.hass.data[DOMAIN] = {"manager": manager}
+    connection = _Connection()
+
+    for msg_id in range(1, WS_RATE_BURST + 2):
+        websocket_api.websocket_get_lists(
+            manager.hass, connection, {"id": msg_id, "type": f"{DOMAIN}/get_lists"}
+        )
+
+    assert connection.results == list(range(1, WS_RATE_BURST + 1))
+    assert connection.errors == [(WS_RATE_BURST + 1, "rate_limited")]
+    for forget in connection.subscriptions.values():
+        forget()